@@ -0,0 +1,69 @@
+import threading
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import LazyBind, enable_sqlite_foreign_keys
+from app.metrics import instrument_engine
+from app.pool_metrics import async_pool_metrics, engine_options
+from app.settings import database_url
+from app.slow_queries import install_slow_query_log
+
+_lock = threading.Lock()
+_async_engine = None
+
+
+def to_async_url(url: str) -> str:
+    """
+    Map a sync DATABASE_URL onto its async driver:
+    postgresql -> asyncpg, sqlite -> aiosqlite.
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+
+    if backend in ("postgres", "postgresql"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+        # asyncpg takes `ssl` instead of libpq's `sslmode`
+        if "sslmode" in parsed.query:
+            sslmode = parsed.query["sslmode"]
+            parsed = parsed.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+        return parsed.render_as_string(hide_password=False)
+
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+
+    return url
+
+
+def get_async_engine():
+    """The async engine for request handlers, created from DATABASE_URL on first use."""
+    global _async_engine
+    if _async_engine is None:
+        with _lock:
+            if _async_engine is None:
+                url = to_async_url(database_url())
+                engine = create_async_engine(
+                    url, **engine_options(make_url(url), async_pool_metrics, async_engine=True),
+                )
+                enable_sqlite_foreign_keys(engine.sync_engine)
+                install_slow_query_log(engine.sync_engine)
+                instrument_engine(engine.sync_engine)
+                _async_engine = engine
+    return _async_engine
+
+
+class LazyAsyncSessionmaker(LazyBind, async_sessionmaker):
+    get_bind = staticmethod(get_async_engine)
+
+
+AsyncSessionLocal = LazyAsyncSessionmaker(
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def get_async_db():
+    """The request-scoped session dependency shared by every router."""
+    async with AsyncSessionLocal() as db:
+        yield db
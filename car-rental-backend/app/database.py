@@ -1,25 +1,59 @@
-import os
-from sqlalchemy import create_engine
+import threading
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
+from app.metrics import instrument_engine
+from app.pool_metrics import engine_options, sync_pool_metrics
+from app.settings import database_url
+from app.slow_queries import install_slow_query_log
 
-# Force load using absolute path
-ENV_PATH = "/home/shanavas/Documents/Lascade-Machine-test/car-rental-backend/.env"
-load_dotenv(ENV_PATH)
+_lock = threading.Lock()
+_engine = None
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-print("Loaded DATABASE_URL =", DATABASE_URL)  # DEBUG LINE
 
-engine = create_engine(DATABASE_URL)
+def enable_sqlite_foreign_keys(sync_engine):
+    """SQLite only enforces FOREIGN KEY constraints when asked to, per connection."""
+    if sync_engine.dialect.name != "sqlite":
+        return
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    @event.listens_for(sync_engine, "connect")
+    def _set_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
 
-Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def get_engine():
+    """The sync engine, created from DATABASE_URL on first use."""
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                url = database_url()
+                # Pool size / overflow / timeout / recycle come from DB_POOL_* (see app/pool_metrics.py)
+                engine = create_engine(url, **engine_options(make_url(url), sync_pool_metrics))
+                enable_sqlite_foreign_keys(engine)
+                install_slow_query_log(engine)
+                instrument_engine(engine)
+                _engine = engine
+    return _engine
+
+
+class LazyBind:
+    """Session factory mixin: binds to `get_bind()` on the first session instead of at import."""
+
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=self.get_bind())
+        return super().__call__(**local_kw)
+
+
+class LazySessionmaker(LazyBind, sessionmaker):
+    get_bind = staticmethod(get_engine)
+
+
+SessionLocal = LazySessionmaker(autocommit=False, autoflush=False)
+
+Base = declarative_base()
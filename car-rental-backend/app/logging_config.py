@@ -0,0 +1,150 @@
+"""
+Structured, leveled logging for the API.
+
+Handlers never run on the request path: the `app` logger hands records to
+a QueueHandler and a QueueListener thread formats and writes them. Each
+record carries the request's correlation id (taken from X-Request-ID or
+generated, and echoed back on the response). DEBUG records are sampled per
+request with LOG_DEBUG_SAMPLE_RATE, so a sampled request keeps all of its
+debug events. When DEBUG is off, `logger.debug()` returns
+after one level check, and hot loops guard on `logger.isEnabledFor()`.
+
+Settings: LOG_LEVEL (INFO), LOG_FORMAT (json | text), LOG_DEBUG_SAMPLE_RATE (1.0).
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+
+from app.settings import load_env
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+debug_sampled_var: ContextVar[bool] = ContextVar("debug_sampled", default=True)
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+_listener: QueueListener | None = None
+_debug_sample_rate = 1.0
+
+
+def log_settings() -> dict:
+    load_env()
+    return {
+        "level": os.getenv("LOG_LEVEL", "INFO").upper(),
+        "format": os.getenv("LOG_FORMAT", "json").lower(),
+        "debug_sample_rate": float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0")),
+    }
+
+
+class ContextFilter(logging.Filter):
+    """Stamps the current request id and drops DEBUG records of unsampled requests."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG and not debug_sampled_var.get():
+            return False
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra={...}` fields become top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            data["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "request_id"):
+            record.request_id = None
+        line = super().format(record)
+        extras = {k: v for k, v in record.__dict__.items() if k not in _RESERVED}
+        return f"{line} {extras}" if extras else line
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread; only resolve %-args here
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging():
+    """Route the `app` logger through a background queue listener. Idempotent."""
+    global _listener, _debug_sample_rate
+    if _listener is not None:
+        return
+
+    settings = log_settings()
+    _debug_sample_rate = settings["debug_sample_rate"]
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if settings["format"] == "json" else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+
+    logger = logging.getLogger("app")
+    logger.setLevel(settings["level"])
+    logger.handlers = [handler]
+    logger.propagate = False
+
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class RequestIdMiddleware:
+    """Binds a correlation id to each HTTP request and returns it as X-Request-ID."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        sampled_token = debug_sampled_var.set(_debug_sample_rate >= 1.0 or random.random() < _debug_sample_rate)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
+            debug_sampled_var.reset(sampled_token)
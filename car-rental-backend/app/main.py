@@ -1,48 +1,104 @@
-import os
+import time
+
+# Import time of the app itself (reported on /health/ready and /metrics)
+_import_started = time.perf_counter()
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import cars, filters, location
-from app.scripts.seed_data import seed_database
-from app.scripts.create_tables import create_tables
-from dotenv import load_dotenv
+from app.routers import admin, cars, filters, location
+from app.services.inventory_index import index_enabled, load_index, snapshot_stats
+from app.services.inventory_state import on_inventory_change
+from app.services.location_suggest import load_suggest_index
+from app.services.offer_query import statement_cache_stats
+from app.services.pagination import count_cache
+from app.services.response_cache import cars_cache, histogram_cache
+from app.pool_metrics import pool_stats
+from app.metrics import MetricsMiddleware, gauge_lines, render_metrics
+from app.logging_config import RequestIdMiddleware, configure_logging
+from app.settings import cors_origins, snapshot_settings, startup_settings
+from app.startup import (
+    is_ready, readiness, record_import, startup_timings, warm_up, watch_inventory, watch_snapshot,
+)
+
+logger = logging.getLogger("app.main")
+
+# CORS_ORIGINS (comma-separated), defaulting to local + Vercel production
+origins = cors_origins()
+
+
+# Rebuild the in-memory indexes whenever the inventory version changes (an ingest /
+# sync in this or another process) or a newer offer snapshot is published
+@on_inventory_change
+def reload_inventory_index(version: int):
+    if index_enabled():
+        load_index()
+
+
+on_inventory_change(lambda version: load_suggest_index())
+# Drop cached /cars and histogram responses (and cursor-page totals) once the new inventory is being served
+on_inventory_change(lambda version: cars_cache.clear())
+on_inventory_change(lambda version: histogram_cache.clear())
+on_inventory_change(lambda version: count_cache.clear())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Configure logging, then warm up the pools and in-memory indexes (see app/startup.py)."""
+    configure_logging()
+    logger.info("CORS configured", extra={"cors_origins": origins})
+
+    settings = startup_settings()
+    tasks = []
+    if settings["warmup"] == "blocking":
+        await warm_up(settings["pool_prewarm"])
+    else:
+        tasks.append(asyncio.create_task(warm_up(settings["pool_prewarm"])))
+
+    if settings["inventory_poll_seconds"] > 0:
+        tasks.append(asyncio.create_task(watch_inventory(settings["inventory_poll_seconds"])))
+    snapshot = snapshot_settings()
+    if snapshot["dir"] and index_enabled():
+        tasks.append(asyncio.create_task(watch_snapshot(snapshot["dir"], snapshot["poll_seconds"])))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
 
-# Load environment variables (.env for local, Render injects automatically)
-load_dotenv()
 
 app = FastAPI(
     title="Car Rental API",
     description="API for car rental service",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
-#  CORS CONFIGURATION (FIXED)
-cors_env = os.getenv("CORS_ORIGINS")
-
-if cors_env:
-    # Split by comma and strip whitespaces
-    cors_origins = [c.strip() for c in cors_env.split(",")]
-else:
-    # Default origins for local + Vercel production
-    cors_origins = [
-        "http://localhost:3000",
-        "http://127.0.0.1:3000",
-        "https://lascade-machine-test.vercel.app",
-    ]
-
-print("Using CORS origins:", cors_origins)
-
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=cors_origins,
+    allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
+# Correlation id for every request's log records
+app.add_middleware(RequestIdMiddleware)
+
+# Per-route request metrics and per-statement SQL timings (engines are instrumented on creation)
+app.add_middleware(MetricsMiddleware)
+
 # ROUTERS
 app.include_router(cars.router)
 app.include_router(filters.router)
 app.include_router(location.router)
+app.include_router(admin.router)
 
 
 # BASE ROUTES
@@ -60,3 +116,50 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+
+@app.get("/health/ready")
+def readiness_check():
+    """200 once startup warm-up (pools, inventory and location indexes) has finished, 503 before."""
+    return JSONResponse(readiness(), status_code=200 if is_ready() else 503)
+
+
+@app.get("/health/pool")
+def pool_health():
+    """Connection pool settings, occupancy and wait/overflow/timeout counters."""
+    return pool_stats()
+
+
+@app.get("/health/cache")
+def cache_health():
+    """/cars response cache occupancy and hit/miss counters."""
+    return cars_cache.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus text exposition of request, SQL, pool and cache metrics."""
+    pools = pool_stats()
+    return PlainTextResponse(
+        render_metrics(
+            gauge_lines("db_pool_sync", "Sync engine pool occupancy and counters.", pools["sync"], "stat")
+            + gauge_lines("db_pool_async", "Async engine pool occupancy and counters.", pools["async"], "stat")
+            + gauge_lines("cars_response_cache", "/cars response cache occupancy and counters.", cars_cache.stats(), "stat")
+            + gauge_lines(
+                "price_histogram_cache", "/filters/price-histogram cache occupancy and counters.",
+                histogram_cache.stats(), "stat",
+            )
+            + gauge_lines("app_startup_seconds", "Import and warm-up time per phase.", startup_timings(), "phase")
+            + gauge_lines(
+                "cars_query_statements", "Cached /cars query statements (one per filter shape) and lookups.",
+                statement_cache_stats(), "stat",
+            )
+            + gauge_lines(
+                "inventory_snapshot", "Offer snapshot read by the inventory index (version, rows, bytes, mapped, age).",
+                snapshot_stats(), "stat",
+            )
+        ),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+record_import(time.perf_counter() - _import_started)
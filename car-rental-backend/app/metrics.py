@@ -0,0 +1,221 @@
+"""
+Request and database metrics in the Prometheus text format.
+
+MetricsMiddleware records per-route request counts, latency and response
+size histograms and the number of requests in flight. Engine event hooks
+time every SQL statement and record its row count (where the driver
+reports one for SELECTs, e.g. psycopg2 / asyncpg; SQLite doesn't). Both
+are labelled with the route's path template, and each request's total
+time spent in the database is recorded too. Comparing that with the
+request latency shows how much of a /cars call is the page query, the
+COUNT(*) and the Python work around them.
+
+Everything is plain counters behind one lock; no external client library.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+ROW_BUCKETS = (0, 1, 10, 50, 100, 1000, 10000, 100000)
+
+_lock = threading.Lock()
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: tuple, buckets: tuple):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, label_values: tuple, value: float):
+        with _lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total) in sorted(self.series.items()):
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{{{labels + ',' if labels else ''}{le}}} {cumulative}")
+            lines.append(f"{self.name}_sum{_braces(labels)} {total}")
+            lines.append(f"{self.name}_count{_braces(labels)} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple, kind: str = "counter"):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.kind = kind
+        self.series = {}
+
+    def inc(self, label_values: tuple = (), amount: float = 1):
+        with _lock:
+            self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for label_values, value in sorted(self.series.items()):
+            lines.append(f"{self.name}{_braces(_labels(self.labels, label_values))} {value}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _braces(labels: str) -> str:
+    return f"{{{labels}}}" if labels else ""
+
+
+requests_total = Counter("http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status"))
+request_seconds = Histogram("http_request_duration_seconds", "HTTP request latency.", ("route", "method"), LATENCY_BUCKETS)
+response_bytes = Histogram("http_response_size_bytes", "HTTP response body size.", ("route", "method"), SIZE_BUCKETS)
+in_flight = Counter("http_requests_in_flight", "HTTP requests being served.", (), kind="gauge")
+request_db_seconds = Histogram("http_request_db_seconds", "Time each request spent in SQL statements.", ("route",), LATENCY_BUCKETS)
+statement_seconds = Histogram("db_statement_duration_seconds", "SQL statement execution time.", ("route", "statement"), LATENCY_BUCKETS)
+statement_rows = Histogram("db_statement_rows", "Rows returned or affected per SQL statement.", ("route", "statement"), ROW_BUCKETS)
+compiled_cache = Counter(
+    "db_compiled_cache_total",
+    "SQL statement executions by compiled-cache outcome (CACHE_HIT, CACHE_MISS, NO_CACHE_KEY, ...).",
+    ("route", "result"),
+)
+
+REGISTRY = [
+    requests_total, request_seconds, response_bytes, in_flight, request_db_seconds,
+    statement_seconds, statement_rows, compiled_cache,
+]
+
+
+class _RequestStats:
+    __slots__ = ("scope", "db_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.db_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+
+_current: ContextVar[_RequestStats | None] = ContextVar("request_metrics", default=None)
+
+
+def current_request() -> _RequestStats | None:
+    """The in-flight request (scope, route) for code running on its behalf, e.g. engine events."""
+    return _current.get()
+
+
+class MetricsMiddleware:
+    """Per-route request counts, latency, response size and in-flight gauge."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = _RequestStats(scope)
+        token = _current.set(stats)
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_flight.inc((), 1)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.inc((), -1)
+            _current.reset(token)
+            route, method = stats.route, scope["method"]
+            requests_total.inc((route, method, status))
+            request_seconds.observe((route, method), elapsed)
+            response_bytes.observe((route, method), size)
+            if route != "unmatched":
+                request_db_seconds.observe((route,), stats.db_seconds)
+
+
+def _statement_kind(statement: str) -> str:
+    head = statement.lstrip()[:40].lower()
+    if head.startswith("select count(*)"):
+        return "count"
+    return head.split(None, 1)[0] if head else "other"
+
+
+def instrument_engine(sync_engine):
+    """Time every statement on `sync_engine` (pass async_engine.sync_engine for async engines)."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_start", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        stats = _current.get()
+        route = stats.route if stats is not None else "background"
+        if stats is not None:
+            stats.db_seconds += elapsed
+        kind = _statement_kind(statement)
+        statement_seconds.observe((route, kind), elapsed)
+        rowcount = getattr(cursor, "rowcount", -1)
+        if rowcount is not None and rowcount >= 0:
+            statement_rows.observe((route, kind), rowcount)
+        # Whether SQLAlchemy reused a compiled form of the statement (text() and DDL have none)
+        cache_hit = getattr(context, "cache_hit", None)
+        if cache_hit is not None:
+            compiled_cache.inc((route, getattr(cache_hit, "name", str(cache_hit))))
+
+
+def gauge_lines(name: str, help_text: str, values: dict, label: str) -> list[str]:
+    """Gauges for the numeric entries of a stats dict, e.g. pool_stats()["sync"]."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for key, value in values.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f'{name}{{{label}="{_escape(key)}"}} {value}')
+    return lines
+
+
+def render_metrics(extra: list[str] | None = None) -> str:
+    lines = []
+    with _lock:
+        for metric in REGISTRY:
+            lines.extend(metric.render())
+    if extra:
+        lines.extend(extra)
+    return "\n".join(lines) + "\n"
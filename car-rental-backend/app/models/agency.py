@@ -1,11 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, Index
 from app.database import Base
 
 class Agency(Base):
     __tablename__ = "agencies"
+    __table_args__ = (
+        # One row per agency code (the feed repeats agencies on every result)
+        Index("uq_agencies_code", "code", unique=True),
+        Index("ix_agencies_name", "name"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     code = Column(String)
     logo = Column(String)
-    rating = Column(Float)
\ No newline at end of file
+    rating = Column(Float)
@@ -1,8 +1,15 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from app.database import Base
 
 class Car(Base):
     __tablename__ = "cars"
+    __table_args__ = (
+        # /cars filters (type / category / fuel IN ...) and sort_by=name
+        Index("ix_cars_type", "type"),
+        Index("ix_cars_category", "category"),
+        Index("ix_cars_fuel", "fuel"),
+        Index("ix_cars_name", "name"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
@@ -13,4 +20,4 @@ class Car(Base):
     passengers = Column(Integer)
     bags = Column(Integer)
     sipp = Column(String)
-    image = Column(String)
\ No newline at end of file
+    image = Column(String)
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, Float
+from app.database import Base
+
+class InventoryMeta(Base):
+    """The shared inventory version: a single row (id 1), bumped by every inventory write."""
+    __tablename__ = "inventory_meta"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(Float)
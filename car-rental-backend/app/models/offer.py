@@ -0,0 +1,59 @@
+from sqlalchemy import Boolean, Column, Float, Index, Integer, MetaData, String, Table, func
+from app.database import Base
+
+# Kept out of Base.metadata: on Postgres car_offers is a materialized view,
+# created and refreshed by app.services.offers rather than create_all()
+offers_metadata = MetaData()
+
+car_offers = Table(
+    "car_offers",
+    offers_metadata,
+    Column("id", Integer, primary_key=True),  # car_prices.id
+    Column("car_id", Integer, nullable=False),
+    Column("car_name", String),
+    Column("car_type", String),
+    Column("car_category", String),
+    Column("car_fuel", String),
+    Column("car_transmission", String),
+    Column("car_image", String),
+    Column("car_passengers", Integer),
+    Column("car_bags", Integer),
+    Column("car_sipp", String),
+    Column("agency_id", Integer, nullable=False),
+    Column("agency_name", String),
+    Column("agency_code", String),
+    Column("agency_logo", String),
+    Column("agency_rating", Float, nullable=False),  # COALESCE(rating, 0), the rating sort key
+    Column("provider_id", Integer, nullable=False),
+    Column("provider_name", String),
+    Column("provider_logo", String),
+    Column("price", Float),
+    Column("free_cancellation", Boolean),
+    Column("unlimited_mileage", Boolean),
+    Column("fuel_policy", String),
+    Column("pickup_location", String),
+    Column("latitude", Float),
+    Column("longitude", Float),
+)
+
+# Sorts, each tie-broken by id for keyset pagination
+Index("ix_car_offers_price_id", car_offers.c.price, car_offers.c.id)
+Index("ix_car_offers_rating_id", car_offers.c.agency_rating.desc(), car_offers.c.id)
+Index("ix_car_offers_name_id", func.coalesce(car_offers.c.car_name, ""), car_offers.c.id)
+# Multi-value filters, ordered by price within each value
+Index("ix_car_offers_type_price", car_offers.c.car_type, car_offers.c.price)
+Index("ix_car_offers_category_price", car_offers.c.car_category, car_offers.c.price)
+Index("ix_car_offers_fuel_price", car_offers.c.car_fuel, car_offers.c.price)
+Index("ix_car_offers_agency_price", car_offers.c.agency_name, car_offers.c.price)
+Index("ix_car_offers_flags_price", car_offers.c.free_cancellation, car_offers.c.unlimited_mileage, car_offers.c.price)
+# /cars/{id} and radius search
+Index("ix_car_offers_car_id", car_offers.c.car_id)
+Index("ix_car_offers_lat_lon", car_offers.c.latitude, car_offers.c.longitude)
+
+
+class CarOffer(Base):
+    """
+    One flattened, read-only row per car_prices row with the car, agency and
+    provider columns the search endpoints return.
+    """
+    __table__ = car_offers
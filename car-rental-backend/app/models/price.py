@@ -1,17 +1,31 @@
-from sqlalchemy import Column, Integer, Float, Boolean, String, ForeignKey
+from sqlalchemy import Column, Integer, Float, Boolean, String, ForeignKey, Index
 from app.database import Base
 
 class CarPrice(Base):
     __tablename__ = "car_prices"
+    __table_args__ = (
+        # Price sorts and keyset pagination: ORDER BY price, id
+        Index("ix_car_prices_price_id", "price", "id"),
+        # Flag filters combined with a price range / price sort
+        Index("ix_car_prices_flags_price", "free_cancellation", "unlimited_mileage", "price"),
+        # Joins from each dimension, ordered by price within it
+        Index("ix_car_prices_car_id_price", "car_id", "price"),
+        Index("ix_car_prices_agency_id_price", "agency_id", "price"),
+        Index("ix_car_prices_provider_id", "provider_id"),
+        # Radius search bounding box
+        Index("ix_car_prices_lat_lon", "latitude", "longitude"),
+        # pickup_location substring search uses the trigram / FTS5 index
+        # created by app.services.location_search.create_location_index
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    car_id = Column(Integer)
-    agency_id = Column(Integer)
-    provider_id = Column(Integer)
+    car_id = Column(Integer, ForeignKey("cars.id", name="fk_car_prices_car_id", ondelete="CASCADE"), nullable=False)
+    agency_id = Column(Integer, ForeignKey("agencies.id", name="fk_car_prices_agency_id"), nullable=False)
+    provider_id = Column(Integer, ForeignKey("providers.id", name="fk_car_prices_provider_id"), nullable=False)
     price = Column(Float)
     free_cancellation = Column(Boolean, default=False)
     unlimited_mileage = Column(Boolean, default=False)
     fuel_policy = Column(String)
     pickup_location = Column(String)
     latitude = Column(Float)
-    longitude = Column(Float)
\ No newline at end of file
+    longitude = Column(Float)
@@ -1,8 +1,12 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from app.database import Base
 
 class Provider(Base):
     __tablename__ = "providers"
+    __table_args__ = (
+        # One row per provider name
+        Index("uq_providers_name", "name", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
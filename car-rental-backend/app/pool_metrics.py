@@ -0,0 +1,124 @@
+"""
+Connection pool settings and introspection.
+
+Both engines (sync for scripts / index loading, async for request handlers)
+are built with the same DB_POOL_* settings and an instrumented pool class
+that records how long callers wait for a connection, how often the pool
+has to overflow past its size, and how often it times out. /health/pool
+exposes the numbers so pools can be sized per worker.
+"""
+import os
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.settings import load_env
+
+
+def pool_settings() -> dict:
+    """create_engine() pool keyword arguments from the environment."""
+    load_env()
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+    }
+
+
+class PoolMetrics:
+    """Counters for one engine's pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_checkout(self, waited: float, overflowed: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            if overflowed:
+                self.overflow_checkouts += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        pool = self.pool
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+        if pool is not None:
+            data.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+            })
+        return data
+
+
+class _InstrumentedPoolMixin:
+    metrics: PoolMetrics
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.pool = self
+        self.metrics.record_checkout(time.perf_counter() - start, self.checkedout() > self.size())
+        return connection
+
+
+def instrumented_pool(metrics: PoolMetrics, async_engine: bool = False):
+    """
+    A pool class reporting into `metrics`. The metrics object lives on the
+    class so it survives Pool.recreate() on engine.dispose().
+    """
+    base = AsyncAdaptedQueuePool if async_engine else QueuePool
+    # SQLAlchemy names pool loggers after the class module; keep them under sqlalchemy.pool
+    return type(
+        f"Instrumented{base.__name__}",
+        (_InstrumentedPoolMixin, base),
+        {"metrics": metrics, "__module__": base.__module__},
+    )
+
+
+def engine_options(url, metrics: PoolMetrics, async_engine: bool = False) -> dict:
+    """create_engine() keyword arguments for `url`, using the shared pool settings."""
+    database = url.database or ""
+    if url.get_backend_name() == "sqlite" and database in ("", ":memory:"):
+        # In-memory SQLite needs its single-connection default pool
+        return {}
+    return {"poolclass": instrumented_pool(metrics, async_engine), **pool_settings()}
+
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+
+def pool_stats() -> dict:
+    return {
+        "settings": pool_settings(),
+        "sync": sync_pool_metrics.snapshot(),
+        "async": async_pool_metrics.snapshot(),
+    }
@@ -0,0 +1,51 @@
+import hmac
+
+from fastapi import APIRouter, Header, HTTPException
+
+from app.scripts.sync_inventory import SyncInProgress, sync_feed
+from app.settings import admin_token
+from app.slow_queries import slow_query_log
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def check_admin_token(token: str | None):
+    """
+    Admin endpoints require X-Admin-Token to match ADMIN_TOKEN, and don't
+    exist (404) when no token is configured.
+    """
+    expected = admin_token()
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token is None or not hmac.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/slow-queries")
+def get_slow_queries(x_admin_token: str | None = Header(None)):
+    """Slowest statements (with plans) and the most recent ones over the threshold."""
+    check_admin_token(x_admin_token)
+    return slow_query_log.snapshot()
+
+
+@router.delete("/slow-queries")
+def clear_slow_queries(x_admin_token: str | None = Header(None)):
+    check_admin_token(x_admin_token)
+    slow_query_log.clear()
+    return {"cleared": True}
+
+
+@router.post("/inventory/sync")
+def sync_inventory(x_admin_token: str | None = Header(None)):
+    """
+    Apply the feed's inserts, updates and deletes to the stored inventory
+    and, if anything changed, bump the shared inventory version (every
+    worker reloads its indexes and caches). 409 while another sync or
+    ingest runs.
+    """
+    check_admin_token(x_admin_token)
+    try:
+        stats = sync_feed()
+    except SyncInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return stats.summary()
@@ -1,60 +1,45 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
-from app.models.car import Car
-from app.models.price import CarPrice
-from app.models.agency import Agency
-from app.models. provider import Provider
-import re
+import logging
+
+import orjson
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.async_database import get_async_db, get_async_engine
+from app.models.offer import CarOffer
+from app.schemas.car import CarBatchRequest
+from app.services.inventory_index import get_index
+from app.services.inventory_state import inventory_updated_at, inventory_version
+from app.services.response_cache import cached_response, cars_cache
+from app.services.serializers import (
+    add_group, encode_car_offer, encode_car_offers, encode_offer, encode_page, json_response,
+)
+from app.services.search_params import split_values
+from app.services.location_search import normalize_location_search
+from app.services.export import MEDIA_TYPES, stream_offers
+from app.services.offer_groups import GROUP_BY_PATTERN, group_key, top_offers
+from app.services.offer_query import (
+    count_statement, filtered_statement, filters_key, rows_statement, search_filters,
+)
+from app.services.geo_index import haversine_km, parse_near
+from app.services.pagination import (
+    InvalidCursor, count_cache, cursor_sort_key, decode_cursor, encode_cursor, row_sort_value,
+)
 
 router = APIRouter(prefix="/cars", tags=["cars"])
+logger = logging.getLogger(__name__)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db. close()
+# Upper bound on ids per /cars/batch request
+MAX_BATCH_IDS = 200
 
 
-def normalize_location_search(search_term: str) -> list[str]:
-    """
-    Normalize location search term into searchable keywords. 
-    """
-    if not search_term:
-        return []
-    
-    # Convert to lowercase and strip
-    normalized = search_term.strip().lower()
-    
-    # Split by common separators
-    keywords = re.split(r'[\s\-,+]+', normalized)
-    
-    # Filter out very short words (less than 3 chars)
-    keywords = [k. strip() for k in keywords if len(k) >= 3]
-    
-    return keywords
-
-
-def matches_location(address: str, search_keywords: list[str]) -> bool:
-    """
-    Check if address matches any of the search keywords.
-    """
-    if not address or not search_keywords:
-        return False
-    
-    address_lower = address.lower()
-    
-    # Match if ANY keyword is found
-    for keyword in search_keywords:
-        if keyword in address_lower:
-            return True
-    
-    return False
+def _values_key(value: str | None) -> tuple:
+    return tuple(sorted(set(split_values(value) or ())))
 
 
 @router.get("/")
 async def get_cars(
+    request: Request,
     page: int = Query(1, ge=1),
     limit: int = Query(12, ge=1, le=50),
     min_price: float = Query(0, ge=0),
@@ -68,287 +53,343 @@ async def get_cars(
     free_cancellation: bool | None = None,
     unlimited_mileage: bool | None = None,
     sort_by: str = "price_asc",
-    db: Session = Depends(get_db)
+    near: str | None = Query(None, description="Search around a point, as 'lat,lon'"),
+    radius_km: float = Query(25, gt=0, le=1000),
+    cursor: str | None = Query(None, description="next_cursor from the previous page; replaces page"),
+    include_count: bool = True,
+    group_by: str | None = Query(None, pattern=GROUP_BY_PATTERN, description="One result per car, or per SIPP + agency + location"),
+    offers_per_group: int = Query(0, ge=0, le=10, description="With group_by, include each group's N cheapest offers"),
+    db: AsyncSession = Depends(get_async_db)
 ):
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, sort_by)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    near_point = None
+    if near:
+        try:
+            near_point = parse_near(near)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif sort_by == "distance":
+        raise HTTPException(status_code=400, detail="sort_by=distance requires near")
+    if group_by and near_point:
+        raise HTTPException(status_code=400, detail="group_by can't be combined with near")
+
+    # Cached response for the normalized query, if any
+    cache_key = (
+        inventory_version(), page, limit, min_price, max_price,
+        _values_key(car_type), _values_key(category), _values_key(fuel), _values_key(agency),
+        tuple(sorted(set(normalize_location_search(pickup_location)))),
+        free_cancellation, unlimited_mileage, sort_by,
+        near_point, radius_km if near_point else None, cursor, include_count,
+        group_by, offers_per_group if group_by else 0,
+    )
+    entry = cars_cache.get(cache_key)
+    if entry is not None:
+        return cached_response(cars_cache, request, entry)
+
+    def respond(meta: dict, results: list[bytes]):
+        entry = cars_cache.set(cache_key, encode_page(meta, results), inventory_updated_at())
+        return cached_response(cars_cache, request, entry)
+
     try:
         offset = (page - 1) * limit
 
-        # ✅ ADD DEBUG LOGGING
-        print(f"\n{'='*80}")
-        print(f"[REQUEST] New car search request")
-        print(f"[REQUEST] pickup_location param: '{pickup_location}'")
-        print(f"[REQUEST] Type: {type(pickup_location)}")
-        print(f"[REQUEST] page={page}, limit={limit}")
-        print(f"{'='*80}\n")
-
-        # Base query
-        query = (
-            db.query(Car, CarPrice, Agency, Provider)
-            .join(CarPrice, Car.id == CarPrice.car_id)
-            .join(Agency, Agency.id == CarPrice.agency_id)
-            .join(Provider, Provider.id == CarPrice.provider_id)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("car search", extra={
+                "pickup_location": pickup_location, "page": page, "limit": limit,
+                "sort_by": sort_by, "cursor": bool(cursor), "near": near, "group_by": group_by,
+            })
+
+        # Serve from the in-memory inventory index when it is loaded
+        index = get_index()
+        if index is not None:
+            mask = index.filter_mask(
+                min_price=min_price if min_price > 0 else None,
+                max_price=max_price if max_price < 999999 else None,
+                car_types=split_values(car_type),
+                categories=split_values(category),
+                fuels=split_values(fuel),
+                agencies=split_values(agency),
+                pickup_location=pickup_location,
+                free_cancellation=free_cancellation,
+                unlimited_mileage=unlimited_mileage,
+            )
+            distances = None
+            if near_point:
+                near_mask, distances = index.near(*near_point, radius_km)
+                mask &= near_mask
+
+            # Grouped: page over each group's cheapest offer
+            groups = None
+            if group_by:
+                mask, groups = index.group(mask, group_by, offers_per_group)
+
+            total_count, response, next_after = index.encoded_page(
+                mask, sort_by, offset, limit, distances, after=after, groups=groups
+            )
+            total_pages = (total_count + limit - 1) // limit if total_count > 0 else 0
+
+            return respond({
+                "page": page,
+                "limit": limit,
+                "count": total_count,
+                "total_pages": total_pages,
+                "next_cursor": encode_cursor(sort_by, *next_after) if next_after else None,
+            }, response)
+
+        # Cached statement for this filter shape over the flattened search table;
+        # grouped, one row per group (its cheapest offer and size)
+        dialect = db.bind.dialect.name
+        shape, params = search_filters(
+            dialect,
+            min_price=min_price if min_price > 0 else None,
+            max_price=max_price if max_price < 999999 else None,
+            car_types=split_values(car_type),
+            categories=split_values(category),
+            fuels=split_values(fuel),
+            agencies=split_values(agency),
+            pickup_location=pickup_location,
+            free_cancellation=free_cancellation,
+            unlimited_mileage=unlimited_mileage,
+            near_point=near_point,
+            radius_km=radius_km,
         )
 
-        # Price filters
-        if min_price > 0:
-            query = query. filter(CarPrice.price >= min_price)
-            print(f"[FILTER] Applied min_price: {min_price}")
-        
-        if max_price < 999999:
-            query = query.filter(CarPrice.price <= max_price)
-            print(f"[FILTER] Applied max_price: {max_price}")
-
-        # Location filtering logic
-        if pickup_location:
-            print(f"\n[LOCATION] 🔍 Starting location filter")
-            print(f"[LOCATION] Raw input: '{pickup_location}'")
-            
-            # Normalize search term
-            search_keywords = normalize_location_search(pickup_location)
-            print(f"[LOCATION] Extracted keywords: {search_keywords}")
-            
-            if search_keywords:
-                # Fetch all results first
-                all_results = query.all()
-                print(f"[LOCATION] Total records before location filter: {len(all_results)}")
-                
-                # Filter by location
-                filtered_results = []
-                match_count = 0
-                no_match_count = 0
-                
-                for car, price, agency, provider in all_results:
-                    try:
-                        # Use pickup_location field (String)
-                        pickup_address = price.pickup_location or ""
-                        
-                        if matches_location(pickup_address, search_keywords):
-                            filtered_results.append((car, price, agency, provider))
-                            match_count += 1
-                            if match_count <= 5:  # Show first 5 matches
-                                print(f"[MATCH ✓] Car ID {car.id}: '{pickup_address}'")
-                        else:
-                            no_match_count += 1
-                            if no_match_count <= 3:  # Show first 3 non-matches
-                                print(f"[NO MATCH ✗] Car ID {car.id}: '{pickup_address}'")
-                    
-                    except Exception as e:
-                        print(f"[ERROR] Processing car {car.id}: {str(e)}")
-                        continue 
-                
-                print(f"[LOCATION] ✅ Found {len(filtered_results)} matching cars")
-                print(f"[LOCATION] Matched: {match_count}, No Match: {no_match_count}\n")
-                results = filtered_results
-            else:
-                results = query.all()
-                print(f"[LOCATION] ⚠️ No valid keywords, showing all {len(results)} cars\n")
-            
-            # Apply other filters
-            if car_type and isinstance(car_type, str):
-                car_types = [ct.strip() for ct in car_type.split(',')]
-                results = [(c, p, a, pr) for c, p, a, pr in results if c.type in car_types]
-                print(f"[FILTER] After car_type filter: {len(results)} cars")
-            
-            if category and isinstance(category, str):
-                categories = [cat.strip() for cat in category.split(',')]
-                results = [(c, p, a, pr) for c, p, a, pr in results if c. category in categories]
-                print(f"[FILTER] After category filter: {len(results)} cars")
-            
-            if fuel and isinstance(fuel, str):
-                fuels = [f.strip() for f in fuel. split(',')]
-                results = [(c, p, a, pr) for c, p, a, pr in results if c.fuel in fuels]
-                print(f"[FILTER] After fuel filter: {len(results)} cars")
-            
-            if agency and isinstance(agency, str):
-                agencies = [ag.strip() for ag in agency. split(',')]
-                results = [(c, p, a, pr) for c, p, a, pr in results if a.name in agencies]
-                print(f"[FILTER] After agency filter: {len(results)} cars")
-            
-            if free_cancellation is not None:
-                results = [(c, p, a, pr) for c, p, a, pr in results if p.free_cancellation == free_cancellation]
-                print(f"[FILTER] After free_cancellation filter: {len(results)} cars")
-            
-            if unlimited_mileage is not None:
-                results = [(c, p, a, pr) for c, p, a, pr in results if p.unlimited_mileage == unlimited_mileage]
-                print(f"[FILTER] After unlimited_mileage filter: {len(results)} cars")
-            
-            # Sorting
-            if sort_by == "price_asc":
-                results = sorted(results, key=lambda x: x[1].price)
-            elif sort_by == "price_desc":
-                results = sorted(results, key=lambda x: x[1].price, reverse=True)
-            elif sort_by == "rating":
-                results = sorted(results, key=lambda x: x[2].rating if x[2].rating else 0, reverse=True)
-            elif sort_by == "name":
-                results = sorted(results, key=lambda x: x[0]. name)
-            
-            print(f"[SORT] Applied sort_by: {sort_by}")
-            
+        distances = {}
+        next_cursor = None
+        if near_point:
+            results = []
+            for offer in (await db.execute(rows_statement(shape, dialect, sort_by), params)).scalars():
+                distance = haversine_km(*near_point, offer.latitude, offer.longitude)
+                if distance <= radius_km:
+                    distances[offer.id] = distance
+                    results.append(offer)
+
+            if sort_by == "distance":
+                results.sort(key=lambda offer: (distances[offer.id], offer.id))
+
             total_count = len(results)
-            paginated_results = results[offset:offset + limit]
-            
-            print(f"[PAGINATION] Total: {total_count}, Page: {page}, Showing: {len(paginated_results)} results\n")
-        
+            start = offset
+            if after is not None:
+                after_key = cursor_sort_key(sort_by, *after)
+                start = next(
+                    (
+                        i for i, offer in enumerate(results)
+                        if cursor_sort_key(
+                            sort_by,
+                            distances[offer.id] if sort_by == "distance" else row_sort_value(sort_by, offer),
+                            offer.id,
+                        ) > after_key
+                    ),
+                    len(results),
+                )
+            paginated_results = results[start:start + limit]
+            if start + limit < total_count:
+                last = paginated_results[-1]
+                value = distances[last.id] if sort_by == "distance" else row_sort_value(sort_by, last)
+                next_cursor = encode_cursor(sort_by, value, last.id)
         else:
-            # No location filter - use normal query
-            print(f"[LOCATION] ⚠️ No pickup_location provided, fetching all cars\n")
-            
-            if car_type and isinstance(car_type, str):
-                car_types = [ct.strip() for ct in car_type.split(',')]
-                query = query.filter(Car.type.in_(car_types))
-            
-            if category and isinstance(category, str):
-                categories = [c.strip() for c in category. split(',')]
-                query = query.filter(Car.category.in_(categories))
-
-            if fuel and isinstance(fuel, str):
-                fuels = [f.strip() for f in fuel.split(',')]
-                query = query.filter(Car.fuel. in_(fuels))
-            
-            if agency and isinstance(agency, str):
-                agencies = [a.strip() for a in agency.split(',')]
-                query = query.filter(Agency.name.in_(agencies))
-            
-            if free_cancellation is not None:
-                query = query.filter(CarPrice.free_cancellation == free_cancellation)
-            
-            if unlimited_mileage is not None:
-                query = query. filter(CarPrice.unlimited_mileage == unlimited_mileage)
-
-            # Sorting
-            if sort_by == "price_asc":
-                query = query.order_by(CarPrice.price. asc())
-            elif sort_by == "price_desc":
-                query = query.order_by(CarPrice.price.desc())
-            elif sort_by == "rating":
-                query = query. order_by(Agency.rating.desc())
-            elif sort_by == "name":
-                query = query.order_by(Car.name.asc())
-
-            total_count = query.count()
-            
-            if total_count == 0:
-                return {
-                    "page": page,
-                    "limit": limit,
-                    "count": 0,
-                    "total_pages": 0,
-                    "results": []
-                }
-            
-            paginated_results = query.offset(offset).limit(limit).all()
-
-        # Format response
-        response = []
-        for car, price, agency, provider in paginated_results:
-            try:
-                response.append({
-                    "car": {
-                        "id": car. id,
-                        "name": car.name,
-                        "type": car.type,
-                        "category": car.category,
-                        "fuel": car. fuel,
-                        "transmission": car.transmission,
-                        "image": car.image,
-                        "passengers": car.passengers,
-                        "bags": car.bags,
-                        "sipp": car.sipp,
-                    },
-                    "agency": {
-                        "name": agency.name,
-                        "code": agency.code,
-                        "logo": agency.logo,
-                        "rating": float(agency.rating) if agency. rating else 0,
-                    },
-                    "provider": {
-                        "name": provider.name,
-                        "logo": provider.logo,
-                    },
-                    "price": float(price.price),
-                    "pickup_location": price.pickup_location or '',
-                    "latitude": float(price.latitude) if price. latitude else None,
-                    "longitude": float(price.longitude) if price. longitude else None,
-                    "fuel_policy": price.fuel_policy,
-                    "free_cancellation": price.free_cancellation,
-                    "unlimited_mileage": price.unlimited_mileage,
-                })
-            except Exception as e:
-                print(f"[ERROR] Failed to format car {car.id}: {str(e)}")
-                continue
-
-        total_pages = (total_count + limit - 1) // limit if total_count > 0 else 0
-
-        print(f"[RESPONSE] Returning {len(response)} cars, total_pages: {total_pages}\n")
-
-        return {
+            # Totals are optional; cursor pages reuse a cached count per filter set
+            total_count = None
+            if include_count:
+                count_query = count_statement(shape, dialect, group_by)
+                if after is None:
+                    total_count = await db.scalar(count_query, params)
+                else:
+                    count_key = (filters_key(shape, params), group_by)
+                    total_count = count_cache.get(count_key)
+                    if total_count is None:
+                        total_count = await db.scalar(count_query, params)
+                        count_cache.set(count_key, total_count)
+
+            if after is not None:
+                query = rows_statement(shape, dialect, sort_by, group_by, page="seek")
+                page_params = {"after_value": after[0], "after_id": after[1]}
+            else:
+                query = rows_statement(shape, dialect, sort_by, group_by, page="offset")
+                page_params = {"offset": offset}
+            page_params["limit"] = limit + 1
+
+            rows = (await db.execute(query, {**params, **page_params})).all() if total_count != 0 else []
+            paginated_results = [row[0] for row in rows]
+            group_sizes = {row[0].id: row[1] for row in rows} if group_by else None
+            if len(paginated_results) > limit:
+                paginated_results = paginated_results[:limit]
+                last = paginated_results[-1]
+                next_cursor = encode_cursor(sort_by, row_sort_value(sort_by, last), last.id)
+
+        if total_count == 0:
+            return respond({
+                "page": page,
+                "limit": limit,
+                "count": 0,
+                "total_pages": 0,
+                "next_cursor": None,
+            }, [])
+
+        # Encode the page from the cached car / agency / provider fragments
+        response = [
+            encode_offer(offer, distances[offer.id] if near_point else None)
+            for offer in paginated_results
+        ]
+
+        if group_by:
+            tops = await top_offers(
+                db, filtered_statement(shape, dialect), params, group_by, paginated_results, offers_per_group
+            )
+            response = [
+                add_group(fragment, group_sizes[offer.id], [
+                    encode_car_offer(top) for top in tops.get(group_key(group_by, offer), ())
+                ] if offers_per_group else None)
+                for fragment, offer in zip(response, paginated_results)
+            ]
+
+        total_pages = (total_count + limit - 1) // limit if total_count is not None else None
+
+        if debug:
+            logger.debug("car search results", extra={"results": len(response), "total_pages": total_pages})
+
+        return respond({
             "page": page,
             "limit": limit,
             "count": total_count,
             "total_pages": total_pages,
-            "results": response
-        }
+            "next_cursor": next_cursor,
+        }, response)
+
+    except Exception as e:
+        logger.exception("car search failed")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+
+def _parse_ids(ids: str) -> list[int]:
+    try:
+        return [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+
+
+async def _car_batch(db: AsyncSession, ids: list[int]):
+    """All offers of the requested cars in one IN-list query, keyed by car id."""
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="ids is required")
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+
+    try:
+        offers_by_car = {}
+        for offer in (await db.execute(
+            select(CarOffer)
+            .filter(CarOffer.car_id.in_(ids))
+            .order_by(CarOffer.car_id, CarOffer.price, CarOffer.id)
+        )).scalars():
+            offers_by_car.setdefault(offer.car_id, []).append(offer)
     except Exception as e:
-        import traceback
-        print(f"\n[ERROR] Exception occurred:")
-        traceback.print_exc()
+        logger.exception("car batch lookup failed", extra={"ids": len(ids)})
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+    # {"cars": {"<id>": {"car": ..., "offers": [...]}, ...}, "missing": [...]}
+    cars = b",".join(
+        b'"%d":' % car_id + encode_car_offers(offers_by_car[car_id])
+        for car_id in ids if car_id in offers_by_car
+    )
+    missing = [car_id for car_id in ids if car_id not in offers_by_car]
+    return json_response(b'{"cars":{' + cars + b'},"missing":' + orjson.dumps(missing) + b"}")
+
+
+# Declared before /{car_id} so "export" and "batch" aren't parsed as ids
+@router.get("/export")
+async def export_cars(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    min_price: float = Query(0, ge=0),
+    max_price: float = Query(999999, ge=0),
+    car_type: str | None = None,
+    category: str | None = None,
+    fuel: str | None = None,
+    agency: str | None = None,
+    pickup_location: str | None = None,
+    free_cancellation: bool | None = None,
+    unlimited_mileage: bool | None = None,
+    sort_by: str = "price_asc",
+    near: str | None = Query(None, description="Search around a point, as 'lat,lon'"),
+    radius_km: float = Query(25, gt=0, le=1000),
+):
+    """
+    Every offer matching the GET /cars filters, streamed as NDJSON (one
+    /cars result per line) or CSV (one car_offers row per line).
+    """
+    near_point = None
+    if near:
+        try:
+            near_point = parse_near(near)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if sort_by == "distance":
+        raise HTTPException(status_code=400, detail="sort_by=distance is not supported for exports")
+
+    dialect = get_async_engine().dialect.name
+    shape, params = search_filters(
+        dialect,
+        min_price=min_price if min_price > 0 else None,
+        max_price=max_price if max_price < 999999 else None,
+        car_types=split_values(car_type),
+        categories=split_values(category),
+        fuels=split_values(fuel),
+        agencies=split_values(agency),
+        pickup_location=pickup_location,
+        free_cancellation=free_cancellation,
+        unlimited_mileage=unlimited_mileage,
+        near_point=near_point,
+        radius_km=radius_km,
+    )
+
+    return StreamingResponse(
+        stream_offers(rows_statement(shape, dialect, sort_by), params, format, near_point, radius_km),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="cars.{format}"'},
+    )
+
+
+@router.get("/batch")
+async def get_cars_batch(
+    ids: str = Query(..., description="Comma-separated car ids"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Several cars with all of their offers (cheapest first), keyed by car id."""
+    return await _car_batch(db, _parse_ids(ids))
+
+
+@router.post("/batch")
+async def post_cars_batch(body: CarBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    """Same as GET /cars/batch, for id lists too long for a query string."""
+    return await _car_batch(db, body.ids)
+
 
 @router.get("/{car_id}")
-async def get_car_by_id(car_id: int, db: Session = Depends(get_db)):
+async def get_car_by_id(car_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific car by ID with all its details"""
     try:
-        result = (
-            db.query(Car, CarPrice, Agency, Provider)
-            .join(CarPrice, Car.id == CarPrice.car_id)
-            .join(Agency, Agency.id == CarPrice. agency_id)
-            .join(Provider, Provider.id == CarPrice.provider_id)
-            .filter(Car.id == car_id)
-            .first()
-        )
+        offer = (await db.execute(
+            select(CarOffer)
+            .filter(CarOffer.car_id == car_id)
+            .order_by(CarOffer.id)
+            .limit(1)
+        )).scalar()
 
-        if not result:
+        if not offer:
             raise HTTPException(status_code=404, detail="Car not found")
 
-        car, price, agency, provider = result
-
-        return {
-            "car": {
-                "id": car. id,
-                "name": car.name,
-                "type": car.type,
-                "category": car.category,
-                "fuel": car.fuel,
-                "transmission": car.transmission,
-                "image": car.image,
-                "passengers": car.passengers,
-                "bags": car. bags,
-                "sipp": car.sipp,
-            },
-            "agency": {
-                "name": agency.name,
-                "code": agency.code,
-                "logo": agency.logo,
-                "rating": float(agency.rating) if agency.rating else 0,
-            },
-            "provider": {
-                "name": provider.name,
-                "logo": provider.logo,
-            },
-            "price": float(price.price),
-            "pickup_location": price.pickup_location or '',
-            "latitude": float(price.latitude) if price.latitude else None,
-            "longitude": float(price.longitude) if price.longitude else None,
-            "fuel_policy": price. fuel_policy,
-            "free_cancellation": price.free_cancellation,
-            "unlimited_mileage": price.unlimited_mileage,
-        }
+        return json_response(encode_offer(offer))
 
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("car lookup failed", extra={"car_id": car_id})
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
\ No newline at end of file
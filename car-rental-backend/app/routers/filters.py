@@ -1,72 +1,96 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.database import SessionLocal
-from app.models.car import Car
-from app.models.agency import Agency
-from app.models. price import CarPrice
+import orjson
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.async_database import get_async_db
+from app.services.facets import facet_counts, get_facet_payload
+from app.services.inventory_state import inventory_updated_at, inventory_version
+from app.services.location_search import normalize_location_search
+from app.services.price_histogram import price_histogram
+from app.services.response_cache import cached_response, histogram_cache
+from app.services.search_params import split_values
 
 router = APIRouter(prefix="/filters", tags=["filters"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 
 @router.get("/")
-def get_filters(db: Session = Depends(get_db)):
-    # Get distinct car types
-    car_types = db. query(Car.type).distinct(). filter(Car.type.isnot(None)).all()
-    
-    # Get distinct fuel types
-    fuel_types = db.query(Car.fuel).distinct().filter(Car.fuel.isnot(None)).all()
-    
-    # Get distinct categories
-    categories = db.query(Car.category).distinct().filter(Car.category.isnot(None)).all()
-    
-    # Get unique agencies - group by code to avoid duplicates
-    agencies_query = db.query(
-        Agency.name,
-        Agency.code,
-        Agency.logo,
-        func.max(Agency.rating).label('rating')  # Use max rating if there are duplicates
-    ).group_by(
-        Agency.name,
-        Agency.code,
-        Agency.logo
-    ). all()
-    
-    # Get price range
-    price_stats = db.query(
-        func.min(CarPrice.price). label('min_price'),
-        func.max(CarPrice.price).label('max_price')
-    ).first()
+async def get_filters(
+    min_price: float = Query(0, ge=0),
+    max_price: float = Query(999999, ge=0),
+    car_type: str | None = None,
+    category: str | None = None,
+    fuel: str | None = None,
+    agency: str | None = None,
+    pickup_location: str | None = None,
+    free_cancellation: bool | None = None,
+    unlimited_mileage: bool | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Filter options for the search sidebar plus live per-value counts for
+    the current selection (same parameters as GET /cars).
+    """
+    payload = await get_facet_payload(db)
+
+    counts = await facet_counts(
+        db,
+        selections={
+            "type": split_values(car_type),
+            "category": split_values(category),
+            "fuel": split_values(fuel),
+            "agency": split_values(agency),
+            "free_cancellation": free_cancellation,
+            "unlimited_mileage": unlimited_mileage,
+        },
+        min_price=min_price if min_price > 0 else None,
+        max_price=max_price if max_price < 999999 else None,
+        pickup_location=pickup_location,
+    )
+
+    return {**payload, "facet_counts": counts}
+
+
+def _values_key(values: list[str] | None) -> tuple:
+    return tuple(sorted(set(values or ())))
+
 
-    # Format agencies list
-    agencies_list = []
-    seen_codes = set()
-    
-    for agency in agencies_query:
-        # Only add if we haven't seen this code before
-        if agency.code not in seen_codes:
-            agencies_list.append({
-                "name": agency.name,
-                "code": agency.code,
-                "logo": agency.logo,
-                "rating": float(agency.rating) if agency. rating else 0
-            })
-            seen_codes.add(agency.code)
+@router.get("/price-histogram")
+async def get_price_histogram(
+    request: Request,
+    buckets: int = Query(20, ge=1, le=100),
+    car_type: str | None = None,
+    category: str | None = None,
+    fuel: str | None = None,
+    agency: str | None = None,
+    pickup_location: str | None = None,
+    free_cancellation: bool | None = None,
+    unlimited_mileage: bool | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Offer counts per price bucket across the global price range for the
+    current selection (GET /cars parameters other than price and paging).
+    """
+    filters = {
+        "car_types": split_values(car_type),
+        "categories": split_values(category),
+        "fuels": split_values(fuel),
+        "agencies": split_values(agency),
+        "pickup_location": pickup_location,
+        "free_cancellation": free_cancellation,
+        "unlimited_mileage": unlimited_mileage,
+    }
 
-    return {
-        "car_types": sorted([c[0] for c in car_types if c[0]]),
-        "fuel_types": sorted([f[0] for f in fuel_types if f[0]]),
-        "categories": sorted([c[0] for c in categories if c[0]]),
-        "agencies": sorted(agencies_list, key=lambda x: x["name"]),
-        "price_range": {
-            "min": float(price_stats.min_price) if price_stats. min_price else 0,
-            "max": float(price_stats.max_price) if price_stats.max_price else 10000
-        }
-    }
\ No newline at end of file
+    # Cached body for the normalized filter signature, if any
+    cache_key = (
+        inventory_version(), buckets,
+        _values_key(filters["car_types"]), _values_key(filters["categories"]),
+        _values_key(filters["fuels"]), _values_key(filters["agencies"]),
+        tuple(sorted(set(normalize_location_search(pickup_location)))),
+        free_cancellation, unlimited_mileage,
+    )
+    entry = histogram_cache.get(cache_key)
+    if entry is None:
+        payload = await get_facet_payload(db)
+        histogram = await price_histogram(db, payload["price_range"], buckets, **filters)
+        entry = histogram_cache.set(cache_key, orjson.dumps(histogram), inventory_updated_at())
+    return cached_response(histogram_cache, request, entry)
@@ -1,41 +1,27 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func, distinct
-from app.database import SessionLocal
-from app.models.price import CarPrice
-import json
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.async_database import get_async_db
+from app.models.offer import CarOffer
+from app.services.location_suggest import get_suggest_index
 
 router = APIRouter(prefix="/locations", tags=["locations"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db. close()
-
 
 @router.get("/")
-def get_locations(db: Session = Depends(get_db)):
+async def get_locations(db: AsyncSession = Depends(get_async_db)):
     """
     Get unique pickup locations from car prices
     """
-    # If pickup is stored as JSON
-    locations_raw = db.query(CarPrice. pickup).distinct(). all()
+    locations_raw = (await db.execute(
+        select(CarOffer.pickup_location, CarOffer.latitude, CarOffer.longitude).distinct()
+    )).all()
     
     locations = []
     seen_addresses = set()
     
-    for (pickup_json,) in locations_raw:
-        if pickup_json:
-            # If stored as JSON string, parse it
-            if isinstance(pickup_json, str):
-                pickup_data = json. loads(pickup_json)
-            else:
-                pickup_data = pickup_json
-            
-            address = pickup_data.get('address', '')
-            
+    for address, latitude, longitude in locations_raw:
+        if address:
             # Extract city name from address (e.g., "Las Vegas" from full address)
             # Format: "7135 Gilespie St, Las Vegas, Clark County, Nevada, 89119, United States"
             parts = address.split(',')
@@ -51,11 +37,23 @@ def get_locations(db: Session = Depends(get_db)):
                     locations.append({
                         "name": location_key,
                         "full_address": address,
-                        "latitude": pickup_data.get('latitude'),
-                        "longitude": pickup_data.get('longitude')
+                        "latitude": latitude,
+                        "longitude": longitude
                     })
     
     # Sort alphabetically
     locations.sort(key=lambda x: x['name'])
     
-    return locations
\ No newline at end of file
+    return locations
+
+
+@router.get("/suggest")
+def suggest_locations(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """
+    Ranked pickup location suggestions (cities, then addresses, by offer
+    count) whose words start with the words of `q`.
+    """
+    return get_suggest_index().suggest(q, limit)
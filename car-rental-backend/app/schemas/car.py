@@ -20,3 +20,6 @@ class CarResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class CarBatchRequest(BaseModel):
+    ids: list[int]
@@ -1,10 +1,14 @@
 # app/scripts/create_tables.py
 
-from app.database import Base, engine
+from app.database import Base, get_engine
 from app.models.car import Car
 from app.models.agency import Agency
 from app.models.provider import Provider
 from app.models.price import CarPrice
+from app.models.inventory_meta import InventoryMeta
+from app.models.offer import CarOffer
+from app.services.location_search import create_location_index
+from app.services.offers import create_offers
 
 
 def create_tables():
@@ -13,5 +17,8 @@ def create_tables():
     Call this only when you actually want to create tables.
     """
     print("Creating tables...")
+    engine = get_engine()
     Base.metadata.create_all(bind=engine)
+    create_location_index(engine)
+    create_offers(engine)
     print("Tables created!")
@@ -0,0 +1,350 @@
+"""
+Bulk streaming ingest of a car-results feed.
+
+The feed's `results` array is decoded one element at a time, so memory
+stays flat regardless of feed size. Rows are buffered into batches and
+written with one bulk statement per table and batch: COPY on Postgres,
+executemany everywhere else. Agency and provider IDs are resolved through
+in-memory lookup maps (by agency code / provider name), and car IDs are
+allocated up front, so no per-row round-trips are needed.
+
+Usage:
+    python -m app.scripts.ingest [path/to/car-results.json] [--batch-size 2000]
+"""
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import OperationalError
+
+from app.database import get_engine
+from app.models.car import Car
+from app.models.agency import Agency
+from app.models.provider import Provider
+from app.models.price import CarPrice
+from app.services.inventory_state import bump_inventory_version, record_inventory_change
+from app.services.offer_snapshot import publish_snapshot
+from app.services.offers import refresh_offers
+
+DEFAULT_FEED = os.path.join(os.path.dirname(__file__), "car-results.json")
+DEFAULT_BATCH_SIZE = 2000
+# pg_advisory_xact_lock key held by inventory writers
+INVENTORY_LOCK_KEY = 0x0FFE55
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = " \t\n\r"
+
+
+def iter_results(path: str, chunk_size: int = CHUNK_SIZE):
+    """
+    Yield the elements of the top-level `results` array of a feed file
+    without loading the whole document. Other top-level keys are skipped.
+    Also accepts a bare top-level array of results.
+    """
+    decoder = json.JSONDecoder()
+
+    with open(path, "r", encoding="utf-8-sig") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def fill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+
+        def skip_whitespace():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buffer) or not fill():
+                    return
+
+        def peek():
+            skip_whitespace()
+            if pos >= len(buffer):
+                raise ValueError("Unexpected end of feed")
+            return buffer[pos]
+
+        def expect(char):
+            nonlocal pos
+            if peek() != char:
+                raise ValueError(f"Expected {char!r} at offset {pos} of the current chunk")
+            pos += 1
+
+        def decode_value():
+            nonlocal pos
+            skip_whitespace()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    # A number at the end of the buffer may continue in the next chunk
+                    if end < len(buffer) or eof:
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        def iter_array():
+            nonlocal pos
+            expect("[")
+            if peek() == "]":
+                pos += 1
+                return
+            while True:
+                yield decode_value()
+                char = peek()
+                pos += 1
+                if char == "]":
+                    return
+                if char != ",":
+                    raise ValueError("Malformed results array")
+
+        fill()
+        if peek() == "[":
+            yield from iter_array()
+            return
+
+        expect("{")
+        while peek() != "}":
+            key = decode_value()
+            expect(":")
+            if key == "results":
+                yield from iter_array()
+            else:
+                decode_value()
+            if peek() == ",":
+                pos += 1
+
+
+def _csv_value(value):
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+def bulk_insert(conn, table, rows: list[dict]):
+    """Insert `rows` into `table` with one bulk operation."""
+    if not rows:
+        return
+    columns = list(rows[0].keys())
+
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for row in rows:
+            writer.writerow([_csv_value(row[c]) for c in columns])
+        buf.seek(0)
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buf,
+            )
+        finally:
+            cursor.close()
+    else:
+        conn.execute(table.insert(), rows)
+
+
+def lock_inventory(conn, wait: bool = True) -> bool:
+    """
+    Serialize inventory writers (ingest, sync) across processes for the rest
+    of `conn`'s transaction, so ids allocated from MAX(id) can't collide.
+    Returns False when `wait` is off and another writer holds the lock.
+    """
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        function = "pg_advisory_xact_lock" if wait else "pg_try_advisory_xact_lock"
+        locked = conn.execute(text(f"SELECT {function}(:key)"), {"key": INVENTORY_LOCK_KEY}).scalar()
+        return wait or bool(locked)
+    if dialect == "sqlite":
+        # No advisory locks: a no-op write takes the database write lock now
+        timeout = conn.exec_driver_sql("PRAGMA busy_timeout").scalar()
+        if not wait:
+            conn.exec_driver_sql("PRAGMA busy_timeout = 0")
+        try:
+            conn.execute(text("DELETE FROM car_prices WHERE 0"))
+        except OperationalError:
+            if wait:
+                raise
+            return False
+        finally:
+            conn.exec_driver_sql(f"PRAGMA busy_timeout = {int(timeout)}")
+    return True
+
+
+def _next_id(conn, model) -> int:
+    """Next free id of `model`'s table; call `lock_inventory` first."""
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _sync_sequences(conn):
+    """Move Postgres id sequences past the ids allocated by the loader."""
+    if conn.dialect.name != "postgresql":
+        return
+    for table in ("agencies", "providers", "cars", "car_prices"):
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+        ))
+
+
+class IngestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.results = 0
+        self.rows = 0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def rate(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def report(self, label: str):
+        print(
+            f"[INGEST] {label}: {self.results} results, {self.rows} rows "
+            f"in {self.elapsed:.2f}s ({self.rate():,.0f} rows/sec)"
+        )
+
+
+def ingest_feed(path: str = DEFAULT_FEED, batch_size: int = DEFAULT_BATCH_SIZE) -> IngestStats:
+    """Stream `path` into the database in batches. Appends to existing inventory."""
+    stats = IngestStats()
+
+    with get_engine().begin() as conn:
+        # Waits for a concurrent ingest / sync to commit before allocating ids
+        lock_inventory(conn)
+
+        # Lookup maps for the shared dimensions, seeded from what is stored
+        agency_ids = {}
+        for agency_id, code in conn.execute(select(Agency.id, Agency.code).order_by(Agency.id)):
+            agency_ids.setdefault(code, agency_id)
+        provider_ids = {}
+        for provider_id, name in conn.execute(select(Provider.id, Provider.name).order_by(Provider.id)):
+            provider_ids.setdefault(name, provider_id)
+
+        next_agency_id = _next_id(conn, Agency)
+        next_provider_id = _next_id(conn, Provider)
+        next_car_id = _next_id(conn, Car)
+
+        agencies, providers, cars, prices = [], [], [], []
+        batches = 0
+
+        def flush():
+            # Parents first so the price rows always reference stored ids
+            for table, rows in (
+                (Agency.__table__, agencies),
+                (Provider.__table__, providers),
+                (Car.__table__, cars),
+                (CarPrice.__table__, prices),
+            ):
+                bulk_insert(conn, table, rows)
+                stats.rows += len(rows)
+                rows.clear()
+
+        for item in iter_results(path):
+            # 1. Agency (deduplicated by code)
+            agency_data = item.get("agency") or {}
+            code = agency_data.get("code")
+            agency_id = agency_ids.get(code)
+            if agency_id is None:
+                agency_id = agency_ids[code] = next_agency_id
+                next_agency_id += 1
+                agencies.append({
+                    "id": agency_id,
+                    "name": agency_data.get("name"),
+                    "code": code,
+                    "logo": agency_data.get("logo"),
+                    "rating": agency_data.get("rating"),
+                })
+
+            # 2. Car
+            car_data = item.get("car") or {}
+            car_id = next_car_id
+            next_car_id += 1
+            cars.append({
+                "id": car_id,
+                "name": car_data.get("name"),
+                "category": car_data.get("category"),
+                "type": car_data.get("type"),
+                "fuel": car_data.get("fuel"),
+                "transmission": car_data.get("transmission"),
+                "passengers": car_data.get("passengers"),
+                "bags": car_data.get("bags"),
+                "sipp": car_data.get("sipp"),
+                "image": car_data.get("image"),
+            })
+
+            # 3. Providers (deduplicated by name) and 4. their prices
+            pickup = item.get("pickup") or {}
+            for pr in item.get("providers") or []:
+                name = pr.get("name")
+                provider_id = provider_ids.get(name)
+                if provider_id is None:
+                    provider_id = provider_ids[name] = next_provider_id
+                    next_provider_id += 1
+                    providers.append({
+                        "id": provider_id,
+                        "name": name,
+                        "logo": pr.get("logo") or pr.get("image"),
+                    })
+
+                prices.append({
+                    "car_id": car_id,
+                    "agency_id": agency_id,
+                    "provider_id": provider_id,
+                    "price": pr.get("price", 0),
+                    "free_cancellation": pr.get("is_free_cancellation", False),
+                    "unlimited_mileage": pr.get("unlimited_mileage", False),
+                    "fuel_policy": pr.get("fuel_policy"),
+                    "pickup_location": pickup.get("address"),
+                    "latitude": pickup.get("latitude"),
+                    "longitude": pickup.get("longitude"),
+                })
+
+            stats.results += 1
+            if len(prices) >= batch_size:
+                flush()
+                batches += 1
+                if batches % 10 == 0:
+                    stats.report("progress")
+
+        flush()
+        _sync_sequences(conn)
+        # Readers see the new offers (and the new version) only once this transaction commits
+        refresh_offers(conn)
+        version = record_inventory_change(conn)
+
+    stats.report("done")
+    # Workers mapping OFFER_SNAPSHOT_DIR swap to it (no-op when it isn't set)
+    publish_snapshot()
+    bump_inventory_version(version)
+    return stats
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    batch_size = DEFAULT_BATCH_SIZE
+    if "--batch-size" in args:
+        i = args.index("--batch-size")
+        batch_size = int(args[i + 1])
+        del args[i:i + 2]
+
+    ingest_feed(args[0] if args else DEFAULT_FEED, batch_size)
@@ -0,0 +1,125 @@
+"""
+Migrate an existing database to the deduplicated, indexed inventory schema.
+
+1. Collapse duplicate agencies (by code) and providers (by name) onto the
+   lowest id of each group and repoint car_prices at it.
+2. Drop car_prices rows whose car / agency / provider no longer exists.
+3. Add the unique indexes, foreign keys and composite indexes declared on
+   the models. Postgres gets them through ALTER TABLE; SQLite can't add
+   foreign keys to an existing table, so car_prices is rebuilt.
+4. Create the car_offers search table and rebuild it from the cleaned
+   base tables, bumping the shared inventory version.
+
+Safe to run more than once.
+
+Usage:
+    python -m app.scripts.migrate_schema
+"""
+from sqlalchemy import inspect, text
+
+from app.database import Base, get_engine
+from app.models.car import Car
+from app.models.agency import Agency
+from app.models.provider import Provider
+from app.models.price import CarPrice
+from app.models.inventory_meta import InventoryMeta
+from app.services.location_search import create_location_index
+from app.services.inventory_state import bump_inventory_version, record_inventory_change
+from app.services.offers import create_offers, refresh_offers
+
+
+def dedupe(conn, table: str, key: str, fk_column: str) -> int:
+    """Point car_prices at the lowest id per `key` and delete the other rows."""
+    canonical = f"(SELECT MIN(d.id) FROM {table} d WHERE d.{key} = {table}.{key})"
+    conn.execute(text(
+        f"UPDATE car_prices SET {fk_column} = ("
+        f"  SELECT MIN(d.id) FROM {table} d JOIN {table} o ON o.{key} = d.{key}"
+        f"  WHERE o.id = car_prices.{fk_column}"
+        f") WHERE {fk_column} IN ("
+        f"  SELECT id FROM {table} WHERE id <> {canonical}"
+        f")"
+    ))
+    result = conn.execute(text(f"DELETE FROM {table} WHERE id <> {canonical}"))
+    return result.rowcount
+
+
+def delete_orphans(conn) -> int:
+    result = conn.execute(text(
+        "DELETE FROM car_prices WHERE "
+        "car_id IS NULL OR agency_id IS NULL OR provider_id IS NULL "
+        "OR car_id NOT IN (SELECT id FROM cars) "
+        "OR agency_id NOT IN (SELECT id FROM agencies) "
+        "OR provider_id NOT IN (SELECT id FROM providers)"
+    ))
+    return result.rowcount
+
+
+def add_postgres_constraints(conn):
+    inspector = inspect(conn)
+    existing = {fk["name"] for fk in inspector.get_foreign_keys("car_prices")}
+    for column in ("car_id", "agency_id", "provider_id"):
+        conn.execute(text(f"ALTER TABLE car_prices ALTER COLUMN {column} SET NOT NULL"))
+
+    for fk in CarPrice.__table__.foreign_keys:
+        constraint = fk.constraint
+        if constraint.name in existing:
+            continue
+        target = fk.column.table.name
+        on_delete = f" ON DELETE {constraint.ondelete}" if constraint.ondelete else ""
+        conn.execute(text(
+            f"ALTER TABLE car_prices ADD CONSTRAINT {constraint.name} "
+            f"FOREIGN KEY ({fk.parent.name}) REFERENCES {target} (id){on_delete}"
+        ))
+
+
+def rebuild_sqlite_car_prices(conn):
+    """Recreate car_prices from the model (with foreign keys) and copy the rows over."""
+    if any(fk.get("name") or fk.get("referred_table") for fk in inspect(conn).get_foreign_keys("car_prices")):
+        return
+
+    columns = ", ".join(c.name for c in CarPrice.__table__.columns)
+    # The FTS5 table and its triggers are recreated for the new table below
+    conn.execute(text("DROP TABLE IF EXISTS car_prices_fts"))
+    for trigger in ("car_prices_fts_ai", "car_prices_fts_ad", "car_prices_fts_au"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    for index in inspect(conn).get_indexes("car_prices"):
+        conn.execute(text(f"DROP INDEX IF EXISTS {index['name']}"))
+
+    conn.execute(text("ALTER TABLE car_prices RENAME TO car_prices_old"))
+    CarPrice.__table__.create(conn)
+    conn.execute(text(f"INSERT INTO car_prices ({columns}) SELECT {columns} FROM car_prices_old"))
+    conn.execute(text("DROP TABLE car_prices_old"))
+
+
+def migrate():
+    engine = get_engine()
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as conn:
+        agencies = dedupe(conn, "agencies", "code", "agency_id")
+        providers = dedupe(conn, "providers", "name", "provider_id")
+        orphans = delete_orphans(conn)
+        print(f"Removed {agencies} duplicate agencies, {providers} duplicate providers, {orphans} orphan prices")
+
+        if conn.dialect.name == "postgresql":
+            add_postgres_constraints(conn)
+        elif conn.dialect.name == "sqlite":
+            rebuild_sqlite_car_prices(conn)
+
+        for model in (Agency, Provider, Car, CarPrice):
+            for index in model.__table__.indexes:
+                index.create(conn, checkfirst=True)
+
+    create_location_index(engine)
+
+    # Search table, rebuilt from the deduplicated base tables
+    create_offers(engine)
+    with engine.begin() as conn:
+        refresh_offers(conn)
+        version = record_inventory_change(conn)
+    bump_inventory_version(version)
+    print("Migration completed!")
+
+
+if __name__ == "__main__":
+    migrate()
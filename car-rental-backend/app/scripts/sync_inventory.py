@@ -0,0 +1,423 @@
+"""
+Incremental sync of a car-results feed against the stored inventory.
+
+Unlike `ingest`, which appends the whole feed, the sync only writes what
+changed. Every stored and incoming offer gets an identity key (agency
+code, SIPP, car name, pickup address, provider name, plus an ordinal for
+repeats) and a content hash over the fields that can change (price,
+flags, fuel policy, pickup coordinates). Matching keys with different
+hashes become updates, unmatched feed offers inserts and unmatched stored
+offers deletes; car, agency and provider attributes are compared the same
+way. Writes are batched (executemany / bulk insert) and applied in one
+transaction, car_offers is updated for the touched ids only, and the
+inventory version is bumped only when something changed.
+
+The version is bumped in the database, in the sync's transaction: every
+server process polls it and reloads its indexes and caches, whichever
+process (POST /admin/inventory/sync, or this script) ran the sync. With
+OFFER_SNAPSHOT_DIR set, they also swap to the offer snapshot it publishes.
+
+Usage:
+    python -m app.scripts.sync_inventory [path/to/car-results.json] [--batch-size 2000]
+"""
+import hashlib
+import json
+import sys
+import threading
+import time
+
+from sqlalchemy import bindparam, delete, or_, select, update
+
+from app.database import get_engine
+from app.models.car import Car
+from app.models.agency import Agency
+from app.models.provider import Provider
+from app.models.price import CarPrice
+from app.scripts.ingest import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_FEED,
+    _next_id,
+    _sync_sequences,
+    bulk_insert,
+    iter_results,
+    lock_inventory,
+)
+from app.services.inventory_state import bump_inventory_version, record_inventory_change
+from app.services.offer_snapshot import publish_snapshot
+from app.services.offers import update_offers
+
+CAR_FIELDS = ("name", "category", "type", "fuel", "transmission", "passengers", "bags", "sipp", "image")
+PRICE_FIELDS = ("price", "free_cancellation", "unlimited_mileage", "fuel_policy", "latitude", "longitude")
+
+
+class SyncInProgress(RuntimeError):
+    pass
+
+
+_lock = threading.Lock()
+
+
+def content_hash(*fields) -> str:
+    """Stable digest of a tuple of JSON-serializable values."""
+    encoded = json.dumps(fields, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _float(value):
+    return float(value) if value is not None else None
+
+
+def price_values(price: dict) -> tuple:
+    """The changeable car_prices fields, normalized so feed and stored rows hash alike."""
+    return (
+        _float(price["price"]),
+        bool(price["free_cancellation"]),
+        bool(price["unlimited_mileage"]),
+        price["fuel_policy"],
+        _float(price["latitude"]),
+        _float(price["longitude"]),
+    )
+
+
+def offer_hash(agency_code, sipp, provider_name, pickup_location, price: dict) -> str:
+    return content_hash(agency_code, sipp, provider_name, pickup_location, *price_values(price))
+
+
+def car_hash(car: dict) -> str:
+    return content_hash(*(car[field] for field in CAR_FIELDS))
+
+
+def _item_key(agency_code, car_name, sipp, pickup_location) -> tuple:
+    return (agency_code, car_name, sipp, pickup_location)
+
+
+class SyncStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.results = 0
+        self.inserted = 0
+        self.updated = 0
+        self.deleted = 0
+        self.unchanged = 0
+        self.cars_inserted = 0
+        self.cars_updated = 0
+        self.cars_deleted = 0
+        self.dimensions_changed = 0
+        self.version = None
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def changed(self) -> bool:
+        return bool(
+            self.inserted or self.updated or self.deleted
+            or self.cars_inserted or self.cars_updated or self.cars_deleted or self.dimensions_changed
+        )
+
+    def summary(self) -> dict:
+        return {
+            "results": self.results,
+            "offers": {
+                "inserted": self.inserted,
+                "updated": self.updated,
+                "deleted": self.deleted,
+                "unchanged": self.unchanged,
+            },
+            "cars": {
+                "inserted": self.cars_inserted,
+                "updated": self.cars_updated,
+                "deleted": self.cars_deleted,
+            },
+            "agencies_providers_changed": self.dimensions_changed,
+            "inventory_version": self.version,
+            "seconds": round(self.elapsed, 3),
+        }
+
+    def report(self, label: str):
+        print(
+            f"[SYNC] {label}: {self.results} results, offers +{self.inserted} ~{self.updated} "
+            f"-{self.deleted} ={self.unchanged}, cars +{self.cars_inserted} ~{self.cars_updated} "
+            f"-{self.cars_deleted} in {self.elapsed:.2f}s"
+        )
+
+
+def _load_dimension(conn, model, key: str, fields: tuple) -> dict:
+    """{key: (id, (field values...))} for the lowest id per key, as ingest resolves them."""
+    rows = {}
+    columns = [getattr(model, field) for field in fields]
+    for row in conn.execute(select(model.id, getattr(model, key), *columns).order_by(model.id)):
+        rows.setdefault(row[1], (row[0], tuple(row[2:])))
+    return rows
+
+
+def _load_stored(conn):
+    """
+    The stored cars, keyed like feed results: {item key: [car, ...]} in id
+    order, each car {"id", "hash", "offers": {(provider, ordinal): (price id, hash)}}.
+    Cars without prices can't be keyed and are left alone.
+    """
+    query = (
+        select(
+            CarPrice.id, CarPrice.car_id, Agency.code, Provider.name, CarPrice.pickup_location,
+            *[getattr(CarPrice, field) for field in PRICE_FIELDS],
+            *[getattr(Car, field) for field in CAR_FIELDS],
+        )
+        .join(Car, Car.id == CarPrice.car_id)
+        .join(Agency, Agency.id == CarPrice.agency_id)
+        .join(Provider, Provider.id == CarPrice.provider_id)
+        .order_by(CarPrice.car_id, CarPrice.id)
+    )
+    cars = {}
+    for row in conn.execute(query):
+        price_id, car_id, agency_code, provider_name, pickup_location = row[:5]
+        price = dict(zip(PRICE_FIELDS, row[5:5 + len(PRICE_FIELDS)]))
+        car_values = dict(zip(CAR_FIELDS, row[5 + len(PRICE_FIELDS):]))
+
+        car = cars.get(car_id)
+        if car is None:
+            car = cars[car_id] = {
+                "id": car_id,
+                "key": _item_key(agency_code, car_values["name"], car_values["sipp"], pickup_location),
+                "hash": car_hash(car_values),
+                "offers": {},
+                "ordinals": {},
+            }
+        ordinal = car["ordinals"].get(provider_name, 0)
+        car["ordinals"][provider_name] = ordinal + 1
+        car["offers"][(provider_name, ordinal)] = (
+            price_id, offer_hash(agency_code, car_values["sipp"], provider_name, pickup_location, price)
+        )
+
+    by_key = {}
+    for car in cars.values():
+        by_key.setdefault(car["key"], []).append(car)
+    return by_key
+
+
+def sync_feed(path: str = DEFAULT_FEED, batch_size: int = DEFAULT_BATCH_SIZE) -> SyncStats:
+    """
+    Apply the differences between `path` and the stored inventory.
+    Raises SyncInProgress if another sync or ingest is running, in this
+    process or any other.
+    """
+    if not _lock.acquire(blocking=False):
+        raise SyncInProgress("An inventory sync is already running")
+    try:
+        return _sync(path, batch_size)
+    finally:
+        _lock.release()
+
+
+def _sync(path: str, batch_size: int) -> SyncStats:
+    stats = SyncStats()
+
+    with get_engine().begin() as conn:
+        # Rejected rather than queued behind another ingest / sync
+        if not lock_inventory(conn, wait=False):
+            raise SyncInProgress("An inventory sync or ingest is already running")
+
+        agencies = _load_dimension(conn, Agency, "code", ("name", "logo", "rating"))
+        providers = _load_dimension(conn, Provider, "name", ("logo",))
+        stored = _load_stored(conn)
+
+        next_agency_id = _next_id(conn, Agency)
+        next_provider_id = _next_id(conn, Provider)
+        next_car_id = _next_id(conn, Car)
+        next_price_id = _next_id(conn, CarPrice)
+
+        seen_dimensions = set()
+        changed_dimensions = {Agency: [], Provider: []}
+        seen_cars = set()
+        occurrences = {}
+        # car_prices ids whose car_offers rows must be re-read
+        touched = set()
+
+        inserts = {Agency: [], Provider: [], Car: [], CarPrice: []}
+        updates = {Agency: [], Provider: [], Car: [], CarPrice: []}
+        deleted_prices = []
+
+        def flush():
+            # Parents first so new price rows always reference stored ids
+            for model in (Agency, Provider, Car, CarPrice):
+                bulk_insert(conn, model.__table__, inserts[model])
+                inserts[model].clear()
+            for model, rows in updates.items():
+                if rows:
+                    conn.execute(update(model).where(model.id == bindparam("_id")), rows)
+                    rows.clear()
+            if deleted_prices:
+                conn.execute(delete(CarPrice).where(CarPrice.id.in_(deleted_prices)))
+                deleted_prices.clear()
+
+        def pending() -> int:
+            return sum(len(rows) for rows in inserts.values()) + sum(len(rows) for rows in updates.values())
+
+        def resolve(model, lookup: dict, key, values: tuple, row: dict):
+            """Id of the dimension row for `key`, inserting or updating it on first sight."""
+            nonlocal next_agency_id, next_provider_id
+            known = lookup.get(key)
+            if known is None:
+                if model is Agency:
+                    dimension_id, next_agency_id = next_agency_id, next_agency_id + 1
+                else:
+                    dimension_id, next_provider_id = next_provider_id, next_provider_id + 1
+                lookup[key] = (dimension_id, values)
+                inserts[model].append({"id": dimension_id, **row})
+                seen_dimensions.add((model, key))
+                stats.dimensions_changed += 1
+                return dimension_id
+            dimension_id, stored_values = known
+            if (model, key) not in seen_dimensions:
+                # The first occurrence in the feed wins, as in ingest
+                seen_dimensions.add((model, key))
+                if stored_values != values:
+                    lookup[key] = (dimension_id, values)
+                    updates[model].append({"_id": dimension_id, **row})
+                    changed_dimensions[model].append(dimension_id)
+                    stats.dimensions_changed += 1
+            return dimension_id
+
+        for item in iter_results(path):
+            stats.results += 1
+            agency_data = item.get("agency") or {}
+            code = agency_data.get("code")
+            agency_row = {
+                "name": agency_data.get("name"),
+                "code": code,
+                "logo": agency_data.get("logo"),
+                "rating": agency_data.get("rating"),
+            }
+            agency_id = resolve(
+                Agency, agencies, code, (agency_row["name"], agency_row["logo"], agency_row["rating"]), agency_row
+            )
+
+            offers = item.get("providers") or []
+            if not offers:
+                # Results without offers never show up in car_offers, but like
+                # ingest_feed, the first result per agency code sets its columns
+                continue
+
+            car_data = item.get("car") or {}
+            car_row = {field: car_data.get(field) for field in CAR_FIELDS}
+            pickup = item.get("pickup") or {}
+            pickup_location = pickup.get("address")
+
+            # Repeated results are matched to stored cars in order
+            key = _item_key(code, car_row["name"], car_row["sipp"], pickup_location)
+            ordinal = occurrences.get(key, 0)
+            occurrences[key] = ordinal + 1
+            candidates = stored.get(key, ())
+            car = candidates[ordinal] if ordinal < len(candidates) else None
+
+            if car is None:
+                car_id, next_car_id = next_car_id, next_car_id + 1
+                inserts[Car].append({"id": car_id, **car_row})
+                stats.cars_inserted += 1
+                stored_offers = {}
+            else:
+                car_id = car["id"]
+                seen_cars.add(car_id)
+                stored_offers = car["offers"]
+                if car["hash"] != car_hash(car_row):
+                    updates[Car].append({"_id": car_id, **car_row})
+                    stats.cars_updated += 1
+                    # Every offer of the car carries its columns
+                    touched.update(price_id for price_id, _ in stored_offers.values())
+
+            provider_ordinals = {}
+            matched = set()
+            for pr in offers:
+                name = pr.get("name")
+                logo = pr.get("logo") or pr.get("image")
+                provider_id = resolve(Provider, providers, name, (logo,), {"name": name, "logo": logo})
+
+                price = {
+                    "price": pr.get("price", 0),
+                    "free_cancellation": pr.get("is_free_cancellation", False),
+                    "unlimited_mileage": pr.get("unlimited_mileage", False),
+                    "fuel_policy": pr.get("fuel_policy"),
+                    "latitude": pickup.get("latitude"),
+                    "longitude": pickup.get("longitude"),
+                }
+                digest = offer_hash(code, car_row["sipp"], name, pickup_location, price)
+
+                offer_ordinal = provider_ordinals.get(name, 0)
+                provider_ordinals[name] = offer_ordinal + 1
+                known = stored_offers.get((name, offer_ordinal))
+                if known is None:
+                    price_id, next_price_id = next_price_id, next_price_id + 1
+                    inserts[CarPrice].append({
+                        "id": price_id,
+                        "car_id": car_id,
+                        "agency_id": agency_id,
+                        "provider_id": provider_id,
+                        "pickup_location": pickup_location,
+                        **price,
+                    })
+                    touched.add(price_id)
+                    stats.inserted += 1
+                    continue
+
+                price_id, stored_digest = known
+                matched.add((name, offer_ordinal))
+                if stored_digest != digest:
+                    updates[CarPrice].append({"_id": price_id, **price})
+                    touched.add(price_id)
+                    stats.updated += 1
+                else:
+                    stats.unchanged += 1
+
+            # Offers the result no longer has
+            for offer_key, (price_id, _) in stored_offers.items():
+                if offer_key not in matched:
+                    deleted_prices.append(price_id)
+                    touched.add(price_id)
+                    stats.deleted += 1
+
+            if pending() >= batch_size:
+                flush()
+
+        flush()
+
+        # Cars the feed no longer has, with all their offers
+        gone = [car for cars in stored.values() for car in cars if car["id"] not in seen_cars]
+        for start in range(0, len(gone), batch_size):
+            batch = gone[start:start + batch_size]
+            price_ids = [price_id for car in batch for price_id, _ in car["offers"].values()]
+            conn.execute(delete(CarPrice).where(CarPrice.id.in_(price_ids)))
+            conn.execute(delete(Car).where(Car.id.in_([car["id"] for car in batch])))
+            touched.update(price_ids)
+            stats.deleted += len(price_ids)
+            stats.cars_deleted += len(batch)
+
+        if stats.changed:
+            _sync_sequences(conn)
+            # Agency / provider columns are on every one of their offers
+            if changed_dimensions[Agency] or changed_dimensions[Provider]:
+                touched.update(conn.execute(select(CarPrice.id).where(or_(
+                    CarPrice.agency_id.in_(changed_dimensions[Agency]),
+                    CarPrice.provider_id.in_(changed_dimensions[Provider]),
+                ))).scalars())
+            # Readers see the changes (and the new version) only once this transaction commits
+            update_offers(conn, touched)
+            stats.version = record_inventory_change(conn)
+
+    if stats.changed:
+        # Workers mapping OFFER_SNAPSHOT_DIR swap to it (no-op when it isn't set)
+        publish_snapshot()
+        bump_inventory_version(stats.version)
+    stats.report("done")
+    return stats
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    batch_size = DEFAULT_BATCH_SIZE
+    if "--batch-size" in args:
+        i = args.index("--batch-size")
+        batch_size = int(args[i + 1])
+        del args[i:i + 2]
+
+    sync_feed(args[0] if args else DEFAULT_FEED, batch_size)
@@ -1,9 +1,6 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from app.models.car import Car
-from app.models.price import CarPrice
-from app.models.agency import Agency
-from app.models.provider import Provider
+from app.services.offer_query import count_statement, rows_statement, search_filters
+from app.services.pagination import count_cache, decode_cursor, encode_cursor, row_sort_value
 
 def get_cars(
     db: Session,
@@ -14,29 +11,48 @@ def get_cars(
     car_type: str,
     fuel_type: str,
     agency: str,
+    sort_by: str = "price_asc",
+    cursor: str | None = None,
+    include_count: bool = True,
 ):
-    query = (
-        db.query(CarPrice, Car, Agency, Provider)
-        .join(Car, CarPrice.car_id == Car.id)
-        .join(Agency, CarPrice.agency_id == Agency.id)
-        .join(Provider, CarPrice.provider_id == Provider.id)
+    """
+    Returns (rows, total, next_cursor). With a cursor the page is read with a
+    seek predicate instead of OFFSET and the total comes from the count cache.
+    """
+    dialect = db.bind.dialect.name
+    shape, params = search_filters(
+        dialect,
+        min_price=min_price,
+        max_price=max_price,
+        car_type_contains=car_type,
+        fuel_contains=fuel_type,
+        agency_contains=agency,
     )
 
-    # apply filters
-    if min_price is not None:
-        query = query.filter(CarPrice.price >= min_price)
-    if max_price is not None:
-        query = query.filter(CarPrice.price <= max_price)
-    if car_type:
-        query = query.filter(Car.type.ilike(f"%{car_type}%"))
-    if fuel_type:
-        query = query.filter(Car.fuel.ilike(f"%{fuel_type}%"))
-    if agency:
-        query = query.filter(Agency.name.ilike(f"%{agency}%"))
-
-    total = query.count()
+    total = None
+    if include_count:
+        count_key = ("service", min_price, max_price, car_type, fuel_type, agency)
+        total = count_cache.get(count_key) if cursor else None
+        if total is None:
+            total = db.scalar(count_statement(shape, dialect), params)
+            count_cache.set(count_key, total)
 
     # pagination
-    cars = query.offset((page - 1) * limit).limit(limit).all()
+    if cursor:
+        after_value, after_id = decode_cursor(cursor, sort_by)
+        query = rows_statement(shape, dialect, sort_by, page="seek")
+        params.update(after_value=after_value, after_id=after_id)
+    else:
+        query = rows_statement(shape, dialect, sort_by, page="offset")
+        params["offset"] = (page - 1) * limit
+    params["limit"] = limit + 1
+
+    cars = db.execute(query, params).scalars().all()
+
+    next_cursor = None
+    if len(cars) > limit:
+        cars = cars[:limit]
+        last = cars[-1]
+        next_cursor = encode_cursor(sort_by, row_sort_value(sort_by, last), last.id)
 
-    return cars, total
+    return cars, total, next_cursor
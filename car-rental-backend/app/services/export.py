@@ -0,0 +1,96 @@
+"""
+Streaming export of /cars search results (GET /cars/export).
+
+Rows are read with `stream_scalars` and `yield_per`, which uses a
+server-side cursor on Postgres (asyncpg) and fetches in batches on
+SQLite, so memory stays flat however many offers match. Each batch is
+encoded and yielded as one chunk; the next batch is only fetched once the
+ASGI server has sent the previous one, so a slow client throttles the
+query instead of buffering the result in memory. When the client goes
+away Starlette cancels the response, and the generator's exit closes the
+cursor and the session.
+"""
+import asyncio
+import csv
+import io
+import logging
+
+from app.async_database import AsyncSessionLocal
+from app.models.offer import car_offers
+from app.services.geo_index import haversine_km
+from app.services.serializers import encode_offer
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched (and sent) per chunk
+EXPORT_BATCH_SIZE = 1000
+
+CSV_COLUMNS = [column.name for column in car_offers.columns]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _csv_chunk(offers, distances, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    columns = CSV_COLUMNS + (["distance_km"] if distances is not None else [])
+    if header:
+        writer.writerow(columns)
+    for offer in offers:
+        row = [getattr(offer, name) for name in CSV_COLUMNS]
+        if distances is not None:
+            row.append(round(distances[offer.id], 3))
+        writer.writerow(row)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _ndjson_chunk(offers, distances) -> bytes:
+    return b"".join(
+        encode_offer(offer, distances[offer.id] if distances is not None else None) + b"\n"
+        for offer in offers
+    )
+
+
+async def stream_offers(
+    query,
+    params: dict,
+    fmt: str,
+    near_point: tuple[float, float] | None = None,
+    radius_km: float = 25,
+):
+    """Yield the encoded rows of `query` (a select over CarOffer, executed with `params`) in chunks."""
+    rows = 0
+    try:
+        # Its own session: the request's is closed independently of the response body
+        async with AsyncSessionLocal() as db:
+            result = await db.stream_scalars(query, params, execution_options={"yield_per": EXPORT_BATCH_SIZE})
+            first = True
+            async for partition in result.partitions():
+                distances = None
+                if near_point:
+                    distances = {}
+                    for offer in partition:
+                        distance = haversine_km(*near_point, offer.latitude, offer.longitude)
+                        if distance <= radius_km:
+                            distances[offer.id] = distance
+                    partition = [offer for offer in partition if offer.id in distances]
+
+                if fmt == "csv":
+                    chunk = _csv_chunk(partition, distances, header=first)
+                else:
+                    chunk = _ndjson_chunk(partition, distances)
+                first = False
+                rows += len(partition)
+                if chunk:
+                    yield chunk
+
+            if first and fmt == "csv":
+                yield _csv_chunk([], {} if near_point else None, header=True)
+    except (asyncio.CancelledError, GeneratorExit):
+        # Client disconnected: the task was cancelled, or the unfinished generator closed
+        logger.info("export cancelled by client", extra={"rows": rows})
+        raise
+    logger.info("export finished", extra={"rows": rows, "format": fmt})
@@ -0,0 +1,196 @@
+"""
+Facet service for GET /filters.
+
+The facet payload (distinct types, fuels, categories, agencies and the
+price range) only changes when inventory is re-ingested, so it is built
+once per inventory version. Per-value counts conditioned on the current
+selection ("Automatic (42)" given category=SUV) are computed per request,
+either from the in-memory index bitmaps or from one grouped SQL pass.
+"""
+import threading
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.offer import CarOffer
+from app.services.inventory_index import FACET_FIELDS, get_index
+from app.services.inventory_state import inventory_version, on_inventory_change
+from app.services.offer_query import filter_criteria, search_filters
+from app.services.serializers import agency_payload
+
+# Response key for each facet field
+FACET_KEYS = {
+    "type": "car_types",
+    "category": "categories",
+    "fuel": "fuel_types",
+    "agency": "agencies",
+    "free_cancellation": "free_cancellation",
+    "unlimited_mileage": "unlimited_mileage",
+}
+
+_lock = threading.Lock()
+_cached = {"version": None, "payload": None}
+
+
+@on_inventory_change
+def clear_facet_payload(version: int):
+    # Also run for a newer offer snapshot at the same version
+    with _lock:
+        _cached["version"] = None
+        _cached["payload"] = None
+
+
+def _payload_from_index(index) -> dict:
+    # First offer of each agency, in position order
+    first = {}
+    for pos, agency_id in enumerate(index.snapshot.column("agency_id")):
+        first.setdefault(agency_id, pos)
+
+    agencies = {}
+    for pos in first.values():
+        agency = agency_payload(index.snapshot.row(pos))
+        known = agencies.get(agency["code"])
+        if known is None or agency["rating"] > known["rating"]:
+            agencies[agency["code"]] = agency
+
+    # Like SQL's MIN / MAX, the price range skips offers without a price
+    prices = [price for price in index.snapshot.values("price") if price is not None]
+
+    return {
+        "car_types": sorted(v for v in index.bitmaps["type"] if v),
+        "fuel_types": sorted(v for v in index.bitmaps["fuel"] if v),
+        "categories": sorted(v for v in index.bitmaps["category"] if v),
+        "agencies": sorted(agencies.values(), key=lambda x: x["name"]),
+        "price_range": {
+            "min": min(prices) if prices else 0,
+            "max": max(prices) if prices else 10000,
+        },
+    }
+
+
+async def _payload_from_db(db: AsyncSession) -> dict:
+    # Get distinct car types
+    car_types = (await db.execute(select(CarOffer.car_type).distinct().filter(CarOffer.car_type.isnot(None)))).all()
+
+    # Get distinct fuel types
+    fuel_types = (await db.execute(select(CarOffer.car_fuel).distinct().filter(CarOffer.car_fuel.isnot(None)))).all()
+
+    # Get distinct categories
+    categories = (await db.execute(select(CarOffer.car_category).distinct().filter(CarOffer.car_category.isnot(None)))).all()
+
+    # Agencies with offers (unique by code)
+    agencies = (await db.execute(
+        select(
+            CarOffer.agency_name.label("name"),
+            CarOffer.agency_code.label("code"),
+            CarOffer.agency_logo.label("logo"),
+            CarOffer.agency_rating.label("rating"),
+        ).distinct().order_by(CarOffer.agency_name)
+    )).all()
+
+    # Get price range
+    price_stats = (await db.execute(select(
+        func.min(CarOffer.price).label('min_price'),
+        func.max(CarOffer.price).label('max_price')
+    ))).first()
+
+    return {
+        "car_types": sorted([c[0] for c in car_types if c[0]]),
+        "fuel_types": sorted([f[0] for f in fuel_types if f[0]]),
+        "categories": sorted([c[0] for c in categories if c[0]]),
+        "agencies": [
+            {
+                "name": agency.name,
+                "code": agency.code,
+                "logo": agency.logo,
+                "rating": float(agency.rating) if agency.rating else 0
+            }
+            for agency in agencies
+        ],
+        "price_range": {
+            "min": float(price_stats.min_price) if price_stats.min_price else 0,
+            "max": float(price_stats.max_price) if price_stats.max_price else 10000
+        }
+    }
+
+
+async def get_facet_payload(db: AsyncSession) -> dict:
+    """The facet payload for the current inventory version (built at most once per version)."""
+    version = inventory_version()
+    with _lock:
+        if _cached["version"] == version:
+            return _cached["payload"]
+
+    index = get_index()
+    payload = _payload_from_index(index) if index is not None else await _payload_from_db(db)
+
+    with _lock:
+        _cached["version"] = version
+        _cached["payload"] = payload
+    return payload
+
+
+def _format_counts(counts: dict) -> dict:
+    return {
+        FACET_KEYS[field]: {
+            value: n for value, n in sorted(values.items(), key=lambda item: str(item[0]))
+            if value is not None and n
+        }
+        for field, values in counts.items()
+    }
+
+
+def _selects(field: str, selection, value) -> bool:
+    if selection is None:
+        return True
+    if field in ("free_cancellation", "unlimited_mileage"):
+        return bool(value) == selection
+    return value in selection
+
+
+async def facet_counts(
+    db: AsyncSession,
+    selections: dict,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    pickup_location: str | None = None,
+) -> dict:
+    """
+    Per-value offer counts for every facet. Each facet's counts honour every
+    other facet's selection but not its own, so selecting "SUV" still shows
+    how many offers each other category has.
+
+    `selections` maps facet field -> list of values (or a bool for the
+    flags), None when the facet is unselected.
+    """
+    index = get_index()
+    if index is not None:
+        base_mask = index.filter_mask(
+            min_price=min_price, max_price=max_price, pickup_location=pickup_location
+        )
+        return _format_counts(index.facet_counts(base_mask, selections))
+
+    # One grouped pass over the offers, restricted by the non-facet filters
+    facet_columns = (
+        CarOffer.car_type, CarOffer.car_category, CarOffer.car_fuel, CarOffer.agency_name,
+        CarOffer.free_cancellation, CarOffer.unlimited_mileage,
+    )
+    dialect = db.bind.dialect.name
+    shape, params = search_filters(
+        dialect, min_price=min_price, max_price=max_price, pickup_location=pickup_location
+    )
+    query = select(*facet_columns, func.count()).where(*filter_criteria(shape, dialect)).group_by(*facet_columns)
+
+    counts = {field: {} for field in FACET_FIELDS}
+    for row in (await db.execute(query, params)).all():
+        values = tuple(row[:6])
+        values = values[:4] + (bool(values[4]), bool(values[5]))
+        n = row[6]
+        for i, field in enumerate(FACET_FIELDS):
+            if all(
+                _selects(other, selections.get(other), values[j])
+                for j, other in enumerate(FACET_FIELDS) if j != i
+            ):
+                counts[field][values[i]] = counts[field].get(values[i], 0) + n
+
+    return _format_counts(counts)
@@ -0,0 +1,115 @@
+"""
+Grid-bucket spatial index over offer pickup coordinates.
+
+Offers are hashed into fixed-size latitude/longitude cells. A radius query
+only visits the cells overlapping the search circle's bounding box and runs
+the haversine check on the offers inside them.
+"""
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+# ~5.5 km cells: a city-sized radius touches a handful of buckets
+CELL_SIZE_DEG = 0.05
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> tuple[float, float, float, float]:
+    """
+    (min_lat, max_lat, min_lon, max_lon) enclosing the search circle.
+    Longitudes wrap: when the box crosses the antimeridian min_lon > max_lon
+    and it covers min_lon..180 plus -180..max_lon. A circle reaching a pole
+    covers every longitude.
+    """
+    d_lat = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = max(-90.0, lat - d_lat), min(90.0, lat + d_lat)
+    cos_lat = math.cos(math.radians(lat))
+    if min_lat <= -90.0 or max_lat >= 90.0 or cos_lat < 1e-6:
+        return min_lat, max_lat, -180.0, 180.0
+
+    d_lon = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    if d_lon >= 180.0:
+        return min_lat, max_lat, -180.0, 180.0
+    min_lon, max_lon = lon - d_lon, lon + d_lon
+    if min_lon < -180.0:
+        min_lon += 360.0
+    if max_lon > 180.0:
+        max_lon -= 360.0
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def longitude_ranges(min_lon: float, max_lon: float) -> list[tuple[float, float]]:
+    """The bounding box longitudes as one or (across the antimeridian) two ranges."""
+    if min_lon <= max_lon:
+        return [(min_lon, max_lon)]
+    return [(min_lon, 180.0), (-180.0, max_lon)]
+
+
+def parse_near(near: str) -> tuple[float, float]:
+    """Parse a "lat,lon" query value, raising ValueError if it is malformed."""
+    parts = near.split(",")
+    if len(parts) != 2:
+        raise ValueError("near must be 'lat,lon'")
+    lat, lon = float(parts[0]), float(parts[1])
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("near is out of range")
+    return lat, lon
+
+
+class GridIndex:
+    """Buckets of (position, lat, lon) keyed by grid cell."""
+
+    def __init__(self, points, cell_size: float = CELL_SIZE_DEG):
+        self.cell_size = cell_size
+        self.cells = {}
+        for pos, lat, lon in points:
+            if lat is None or lon is None:
+                continue
+            self.cells.setdefault(self._cell(lat, lon), []).append((pos, lat, lon))
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+    def within(self, lat: float, lon: float, radius_km: float) -> dict[int, float]:
+        """Map of position -> distance (km) for every point within the radius."""
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+        low_row, high_row = self._cell(min_lat, 0)[0], self._cell(max_lat, 0)[0]
+        col_ranges = [
+            (self._cell(0, low)[1], self._cell(0, high)[1])
+            for low, high in longitude_ranges(min_lon, max_lon)
+        ]
+
+        # For very large radii it is cheaper to scan the occupied cells
+        span = (high_row - low_row + 1) * sum(high_col - low_col + 1 for low_col, high_col in col_ranges)
+        if span > len(self.cells):
+            buckets = [
+                points for (row, col), points in self.cells.items()
+                if low_row <= row <= high_row
+                and any(low_col <= col <= high_col for low_col, high_col in col_ranges)
+            ]
+        else:
+            buckets = [
+                self.cells[(row, col)]
+                for row in range(low_row, high_row + 1)
+                for low_col, high_col in col_ranges
+                for col in range(low_col, high_col + 1)
+                if (row, col) in self.cells
+            ]
+
+        matches = {}
+        for points in buckets:
+            for pos, point_lat, point_lon in points:
+                distance = haversine_km(lat, lon, point_lat, point_lon)
+                if distance <= radius_km:
+                    matches[pos] = distance
+        return matches
@@ -0,0 +1,447 @@
+"""
+In-memory inventory index for GET /cars.
+
+The car_offers rows are read once at startup from an offer snapshot (see
+app/services/offer_snapshot.py): column arrays, each offer's encoded JSON
+and the presorted orderings. Every filterable value gets a bitmap (a Python
+int with one bit per offer), so any filter combination is a handful of
+AND/OR operations, and every `sort_by` key has a presorted ordering so a
+page is read by walking that ordering until enough matches are found.
+
+With OFFER_SNAPSHOT_DIR set the snapshot is the published, memory-mapped
+file, shared by every worker; otherwise each worker builds one in memory
+from the database.
+"""
+import os
+from array import array
+from bisect import bisect_right
+
+from app.database import SessionLocal
+from app.services.location_search import normalize_location_search, matches_location
+from app.services.geo_index import GridIndex
+from app.services.offer_snapshot import (
+    SORT_KEYS,
+    OfferSnapshot,
+    encode_snapshot,
+    open_published,
+    order_key,
+    publish_snapshot,
+    select_offers,
+)
+from app.services.pagination import cursor_sort_key
+from app.services.serializers import add_distance, add_group, encode_car_offer
+from app.settings import load_env, snapshot_settings
+
+# Number of equal-population price buckets used to answer min/max price ranges
+PRICE_BUCKETS = 64
+
+# Below this selectivity it is cheaper to sort the matching positions than to
+# walk the full presorted ordering
+SPARSE_RATIO = 16
+
+FACET_FIELDS = ("type", "category", "fuel", "agency", "free_cancellation", "unlimited_mileage")
+# car_offers column of each facet field
+FACET_COLUMNS = ("car_type", "car_category", "car_fuel", "agency_name", "free_cancellation", "unlimited_mileage")
+BOOLEAN_FACETS = ("free_cancellation", "unlimited_mileage")
+
+
+def _bitmap(positions, size: int) -> int:
+    """Build a bitmap with the given positions set."""
+    data = bytearray((size + 7) // 8)
+    for pos in positions:
+        data[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(data, "little")
+
+
+def _iter_bits(mask: int):
+    """Yield the positions of the set bits of `mask` in ascending order."""
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    for byte_index, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield (byte_index << 3) + low.bit_length() - 1
+            byte ^= low
+
+
+class InventoryIndex:
+    """Bitmap-indexed view of an offer snapshot."""
+
+    def __init__(self, snapshot: OfferSnapshot):
+        self.snapshot = snapshot
+        self.snapshot_version = snapshot.version
+        self.size = snapshot.size
+        self.all_mask = (1 << self.size) - 1
+
+        # Column views into the snapshot, shared with every process mapping the same file
+        self.ids = snapshot.column("id")
+        self.prices = snapshot.column("price")
+        self.ratings = snapshot.column("agency_rating")
+        # NULL prices read as 0 in `prices`; like SQL, price filters and ranges skip them
+        self.priced_mask = _bitmap(
+            (pos for pos, price in enumerate(snapshot.values("price")) if price is not None), self.size
+        )
+        self.names = snapshot.strings("car_name", null="")
+        locations = snapshot.strings("pickup_location", null="")
+        self.locations = locations.values
+        self.location_codes = locations.codes
+
+        # One bitmap per distinct value of each facet field
+        self.bitmaps = {}
+        for field, column in zip(FACET_FIELDS, FACET_COLUMNS):
+            values = snapshot.column(column)
+            positions_by_code = {}
+            for pos, code in enumerate(values):
+                positions_by_code.setdefault(code, []).append(pos)
+            if column in BOOLEAN_FACETS:
+                decode = bool
+            else:
+                decode = snapshot.strings(column).values.__getitem__
+            self.bitmaps[field] = {
+                decode(code): _bitmap(positions, self.size)
+                for code, positions in positions_by_code.items()
+            }
+
+        # One bitmap per distinct pickup address
+        location_positions = [[] for _ in self.locations]
+        for pos, code in enumerate(self.location_codes):
+            location_positions[code].append(pos)
+        self.location_bitmaps = [_bitmap(positions, self.size) for positions in location_positions]
+
+        # Presorted orderings (positions) and their inverse (rank of each position)
+        self.orders = {sort_by: snapshot.order(sort_by) for sort_by in SORT_KEYS}
+        self.ranks = {sort_by: snapshot.rank(sort_by) for sort_by in SORT_KEYS}
+
+        self._build_price_buckets()
+        self.geo = GridIndex(zip(range(self.size), snapshot.values("latitude"), snapshot.values("longitude")))
+        # Group code of every offer per group_by, built on first use
+        self.group_codes = {}
+
+    def _build_price_buckets(self):
+        order = self.orders["price_asc"]
+        step = max(1, -(-self.size // PRICE_BUCKETS))
+        self.price_buckets = []
+        for start in range(0, self.size, step):
+            positions = order[start:start + step]
+            self.price_buckets.append((
+                self.prices[positions[0]],
+                self.prices[positions[-1]],
+                _bitmap(positions, self.size),
+                positions,
+            ))
+
+    def _price_mask(self, min_price: float | None, max_price: float | None) -> int:
+        low = float("-inf") if min_price is None else min_price
+        high = float("inf") if max_price is None else max_price
+        mask = 0
+        for bucket_min, bucket_max, bitmap, positions in self.price_buckets:
+            if bucket_max < low or bucket_min > high:
+                continue
+            if bucket_min >= low and bucket_max <= high:
+                mask |= bitmap
+                continue
+            # Boundary bucket: check offers individually
+            mask |= _bitmap(
+                (pos for pos in positions if low <= self.prices[pos] <= high),
+                self.size,
+            )
+        return mask
+
+    def _location_mask(self, pickup_location: str) -> int:
+        keywords = normalize_location_search(pickup_location)
+        if not keywords:
+            return self.all_mask
+        mask = 0
+        for code, address in enumerate(self.locations):
+            if matches_location(address, keywords):
+                mask |= self.location_bitmaps[code]
+        return mask
+
+    def _values_mask(self, field: str, values) -> int:
+        bitmap = self.bitmaps[field]
+        mask = 0
+        for value in values:
+            mask |= bitmap.get(value, 0)
+        return mask
+
+    def filter_mask(
+        self,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        car_types: list[str] | None = None,
+        categories: list[str] | None = None,
+        fuels: list[str] | None = None,
+        agencies: list[str] | None = None,
+        pickup_location: str | None = None,
+        free_cancellation: bool | None = None,
+        unlimited_mileage: bool | None = None,
+    ) -> int:
+        """Bitmap of the offers matching every given filter."""
+        mask = self.all_mask
+
+        if min_price is not None or max_price is not None:
+            mask &= self._price_mask(min_price, max_price) & self.priced_mask
+        if pickup_location:
+            mask &= self._location_mask(pickup_location)
+
+        for field, values in (
+            ("type", car_types),
+            ("category", categories),
+            ("fuel", fuels),
+            ("agency", agencies),
+        ):
+            if values:
+                mask &= self._values_mask(field, values)
+
+        if free_cancellation is not None:
+            mask &= self.bitmaps["free_cancellation"].get(free_cancellation, 0)
+        if unlimited_mileage is not None:
+            mask &= self.bitmaps["unlimited_mileage"].get(unlimited_mileage, 0)
+
+        return mask
+
+    def facet_counts(self, base_mask: int, selections: dict) -> dict:
+        """
+        Per-value counts for every facet field under `base_mask`, each facet
+        conditioned on the other facets' selections but not its own.
+        """
+        selected = {}
+        for field, selection in selections.items():
+            if selection is None:
+                continue
+            if isinstance(selection, bool):
+                selected[field] = self.bitmaps[field].get(selection, 0)
+            else:
+                selected[field] = self._values_mask(field, selection)
+
+        counts = {}
+        for field in FACET_FIELDS:
+            mask = base_mask
+            for other, other_mask in selected.items():
+                if other != field:
+                    mask &= other_mask
+            counts[field] = {
+                value: (mask & bitmap).bit_count()
+                for value, bitmap in self.bitmaps[field].items()
+            }
+        return counts
+
+    def price_histogram(self, mask: int, low: float, width: float, buckets: int) -> list[int]:
+        """Counts of the priced offers in `mask` per `width`-wide price bucket starting at `low`."""
+        counts = [0] * buckets
+        last = buckets - 1
+        prices = self.prices
+        for pos in _iter_bits(mask & self.priced_mask):
+            counts[min(max(int((prices[pos] - low) / width), 0), last)] += 1
+        return counts
+
+    def _group_codes(self, group_by: str):
+        codes = self.group_codes.get(group_by)
+        if codes is None:
+            if group_by == "car":
+                codes = self.snapshot.column("car_id")
+            else:
+                lookup = {}
+                keys = zip(
+                    self.snapshot.strings("car_sipp"),
+                    self.snapshot.strings("agency_code"),
+                    self.snapshot.strings("pickup_location", null=""),
+                )
+                codes = array("I", (lookup.setdefault(key, len(lookup)) for key in keys))
+            self.group_codes[group_by] = codes
+        return codes
+
+    def group(self, mask: int, group_by: str, top_n: int = 0) -> tuple[int, dict]:
+        """
+        Collapse the offers in `mask` per group_by ("car" or "sipp").
+        Returns the bitmap of each group's cheapest offer (lowest price, then
+        id) and, per cheapest offer, (offer count, positions of the group's
+        `top_n` cheapest offers or None).
+        """
+        codes = self._group_codes(group_by)
+        if mask.bit_count() * SPARSE_RATIO >= self.size:
+            bits = mask.to_bytes((self.size + 7) // 8, "little")
+            ordered = (pos for pos in self.orders["price_asc"] if (bits[pos >> 3] >> (pos & 7)) & 1)
+        else:
+            ordered = sorted(_iter_bits(mask), key=self.ranks["price_asc"].__getitem__)
+
+        cheapest, counts, tops = {}, {}, {}
+        for pos in ordered:
+            code = codes[pos]
+            if code not in cheapest:
+                cheapest[code] = pos
+                counts[code] = 1
+                tops[code] = [pos]
+            else:
+                counts[code] += 1
+                if len(tops[code]) < top_n:
+                    tops[code].append(pos)
+
+        groups = {
+            pos: (counts[code], tops[code] if top_n else None)
+            for code, pos in cheapest.items()
+        }
+        return _bitmap(cheapest.values(), self.size), groups
+
+    def near(self, lat: float, lon: float, radius_km: float) -> tuple[int, dict[int, float]]:
+        """Bitmap of offers within `radius_km` of (lat, lon) and their distances."""
+        distances = self.geo.within(lat, lon, radius_km)
+        return _bitmap(distances, self.size), distances
+
+    def sort_value(self, sort_by: str, pos: int, distances: dict[int, float] | None = None):
+        """The cursor value of an offer for the given sort_by."""
+        if sort_by in ("price_asc", "price_desc"):
+            return self.prices[pos]
+        if sort_by == "rating":
+            return self.ratings[pos]
+        if sort_by == "name":
+            return self.names[pos]
+        if sort_by == "distance" and distances is not None:
+            return distances[pos]
+        return None
+
+    def sort_key(self, sort_by: str, distances: dict[int, float] | None = None):
+        """Function mapping a position to its ascending sort tuple."""
+        if sort_by in SORT_KEYS:
+            return order_key(sort_by, self.ids, self.prices, self.ratings, self.names)
+        if sort_by == "distance" and distances is not None:
+            return lambda pos: (distances[pos], self.ids[pos])
+        return lambda pos: (self.ids[pos],)
+
+    def encoded_page(
+        self,
+        mask: int,
+        sort_by: str,
+        offset: int,
+        limit: int,
+        distances: dict[int, float] | None = None,
+        after: tuple | None = None,
+        groups: dict | None = None,
+    ) -> tuple[int, list[bytes], tuple | None]:
+        """
+        Return (total matches, encoded offers, next cursor position) for
+        `mask`; see `page_positions` for the arguments. With `groups` (from
+        `group`) each offer also carries its group's offer_count / offers.
+        """
+        total, positions, next_after = self.page_positions(mask, sort_by, offset, limit, distances, after)
+        results = []
+        for pos in positions:
+            fragment = self.snapshot.fragment(pos)
+            if distances is not None:
+                fragment = add_distance(fragment, distances[pos])
+            if groups is not None:
+                offer_count, top = groups[pos]
+                fragment = add_group(fragment, offer_count, None if top is None else [
+                    encode_car_offer(self.snapshot.row(p)) for p in top
+                ])
+            results.append(fragment)
+        return total, results, next_after
+
+    def page_positions(
+        self,
+        mask: int,
+        sort_by: str,
+        offset: int,
+        limit: int,
+        distances: dict[int, float] | None = None,
+        after: tuple | None = None,
+    ) -> tuple[int, list[int], tuple | None]:
+        """
+        Return (total matches, offer positions, next cursor position) for `mask`.
+
+        Offers are read from `offset`, or right after the (value, id) given
+        in `after` when paginating by cursor. The last element is the
+        (value, id) of the last offer when more matches follow, else None.
+        When `distances` is given (a near search) sort_by="distance"
+        orders by it.
+        """
+        total = mask.bit_count()
+        if total == 0 or (after is None and offset >= total):
+            return total, [], None
+
+        key = self.sort_key(sort_by, distances)
+        if after is not None:
+            offset = 0
+            after_key = cursor_sort_key(sort_by, *after)
+        wanted = limit + 1
+
+        if sort_by in self.orders and total * SPARSE_RATIO >= self.size:
+            # Dense result: walk the presorted ordering
+            order = self.orders[sort_by]
+            start = bisect_right(order, after_key, key=key) if after is not None else 0
+            bits = mask.to_bytes((self.size + 7) // 8, "little")
+            positions = []
+            skipped = 0
+            for i in range(start, self.size):
+                pos = order[i]
+                if not (bits[pos >> 3] >> (pos & 7)) & 1:
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                positions.append(pos)
+                if len(positions) == wanted:
+                    break
+        else:
+            # Sparse result (or distance order): sort just the matches
+            if sort_by in self.orders:
+                ranked = sorted(_iter_bits(mask), key=self.ranks[sort_by].__getitem__)
+            else:
+                ranked = sorted(_iter_bits(mask), key=key)
+            start = bisect_right(ranked, after_key, key=key) if after is not None else offset
+            positions = ranked[start:start + wanted]
+
+        next_after = None
+        if len(positions) > limit:
+            positions = positions[:limit]
+            last = positions[-1]
+            next_after = (self.sort_value(sort_by, last, distances), self.ids[last])
+
+        return total, positions, next_after
+
+
+_index: InventoryIndex | None = None
+
+
+def index_enabled() -> bool:
+    load_env()
+    return os.getenv("INVENTORY_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+def get_index() -> InventoryIndex | None:
+    """The currently loaded index, or None when /cars must query the database."""
+    return _index
+
+
+def snapshot_stats() -> dict:
+    """Version, size and age of the snapshot the loaded index reads, for /metrics."""
+    return _index.snapshot.stats() if _index is not None else {}
+
+
+def build_index(db) -> InventoryIndex:
+    """An index over an in-memory snapshot of the database's offers."""
+    return InventoryIndex(OfferSnapshot(encode_snapshot(db.execute(select_offers()))))
+
+
+def _published_snapshot(directory: str) -> OfferSnapshot:
+    snapshot = open_published(directory)
+    if snapshot is None:
+        # Nothing published yet: the first worker here writes it from the database
+        publish_snapshot(directory, only_if_missing=True)
+        snapshot = open_published(directory)
+    return snapshot
+
+
+def load_index() -> InventoryIndex:
+    """Build a fresh index from the published snapshot (or the database) and swap it in."""
+    global _index
+    directory = snapshot_settings()["dir"]
+    if directory:
+        index = InventoryIndex(_published_snapshot(directory))
+    else:
+        db = SessionLocal()
+        try:
+            index = build_index(db)
+        finally:
+            db.close()
+    _index = index
+    return index
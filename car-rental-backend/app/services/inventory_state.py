@@ -0,0 +1,104 @@
+"""
+Inventory version tracking.
+
+Anything derived from the inventory tables (facet payloads, indexes,
+caches) keys itself off `inventory_version()`. The version lives in the
+database (the inventory_meta row), so every process agrees on it:
+writers (ingest, sync, migrate) call `record_inventory_change(conn)` in
+the transaction that changes the inventory and `bump_inventory_version()`
+with its result once it has committed. Other processes pick the new
+version up with `refresh_inventory_version()`, which the app polls (see
+`watch_inventory` in app/startup.py). Switching to a new version runs the
+registered reload callbacks.
+"""
+import logging
+import threading
+import time
+
+from sqlalchemy import insert, select, update
+
+from app.database import get_engine
+from app.models.inventory_meta import InventoryMeta
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_version = 0
+_updated_at = time.time()
+_listeners = []
+
+
+def inventory_version() -> int:
+    return _version
+
+
+def inventory_updated_at() -> float:
+    """Unix time of the current version's write (process start until one is known)."""
+    return _updated_at
+
+
+def on_inventory_change(callback):
+    """Register `callback(version)` to run after every version change."""
+    _listeners.append(callback)
+    return callback
+
+
+def record_inventory_change(conn) -> int:
+    """Increment the stored version inside the writer's transaction. Returns the new version."""
+    values = {"version": InventoryMeta.version + 1, "updated_at": time.time()}
+    if conn.execute(update(InventoryMeta).where(InventoryMeta.id == 1).values(**values)).rowcount == 0:
+        conn.execute(insert(InventoryMeta).values(id=1, version=1, updated_at=values["updated_at"]))
+    return conn.execute(select(InventoryMeta.version).where(InventoryMeta.id == 1)).scalar_one()
+
+
+def stored_inventory_version(conn) -> tuple[int, float | None]:
+    """(version, updated_at) as stored; (0, None) before the first write."""
+    row = conn.execute(
+        select(InventoryMeta.version, InventoryMeta.updated_at).where(InventoryMeta.id == 1)
+    ).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+def _notify(version: int):
+    for callback in list(_listeners):
+        try:
+            callback(version)
+        except Exception:
+            logger.exception("inventory reload callback failed", extra={"callback": callback.__name__, "version": version})
+
+
+def bump_inventory_version(version: int, updated_at: float | None = None) -> int:
+    """Switch this process to `version` and run the reload callbacks, unless it already has."""
+    global _version, _updated_at
+    with _lock:
+        if version == _version:
+            return version
+        _version = version
+        _updated_at = updated_at or time.time()
+    _notify(version)
+    return version
+
+
+def refresh_inventory_version(notify: bool = True) -> bool:
+    """
+    Switch to the stored version if another process has changed it.
+    With notify=False only the version is taken (the caller is about to
+    build what the callbacks would). Returns whether it changed.
+    """
+    global _version, _updated_at
+    with get_engine().connect() as conn:
+        version, updated_at = stored_inventory_version(conn)
+    if version == _version:
+        return False
+    if notify:
+        bump_inventory_version(version, updated_at)
+    else:
+        with _lock:
+            _version = version
+            _updated_at = updated_at or _updated_at
+    return True
+
+
+def reload_inventory():
+    """Run the reload callbacks again for the current version (e.g. for a newer offer snapshot)."""
+    _notify(_version)
@@ -0,0 +1,129 @@
+import re
+from sqlalchemy import bindparam, column, or_, select, table, text
+from app.models.price import CarPrice
+
+# FTS5 shadow table over car_prices.pickup_location (SQLite only)
+car_prices_fts = table("car_prices_fts", column("rowid"), column("pickup_location"))
+
+
+def normalize_location_search(search_term: str) -> list[str]:
+    """
+    Normalize location search term into searchable keywords.
+    """
+    if not search_term:
+        return []
+
+    # Convert to lowercase and strip
+    normalized = search_term.strip().lower()
+
+    # Split by common separators
+    keywords = re.split(r'[\s\-,+]+', normalized)
+
+    # Filter out very short words (less than 3 chars)
+    keywords = [k.strip() for k in keywords if len(k) >= 3]
+
+    return keywords
+
+
+def matches_location(address: str, search_keywords: list[str]) -> bool:
+    """
+    Check if address matches any of the search keywords.
+    """
+    if not address or not search_keywords:
+        return False
+
+    address_lower = address.lower()
+
+    # Match if ANY keyword is found
+    for keyword in search_keywords:
+        if keyword in address_lower:
+            return True
+
+    return False
+
+
+def location_params(search_keywords: list[str], dialect: str) -> dict:
+    """Bound values for `location_clause(dialect, len(params), ...)`."""
+    if dialect == "sqlite":
+        # Quote each keyword so FTS5 treats it as a literal substring
+        return {"location_match": " OR ".join('"' + k.replace('"', '""') + '"' for k in search_keywords)}
+    # Bind the full pattern so the planner sees a constant it can match against the trigram index
+    return {
+        f"location_{i}": "%" + k.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        for i, k in enumerate(search_keywords)
+    }
+
+
+def location_clause(dialect: str, size: int, model=CarPrice):
+    """
+    SQL condition matching `model.pickup_location` against ANY keyword, with
+    the keywords as bind parameters (`size` of them, see `location_params`).
+    `model` is CarPrice or CarOffer (whose ids are the car_prices ids).
+
+    Postgres uses ILIKE, which is served by the pg_trgm GIN index; SQLite
+    looks the keywords up in the FTS5 trigram table.
+    """
+    if dialect == "sqlite":
+        matching_ids = select(car_prices_fts.c.rowid).where(
+            car_prices_fts.c.pickup_location.match(bindparam("location_match"))
+        )
+        return model.id.in_(matching_ids)
+    return or_(*[
+        model.pickup_location.ilike(bindparam(f"location_{i}"), escape="\\")
+        for i in range(size)
+    ])
+
+
+def location_filter(search_keywords: list[str], dialect: str, model=CarPrice):
+    """`location_clause` with the keyword values filled in."""
+    params = location_params(search_keywords, dialect)
+    return location_clause(dialect, len(params), model).params(params)
+
+
+def create_location_index(bind):
+    """
+    Create the pickup_location search index if it doesn't exist yet.
+    Safe to call on every startup / table creation.
+    """
+    dialect = bind.dialect.name
+
+    with bind.begin() as conn:
+        if dialect == "postgresql":
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_car_prices_pickup_location_trgm "
+                "ON car_prices USING gin (pickup_location gin_trgm_ops)"
+            ))
+
+        elif dialect == "sqlite":
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'car_prices_fts'"
+            )).first()
+            if exists:
+                return
+
+            # External-content FTS5 table kept in sync with car_prices by triggers
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE car_prices_fts USING fts5("
+                "pickup_location, content='car_prices', content_rowid='id', tokenize='trigram')"
+            ))
+            conn.execute(text(
+                "CREATE TRIGGER car_prices_fts_ai AFTER INSERT ON car_prices BEGIN "
+                "INSERT INTO car_prices_fts(rowid, pickup_location) VALUES (new.id, new.pickup_location); "
+                "END"
+            ))
+            conn.execute(text(
+                "CREATE TRIGGER car_prices_fts_ad AFTER DELETE ON car_prices BEGIN "
+                "INSERT INTO car_prices_fts(car_prices_fts, rowid, pickup_location) "
+                "VALUES ('delete', old.id, old.pickup_location); "
+                "END"
+            ))
+            conn.execute(text(
+                "CREATE TRIGGER car_prices_fts_au AFTER UPDATE OF pickup_location ON car_prices BEGIN "
+                "INSERT INTO car_prices_fts(car_prices_fts, rowid, pickup_location) "
+                "VALUES ('delete', old.id, old.pickup_location); "
+                "INSERT INTO car_prices_fts(rowid, pickup_location) VALUES (new.id, new.pickup_location); "
+                "END"
+            ))
+            # Index rows that were inserted before the table existed
+            conn.execute(text("INSERT INTO car_prices_fts(car_prices_fts) VALUES ('rebuild')"))
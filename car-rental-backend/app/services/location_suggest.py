@@ -0,0 +1,156 @@
+"""
+Pickup location autocomplete for GET /locations/suggest.
+
+Distinct pickup addresses and their offer counts are read from car_offers
+and indexed at startup (and again on every inventory change). Each
+suggestion is either a city ("Las Vegas, NV", via `clean_location_name`)
+or a single address. Every word of a suggestion's name and address goes
+into one sorted array of (word, suggestion) pairs, so the suggestions for
+a query word are the contiguous run of words starting with it, found with
+two bisects; multi-word queries intersect the runs.
+"""
+import re
+import threading
+from bisect import bisect_left
+
+from sqlalchemy import func, select
+
+from app.database import SessionLocal
+from app.models.offer import CarOffer
+from app.scripts.extract_location import clean_location_name
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# clean_location_name sometimes returns a street as the city ("Gilespie Street, US")
+_STREET_WORDS = {"street", "st", "boulevard", "blvd", "avenue", "ave", "road", "rd", "drive", "dr"}
+
+
+def _words(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+def _city(address: str) -> str | None:
+    city = clean_location_name(address)
+    if not city:
+        return None
+    words = _words(city.split(",")[0])
+    return None if not words or words[-1] in _STREET_WORDS else city
+
+
+def _street(address: str) -> str:
+    """The first address segment that isn't just a number ("7135 Gilespie St")."""
+    for part in re.split(r"[,\n]", address):
+        part = " ".join(part.split())
+        if any(c.isalpha() for c in part):
+            return part
+    return " ".join(address.split())
+
+
+class LocationSuggestIndex:
+    def __init__(self, rows):
+        """`rows` are (pickup_location, latitude, longitude, offer count)."""
+        cities = {}
+        addresses = {}
+
+        for address, latitude, longitude, offers in rows:
+            if not address or not address.strip():
+                continue
+            full_address = " ".join(address.split())
+            key = full_address.lower()
+            known = addresses.get(key)
+            if known is not None:
+                known["offers"] += offers
+            else:
+                addresses[key] = {
+                    "type": "address",
+                    "name": _street(address).title(),
+                    "full_address": full_address,
+                    "search_value": _street(address).lower(),
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "offers": offers,
+                }
+
+            # Every row of an address counts towards its city, including repeats
+            city = _city(address)
+            if city:
+                entry = cities.get(city)
+                if entry is None:
+                    entry = cities[city] = {
+                        "type": "city",
+                        "name": city,
+                        "full_address": city,
+                        "search_value": city.split(",")[0].lower(),
+                        "latitude": latitude,
+                        "longitude": longitude,
+                        "offers": 0,
+                    }
+                entry["offers"] += offers
+
+        self.suggestions = list(cities.values()) + list(addresses.values())
+
+        pairs = set()
+        for i, suggestion in enumerate(self.suggestions):
+            for word in _words(suggestion["name"]) + _words(suggestion["full_address"]):
+                pairs.add((word, i))
+        pairs = sorted(pairs)
+        self.words = [word for word, _ in pairs]
+        self.ids = [i for _, i in pairs]
+
+        # Cities first, then by offer count
+        self.rank = [
+            (suggestion["type"] != "city", -suggestion["offers"], suggestion["name"], suggestion["full_address"])
+            for suggestion in self.suggestions
+        ]
+
+    def _prefix_ids(self, prefix: str) -> set[int]:
+        start = bisect_left(self.words, prefix)
+        end = bisect_left(self.words, prefix + "\uffff", start)
+        return set(self.ids[start:end])
+
+    def suggest(self, query: str, limit: int = 10) -> list[dict]:
+        """Top `limit` suggestions whose words start with every word of `query`."""
+        words = _words(query)
+        if not words:
+            return []
+        # Longest word first: it usually has the shortest run
+        words.sort(key=len, reverse=True)
+        matches = self._prefix_ids(words[0])
+        for word in words[1:]:
+            if not matches:
+                break
+            matches &= self._prefix_ids(word)
+        return [self.suggestions[i] for i in sorted(matches, key=self.rank.__getitem__)[:limit]]
+
+
+_lock = threading.Lock()
+_index: LocationSuggestIndex | None = None
+
+
+def build_suggest_index(db) -> LocationSuggestIndex:
+    rows = db.execute(
+        select(CarOffer.pickup_location, func.min(CarOffer.latitude), func.min(CarOffer.longitude), func.count())
+        .group_by(CarOffer.pickup_location)
+    ).all()
+    return LocationSuggestIndex(rows)
+
+
+def load_suggest_index() -> LocationSuggestIndex:
+    """Build a fresh index from the database and swap it in."""
+    global _index
+    db = SessionLocal()
+    try:
+        index = build_suggest_index(db)
+    finally:
+        db.close()
+    _index = index
+    return index
+
+
+def get_suggest_index() -> LocationSuggestIndex:
+    """The loaded index, built on first use if startup didn't load it."""
+    if _index is None:
+        with _lock:
+            if _index is None:
+                load_suggest_index()
+    return _index
@@ -0,0 +1,84 @@
+"""
+Grouped search results for GET /cars?group_by=...
+
+`group_by=car` collapses the offers of one car into a single result;
+`group_by=sipp` collapses offers with the same SIPP code, agency and
+pickup location (the same car class at the same counter). Each group is
+represented by its cheapest offer (lowest price, then id) plus the
+group's offer count, and optionally its N cheapest offers.
+
+In SQL the representative and count come from ROW_NUMBER() / COUNT(*)
+window functions over the filtered offers, so sorting, keyset pagination
+and totals all apply to the groups. The inventory index does the same by
+walking the matches in price order.
+"""
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import aliased
+
+from app.models.offer import CarOffer
+
+GROUP_BY_PATTERN = "^(car|sipp)$"
+
+
+def group_columns(group_by: str, model=CarOffer) -> tuple:
+    if group_by == "car":
+        return (model.car_id,)
+    return (model.car_sipp, model.agency_code, model.pickup_location)
+
+
+def group_key(group_by: str, offer) -> tuple:
+    """The group of a car_offers row."""
+    if group_by == "car":
+        return (offer.car_id,)
+    return (offer.car_sipp, offer.agency_code, offer.pickup_location)
+
+
+def _ranked(filtered, group_by: str):
+    """`filtered` (a select over CarOffer) plus each offer's price rank and its group's size."""
+    columns = group_columns(group_by)
+    return filtered.add_columns(
+        func.row_number().over(partition_by=columns, order_by=(CarOffer.price, CarOffer.id)).label("group_rank"),
+        func.count().over(partition_by=columns).label("group_size"),
+    )
+
+
+def cheapest_per_group(filtered, group_by: str):
+    """
+    Return (query, model): a select of (cheapest offer, group size) per
+    group of the offers `filtered` selects, and the CarOffer alias to sort
+    and seek on.
+    """
+    ranked = _ranked(filtered, group_by).subquery("ranked_offers")
+    cheapest = aliased(CarOffer, ranked)
+    return select(cheapest, ranked.c.group_size).filter(ranked.c.group_rank == 1), cheapest
+
+
+async def top_offers(db, filtered, params: dict, group_by: str, offers: list, n: int) -> dict[tuple, list]:
+    """
+    The `n` cheapest offers selected by `filtered` (executed with `params`)
+    of each group in `offers`, by group key.
+    """
+    keys = list(dict.fromkeys(group_key(group_by, offer) for offer in offers))
+    if not keys or n <= 0:
+        return {}
+    if group_by == "car":
+        filtered = filtered.filter(CarOffer.car_id.in_([key[0] for key in keys]))
+    else:
+        # Row-value IN never matches NULL parts (offers without a SIPP code)
+        columns = group_columns(group_by)
+        filtered = filtered.filter(or_(*[
+            and_(*[column.is_(None) if value is None else column == value for column, value in zip(columns, key)])
+            for key in keys
+        ]))
+
+    ranked = _ranked(filtered, group_by).subquery("ranked_offers")
+    ranked_offer = aliased(CarOffer, ranked)
+    query = (
+        select(ranked_offer)
+        .filter(ranked.c.group_rank <= n)
+        .order_by(*group_columns(group_by, ranked_offer), ranked.c.group_rank)
+    )
+    groups = {}
+    for offer in (await db.execute(query, params)).scalars():
+        groups.setdefault(group_key(group_by, offer), []).append(offer)
+    return groups
@@ -0,0 +1,230 @@
+"""
+Query builder for the car_offers searches (/cars, /cars/export, car_service).
+
+Only a few dozen statement shapes occur in practice: which filters are
+present (and how many location keywords), sort_by, group_by and the
+pagination mode. Each shape's statement is built once with bindparam()
+placeholders and kept here; the filter values, including the
+comma-separated multi-value filters as expanding IN parameters, are
+passed at execute time. Reusing the same statement object means
+SQLAlchemy compiles each shape once per engine and then hits its compiled
+cache (see db_compiled_cache_total on /metrics).
+
+    shape, params = search_filters(dialect, car_types=["SUV"], min_price=50)
+    statement = rows_statement(shape, dialect, "price_asc", page="offset")
+    offers = (await db.execute(statement, {**params, "limit": 12, "offset": 0})).scalars().all()
+"""
+import threading
+
+from sqlalchemy import bindparam, func, or_, select
+
+from app.models.offer import CarOffer
+from app.services.geo_index import bounding_box
+from app.services.location_search import location_clause, location_params, normalize_location_search
+from app.services.offer_groups import cheapest_per_group
+from app.services.pagination import order_by_clause, seek_predicate
+
+# Upper bound on cached statements; the cache is reset when reached
+MAX_STATEMENTS = 1024
+
+# sort_by values with their own ORDER BY (anything else sorts by id)
+SORT_BY = ("price_asc", "price_desc", "rating", "name")
+
+# Multi-value filters: parameter name -> column matched with IN
+VALUE_FILTERS = {
+    "car_types": CarOffer.car_type,
+    "categories": CarOffer.car_category,
+    "fuels": CarOffer.car_fuel,
+    "agencies": CarOffer.agency_name,
+}
+
+# Substring filters (car_service): parameter name -> column matched with ILIKE
+CONTAINS_FILTERS = {
+    "car_type_contains": CarOffer.car_type,
+    "fuel_contains": CarOffer.car_fuel,
+    "agency_contains": CarOffer.agency_name,
+}
+
+
+def search_filters(
+    dialect: str,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    car_types: list[str] | None = None,
+    categories: list[str] | None = None,
+    fuels: list[str] | None = None,
+    agencies: list[str] | None = None,
+    pickup_location: str | None = None,
+    free_cancellation: bool | None = None,
+    unlimited_mileage: bool | None = None,
+    near_point: tuple[float, float] | None = None,
+    radius_km: float = 25,
+    car_type_contains: str | None = None,
+    fuel_contains: str | None = None,
+    agency_contains: str | None = None,
+) -> tuple[tuple, dict]:
+    """
+    (shape, bind values) for the given filters; None / empty filters are
+    left out. Multi-value filters and location keywords are deduplicated
+    and sorted, so equivalent requests produce equal (shape, params).
+    """
+    shape, params = [], {}
+
+    # Price filters
+    if min_price is not None:
+        shape.append("min_price")
+        params["min_price"] = min_price
+    if max_price is not None:
+        shape.append("max_price")
+        params["max_price"] = max_price
+
+    for name, values in (
+        ("car_types", car_types), ("categories", categories), ("fuels", fuels), ("agencies", agencies),
+    ):
+        if values:
+            shape.append(name)
+            params[name] = sorted(set(values))
+
+    for name, value in (
+        ("car_type_contains", car_type_contains), ("fuel_contains", fuel_contains),
+        ("agency_contains", agency_contains),
+    ):
+        if value:
+            shape.append(name)
+            params[name] = f"%{value}%"
+
+    # Location filter (trigram / full-text index on pickup_location)
+    if pickup_location:
+        keywords = sorted(set(normalize_location_search(pickup_location)))
+        if keywords:
+            location = location_params(keywords, dialect)
+            shape.append(("location", len(location)))
+            params.update(location)
+
+    if free_cancellation is not None:
+        shape.append("free_cancellation")
+        params["free_cancellation"] = free_cancellation
+    if unlimited_mileage is not None:
+        shape.append("unlimited_mileage")
+        params["unlimited_mileage"] = unlimited_mileage
+
+    # Radius search: the bounding box in SQL, exact distance in the caller
+    if near_point:
+        min_lat, max_lat, min_lon, max_lon = bounding_box(*near_point, radius_km)
+        # min_lon > max_lon: the box wraps across the antimeridian
+        shape.append("bbox" if min_lon <= max_lon else "bbox_wrapped")
+        params.update(min_lat=min_lat, max_lat=max_lat, min_lon=min_lon, max_lon=max_lon)
+
+    return tuple(shape), params
+
+
+def filters_key(shape: tuple, params: dict) -> tuple:
+    """Hashable key for the (shape, params) returned by search_filters."""
+    return shape, tuple(sorted(
+        (name, tuple(value) if isinstance(value, list) else value) for name, value in params.items()
+    ))
+
+
+def filter_criteria(shape: tuple, dialect: str) -> list:
+    """WHERE conditions over car_offers for `shape`, bound by name to its params."""
+    criteria = []
+    for name in shape:
+        if name == "min_price":
+            criteria.append(CarOffer.price >= bindparam("min_price"))
+        elif name == "max_price":
+            criteria.append(CarOffer.price <= bindparam("max_price"))
+        elif name in VALUE_FILTERS:
+            criteria.append(VALUE_FILTERS[name].in_(bindparam(name, expanding=True)))
+        elif name in CONTAINS_FILTERS:
+            criteria.append(CONTAINS_FILTERS[name].ilike(bindparam(name)))
+        elif name in ("free_cancellation", "unlimited_mileage"):
+            criteria.append(getattr(CarOffer, name) == bindparam(name))
+        elif name == "bbox":
+            criteria.append(CarOffer.latitude.between(bindparam("min_lat"), bindparam("max_lat")))
+            criteria.append(CarOffer.longitude.between(bindparam("min_lon"), bindparam("max_lon")))
+        elif name == "bbox_wrapped":
+            criteria.append(CarOffer.latitude.between(bindparam("min_lat"), bindparam("max_lat")))
+            criteria.append(or_(CarOffer.longitude >= bindparam("min_lon"), CarOffer.longitude <= bindparam("max_lon")))
+        else:
+            _, size = name
+            criteria.append(location_clause(dialect, size, CarOffer))
+    return criteria
+
+
+_lock = threading.Lock()
+_statements = {}
+_stats = {"hits": 0, "misses": 0}
+
+
+def _cached(key: tuple, build):
+    with _lock:
+        statement = _statements.get(key)
+        if statement is not None:
+            _stats["hits"] += 1
+            return statement
+        _stats["misses"] += 1
+    statement = build()
+    with _lock:
+        if len(_statements) >= MAX_STATEMENTS:
+            _statements.clear()
+        return _statements.setdefault(key, statement)
+
+
+def statement_cache_stats() -> dict:
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            "shapes": len(_statements),
+            "hits": _stats["hits"],
+            "misses": _stats["misses"],
+            "hit_ratio": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+def filtered_statement(shape: tuple, dialect: str):
+    """SELECT car_offers matching the filters of `shape`, unordered."""
+    return _cached(("filtered", shape, dialect), lambda: select(CarOffer).where(*filter_criteria(shape, dialect)))
+
+
+def rows_statement(
+    shape: tuple,
+    dialect: str,
+    sort_by: str,
+    group_by: str | None = None,
+    page: str | None = None,
+):
+    """
+    The sorted offers (or, with group_by, (cheapest offer, group size) rows)
+    for `shape`. `page` adds the pagination parameters: "offset" binds
+    `limit` and `offset`, "seek" binds `limit`, `after_value` and `after_id`
+    (a keyset cursor), None reads every row.
+    """
+    def build():
+        query = filtered_statement(shape, dialect)
+        model = CarOffer
+        if group_by:
+            query, model = cheapest_per_group(query, group_by)
+        # Sorting (tie-broken by id so cursors are stable)
+        query = query.order_by(*order_by_clause(sort_by, model))
+        if page == "seek":
+            query = query.where(seek_predicate(sort_by, bindparam("after_value"), bindparam("after_id"), model))
+        if page is not None:
+            query = query.limit(bindparam("limit"))
+        if page == "offset":
+            query = query.offset(bindparam("offset"))
+        return query
+
+    if sort_by not in SORT_BY:
+        sort_by = None
+    return _cached(("rows", shape, dialect, sort_by, group_by, page), build)
+
+
+def count_statement(shape: tuple, dialect: str, group_by: str | None = None):
+    """COUNT of the offers (or groups) matching `shape`."""
+    def build():
+        if group_by:
+            grouped, _ = cheapest_per_group(filtered_statement(shape, dialect), group_by)
+            return select(func.count()).select_from(grouped.subquery())
+        return select(func.count()).select_from(CarOffer).where(*filter_criteria(shape, dialect))
+
+    return _cached(("count", shape, dialect, group_by), build)
@@ -0,0 +1,393 @@
+"""
+Columnar, memory-mappable snapshot of the car_offers rows.
+
+One file holds every offer as columns: integer, float and boolean columns
+as fixed-width native arrays (NULLs stored as 0 and flagged in a per-column
+null bitmap), string columns as uint32 codes into a per-column dictionary.
+Next to the columns it carries each offer's encoded /cars JSON and the
+presorted orderings (and their inverse ranks) of the inventory index.
+
+Layout: MAGIC, the JSON header length, the JSON header (version, row
+count, dictionaries and the offset / size of every section), then the
+sections, each 8-byte aligned.
+
+With OFFER_SNAPSHOT_DIR set, ingest and sync publish a new version
+(`offers-<version>.snap`) after they commit and point the CURRENT file at
+it with an atomic rename. Workers map the file read-only, so the page
+cache holds one copy of the /cars working set however many workers a box
+runs, and swap to a newer version when CURRENT moves (see app/startup.py).
+"""
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from contextlib import contextmanager
+
+import orjson
+from sqlalchemy import Boolean, Float, Integer, select
+
+from app.database import get_engine
+from app.models.offer import car_offers
+from app.services.serializers import offer_payload
+from app.settings import snapshot_settings
+
+MAGIC = b"OFFSNAP1"
+HEADER = struct.Struct("<8sQ")
+ALIGN = 8
+
+CURRENT = "CURRENT"
+# Published versions kept on disk; older files are removed (workers still
+# mapping one keep reading it, the mapping outlives the unlink)
+KEEP_VERSIONS = 2
+
+SORT_KEYS = ("price_asc", "price_desc", "rating", "name")
+
+
+def _column_kind(column) -> str:
+    """Array typecode of a car_offers column ("s" for dictionary-encoded strings)."""
+    if isinstance(column.type, Boolean):
+        return "b"
+    if isinstance(column.type, Integer):
+        return "q"
+    if isinstance(column.type, Float):
+        return "d"
+    return "s"
+
+
+# (name, kind) of every car_offers column, in table order
+COLUMNS = tuple((str(column.name), _column_kind(column)) for column in car_offers.columns)
+
+
+def order_key(sort_by: str, ids, prices, ratings, names):
+    """Function mapping a position to its ascending sort tuple for one of SORT_KEYS."""
+    if sort_by == "price_asc":
+        return lambda pos: (prices[pos], ids[pos])
+    if sort_by == "price_desc":
+        return lambda pos: (-prices[pos], ids[pos])
+    if sort_by == "rating":
+        return lambda pos: (-ratings[pos], ids[pos])
+    if sort_by == "name":
+        return lambda pos: (names[pos], ids[pos])
+    raise ValueError(f"unknown sort key: {sort_by}")
+
+
+class DictionaryColumn:
+    """A dictionary-encoded string column: the value at `pos` is `values[codes[pos]]`."""
+
+    __slots__ = ("codes", "values")
+
+    def __init__(self, codes, values: list):
+        self.codes = codes
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, pos: int):
+        return self.values[self.codes[pos]]
+
+
+def select_offers():
+    return select(car_offers).order_by(car_offers.c.id)
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGN) * ALIGN
+
+
+def encode_snapshot(rows, version: int = 0) -> bytes:
+    """Serialize the rows of `select_offers()` into the snapshot format."""
+    values = {name: array("I" if kind == "s" else kind) for name, kind in COLUMNS}
+    # Code 0 is NULL in every dictionary
+    dictionaries = {name: {None: 0} for name, kind in COLUMNS if kind == "s"}
+    nulls = {name: [] for name, kind in COLUMNS if kind != "s"}
+    fragment_offsets = array("Q", [0])
+    fragments = bytearray()
+
+    size = 0
+    for row in rows:
+        for (name, kind), value in zip(COLUMNS, row):
+            if kind == "s":
+                codes = dictionaries[name]
+                code = codes.get(value)
+                if code is None:
+                    code = codes[value] = len(codes)
+                values[name].append(code)
+            elif value is None:
+                values[name].append(0)
+                nulls[name].append(size)
+            else:
+                values[name].append(value)
+        fragments += orjson.dumps(offer_payload(row))
+        fragment_offsets.append(len(fragments))
+        size += 1
+
+    sections = []
+    offset = 0
+
+    def add(data) -> list[int]:
+        nonlocal offset
+        data = memoryview(data).cast("B")
+        span = [offset, data.nbytes]
+        sections.append(data)
+        offset = _align(offset + data.nbytes)
+        return span
+
+    columns = {}
+    for name, kind in COLUMNS:
+        column = {"kind": kind, "values": add(values[name])}
+        if kind == "s":
+            column["dictionary"] = list(dictionaries[name])
+        elif nulls[name]:
+            bitmap = bytearray((size + 7) // 8)
+            for pos in nulls[name]:
+                bitmap[pos >> 3] |= 1 << (pos & 7)
+            column["nulls"] = add(bitmap)
+        columns[name] = column
+
+    # The inventory index's presorted orderings, NULL prices and names sorting as 0 / ""
+    names = DictionaryColumn(values["car_name"], ["" if value is None else value for value in dictionaries["car_name"]])
+    orders, ranks = {}, {}
+    for sort_by in SORT_KEYS:
+        key = order_key(sort_by, values["id"], values["price"], values["agency_rating"], names)
+        order = array("I", sorted(range(size), key=key))
+        rank = array("I", [0]) * size
+        for r, pos in enumerate(order):
+            rank[pos] = r
+        orders[sort_by] = add(order)
+        ranks[sort_by] = add(rank)
+
+    header = orjson.dumps({
+        "version": version,
+        "created_at": time.time(),
+        "rows": size,
+        "byteorder": sys.byteorder,
+        "columns": columns,
+        "fragments": {"offsets": add(fragment_offsets), "data": add(fragments)},
+        "orders": orders,
+        "ranks": ranks,
+    })
+
+    start = _align(HEADER.size + len(header))
+    out = bytearray(start + offset)
+    HEADER.pack_into(out, 0, MAGIC, len(header))
+    out[HEADER.size:HEADER.size + len(header)] = header
+    position = start
+    for data in sections:
+        out[position:position + data.nbytes] = data
+        position = _align(position + data.nbytes)
+    return bytes(out)
+
+
+class SnapshotRow:
+    """Attribute access to one offer of a snapshot, standing in for a car_offers row."""
+
+    __slots__ = ("_snapshot", "_pos")
+
+    def __init__(self, snapshot, pos: int):
+        self._snapshot = snapshot
+        self._pos = pos
+
+    def __getattr__(self, name: str):
+        return self._snapshot.value(name, self._pos)
+
+
+class OfferSnapshot:
+    """Read-only view of a snapshot held in `buffer` (a mapped file or bytes)."""
+
+    def __init__(self, buffer, path: str | None = None):
+        self.path = path
+        self.buffer = memoryview(buffer)
+        magic, header_size = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"not an offer snapshot: {path or 'buffer'}")
+        header = orjson.loads(self.buffer[HEADER.size:HEADER.size + header_size])
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"snapshot was written on a {header['byteorder']}-endian host")
+        self._start = _align(HEADER.size + header_size)
+
+        self.version = header["version"]
+        self.created_at = header["created_at"]
+        self.size = header["rows"]
+        self._kinds = {}
+        self._columns = {}
+        self._nulls = {}
+        self._dictionaries = {}
+        for name, column in header["columns"].items():
+            kind = column["kind"]
+            self._kinds[name] = kind
+            self._columns[name] = self._section(column["values"], "I" if kind == "s" else kind)
+            if "nulls" in column:
+                self._nulls[name] = self._section(column["nulls"], "B")
+            if "dictionary" in column:
+                self._dictionaries[name] = column["dictionary"]
+        self._fragment_offsets = self._section(header["fragments"]["offsets"], "Q")
+        self._fragments = self._section(header["fragments"]["data"], "B")
+        self._orders = {key: self._section(span, "I") for key, span in header["orders"].items()}
+        self._ranks = {key: self._section(span, "I") for key, span in header["ranks"].items()}
+
+    def _section(self, span: list[int], typecode: str) -> memoryview:
+        offset, nbytes = span
+        start = self._start + offset
+        if start + nbytes > self.buffer.nbytes:
+            raise ValueError(f"truncated offer snapshot: {self.path or 'buffer'}")
+        return self.buffer[start:start + nbytes].cast(typecode)
+
+    def column(self, name: str) -> memoryview:
+        """Raw values of a numeric column (0 for NULL), or the codes of a string column."""
+        return self._columns[name]
+
+    def strings(self, name: str, null=None) -> DictionaryColumn:
+        """A string column, with NULL read as `null`."""
+        values = list(self._dictionaries[name])
+        values[0] = null
+        return DictionaryColumn(self._columns[name], values)
+
+    def is_null(self, name: str, pos: int) -> bool:
+        nulls = self._nulls.get(name)
+        if nulls is None:
+            return self._kinds[name] == "s" and self._columns[name][pos] == 0
+        return bool((nulls[pos >> 3] >> (pos & 7)) & 1)
+
+    def value(self, name: str, pos: int):
+        """The value of one column of one offer, as the database returned it."""
+        kind = self._kinds.get(name)
+        if kind is None:
+            raise AttributeError(name)
+        if kind == "s":
+            return self._dictionaries[name][self._columns[name][pos]]
+        if self.is_null(name, pos):
+            return None
+        value = self._columns[name][pos]
+        return bool(value) if kind == "b" else value
+
+    def values(self, name: str):
+        """Every value of a numeric column in position order, None for NULL."""
+        column = self._columns[name]
+        nulls = self._nulls.get(name)
+        if nulls is None:
+            yield from column
+            return
+        for pos, value in enumerate(column):
+            yield None if (nulls[pos >> 3] >> (pos & 7)) & 1 else value
+
+    def row(self, pos: int) -> SnapshotRow:
+        return SnapshotRow(self, pos)
+
+    def fragment(self, pos: int) -> bytes:
+        """The offer's /cars result as encoded JSON."""
+        return bytes(self._fragments[self._fragment_offsets[pos]:self._fragment_offsets[pos + 1]])
+
+    def order(self, sort_by: str) -> memoryview:
+        """Positions in `sort_by` order."""
+        return self._orders[sort_by]
+
+    def rank(self, sort_by: str) -> memoryview:
+        """Rank of every position in `sort_by` order."""
+        return self._ranks[sort_by]
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "rows": self.size,
+            "bytes": self.buffer.nbytes,
+            "mapped": int(self.path is not None),
+            "age_seconds": round(time.time() - self.created_at, 3),
+        }
+
+
+def snapshot_path(directory: str, version: int) -> str:
+    return os.path.join(directory, f"offers-{version:08d}.snap")
+
+
+def published_version(directory: str) -> int | None:
+    """The version CURRENT points at, None before the first publish."""
+    try:
+        with open(os.path.join(directory, CURRENT)) as f:
+            return int(f.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+def open_snapshot(path: str) -> OfferSnapshot:
+    """Map a snapshot file read-only."""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return OfferSnapshot(mapped, path)
+
+
+def open_published(directory: str) -> OfferSnapshot | None:
+    """
+    Map the current published snapshot, None if there is none. A version
+    pruned between reading CURRENT and opening it (publishers moved on in
+    between) is retried with the newer CURRENT; once mapped, a file stays
+    readable after it is pruned.
+    """
+    version = published_version(directory)
+    while version is not None:
+        try:
+            return open_snapshot(snapshot_path(directory, version))
+        except FileNotFoundError:
+            current = published_version(directory)
+            if current == version:
+                raise
+            version = current
+    return None
+
+
+def _write_atomic(path: str, data: bytes):
+    """Write `data` to `path` through a synced temporary file and a rename."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _publish_lock(directory: str):
+    # POSIX only, like the multi-worker deployments the snapshot is for
+    import fcntl
+
+    with open(os.path.join(directory, ".publish.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _prune(directory: str, version: int):
+    for name in os.listdir(directory):
+        if not (name.startswith("offers-") and name.endswith(".snap")):
+            continue
+        try:
+            old = int(name[len("offers-"):-len(".snap")])
+        except ValueError:
+            continue
+        if old <= version - KEEP_VERSIONS:
+            os.remove(os.path.join(directory, name))
+
+
+def publish_snapshot(directory: str | None = None, only_if_missing: bool = False) -> int | None:
+    """
+    Write a snapshot of car_offers as the next version and point CURRENT at
+    it. Returns the published version, or None when OFFER_SNAPSHOT_DIR is
+    not set. With `only_if_missing`, an already published version is kept.
+    """
+    directory = directory or snapshot_settings()["dir"]
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+
+    with _publish_lock(directory):
+        current = published_version(directory)
+        if only_if_missing and current is not None:
+            return current
+        version = (current or 0) + 1
+        with get_engine().connect() as conn:
+            data = encode_snapshot(conn.execute(select_offers()), version)
+        _write_atomic(snapshot_path(directory, version), data)
+        _write_atomic(os.path.join(directory, CURRENT), f"{version}\n".encode())
+        _prune(directory, version)
+    return version
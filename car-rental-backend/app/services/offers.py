@@ -0,0 +1,133 @@
+"""
+The car_offers search table.
+
+/cars, /cars/{id}, /filters, /locations and the inventory index read the
+flattened car_offers rows instead of joining cars, car_prices, agencies
+and providers on every query. On Postgres car_offers is a materialized
+view refreshed with REFRESH ... CONCURRENTLY, so readers keep seeing the
+previous contents until the refresh commits. SQLite has no materialized
+views, so there it is a plain table rewritten inside the caller's
+transaction, which is atomic for readers too.
+
+Ingest calls `refresh_offers()` in the same transaction that loads the
+inventory, the incremental sync `update_offers()` with the car_prices ids
+it touched; `create_offers()` runs with table creation / migration.
+"""
+from sqlalchemy import func, inspect, select, text
+
+from app.models.car import Car
+from app.models.agency import Agency
+from app.models.provider import Provider
+from app.models.price import CarPrice
+from app.models.offer import car_offers
+
+# car_prices ids per DELETE / INSERT ... SELECT in update_offers
+UPDATE_BATCH_SIZE = 500
+
+
+def offers_select():
+    """The join that car_offers materializes, in car_offers column order."""
+    columns = {
+        "id": CarPrice.id,
+        "car_id": Car.id,
+        "car_name": Car.name,
+        "car_type": Car.type,
+        "car_category": Car.category,
+        "car_fuel": Car.fuel,
+        "car_transmission": Car.transmission,
+        "car_image": Car.image,
+        "car_passengers": Car.passengers,
+        "car_bags": Car.bags,
+        "car_sipp": Car.sipp,
+        "agency_id": Agency.id,
+        "agency_name": Agency.name,
+        "agency_code": Agency.code,
+        "agency_logo": Agency.logo,
+        "agency_rating": func.coalesce(Agency.rating, 0.0),
+        "provider_id": Provider.id,
+        "provider_name": Provider.name,
+        "provider_logo": Provider.logo,
+        "price": CarPrice.price,
+        "free_cancellation": CarPrice.free_cancellation,
+        "unlimited_mileage": CarPrice.unlimited_mileage,
+        "fuel_policy": CarPrice.fuel_policy,
+        "pickup_location": CarPrice.pickup_location,
+        "latitude": CarPrice.latitude,
+        "longitude": CarPrice.longitude,
+    }
+    return (
+        select(*[columns[c.name].label(c.name) for c in car_offers.columns])
+        .join(Car, Car.id == CarPrice.car_id)
+        .join(Agency, Agency.id == CarPrice.agency_id)
+        .join(Provider, Provider.id == CarPrice.provider_id)
+    )
+
+
+def _postgres_view_exists(conn) -> bool:
+    return conn.execute(text("SELECT 1 FROM pg_matviews WHERE matviewname = 'car_offers'")).first() is not None
+
+
+def create_offers(bind):
+    """Create car_offers and its indexes if missing, and fill it. Safe to call repeatedly."""
+    with bind.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            if _postgres_view_exists(conn):
+                return
+            query = offers_select().compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+            conn.execute(text(f"CREATE MATERIALIZED VIEW car_offers AS {query} WITH NO DATA"))
+            # REFRESH ... CONCURRENTLY needs a unique index
+            conn.execute(text("CREATE UNIQUE INDEX uq_car_offers_id ON car_offers (id)"))
+            for index in car_offers.indexes:
+                index.create(conn)
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                "CREATE INDEX ix_car_offers_pickup_location_trgm "
+                "ON car_offers USING gin (pickup_location gin_trgm_ops)"
+            ))
+            conn.execute(text("REFRESH MATERIALIZED VIEW car_offers"))
+        else:
+            if inspect(conn).has_table("car_offers"):
+                return
+            car_offers.create(conn)
+            refresh_offers(conn)
+
+
+def drop_offers(bind):
+    """Drop car_offers, which has to go before the tables it is built from."""
+    with bind.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("DROP MATERIALIZED VIEW IF EXISTS car_offers"))
+        else:
+            car_offers.drop(conn, checkfirst=True)
+
+
+def refresh_offers(conn):
+    """Rebuild car_offers from the base tables, on the caller's connection / transaction."""
+    if conn.dialect.name == "postgresql":
+        populated = conn.execute(text(
+            "SELECT relispopulated FROM pg_class WHERE relname = 'car_offers'"
+        )).scalar()
+        concurrently = " CONCURRENTLY" if populated else ""
+        conn.execute(text(f"REFRESH MATERIALIZED VIEW{concurrently} car_offers"))
+        return
+
+    conn.execute(car_offers.delete())
+    conn.execute(car_offers.insert().from_select([c.name for c in car_offers.columns], offers_select()))
+
+
+def update_offers(conn, ids):
+    """
+    Re-read the car_offers rows of the given car_prices ids (rows whose ids
+    no longer exist are dropped). Postgres can't refresh part of a
+    materialized view, so it falls back to `refresh_offers()`.
+    """
+    if conn.dialect.name == "postgresql":
+        refresh_offers(conn)
+        return
+
+    ids = sorted(set(ids))
+    columns = [c.name for c in car_offers.columns]
+    for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+        batch = ids[start:start + UPDATE_BATCH_SIZE]
+        conn.execute(car_offers.delete().where(car_offers.c.id.in_(batch)))
+        conn.execute(car_offers.insert().from_select(columns, offers_select().where(CarPrice.id.in_(batch))))
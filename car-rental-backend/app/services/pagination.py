@@ -0,0 +1,140 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is an opaque token holding the sort key and offer id of the
+last row of the previous page. The next page is read with a seek predicate
+(`(key, id) > (last_key, last_id)` in sort direction) instead of OFFSET, so
+every page costs the same as the first.
+"""
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import and_, func, or_
+
+from app.models.offer import CarOffer
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_by: str, value, last_id: int) -> str:
+    payload = json.dumps([sort_by, value, last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str) -> tuple:
+    """Return (value, last_id) for `cursor`, which must belong to `sort_by`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        last_id = int(last_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if cursor_sort != sort_by:
+        raise InvalidCursor("Cursor was issued for a different sort_by")
+
+    if sort_by in ("price_asc", "price_desc", "rating", "distance"):
+        valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+    elif sort_by == "name":
+        valid = isinstance(value, str)
+    else:
+        valid = value is None
+    if not valid:
+        raise InvalidCursor("Malformed cursor")
+    return value, last_id
+
+
+def sort_columns(sort_by: str, model=CarOffer):
+    """
+    (key expression, descending) for a sort_by value, or None for id order.
+    `model` is CarOffer or an alias of it (e.g. over a subquery).
+    """
+    if sort_by == "price_asc":
+        return model.price, False
+    if sort_by == "price_desc":
+        return model.price, True
+    if sort_by == "rating":
+        # agency_rating is stored as COALESCE(rating, 0)
+        return model.agency_rating, True
+    if sort_by == "name":
+        return func.coalesce(model.car_name, ""), False
+    return None
+
+
+def order_by_clause(sort_by: str, model=CarOffer) -> list:
+    """ORDER BY for a sort_by value, always tie-broken by id."""
+    columns = sort_columns(sort_by, model)
+    if columns is None:
+        return [model.id.asc()]
+    key, descending = columns
+    return [key.desc() if descending else key.asc(), model.id.asc()]
+
+
+def seek_predicate(sort_by: str, value, last_id: int, model=CarOffer):
+    """WHERE clause selecting the rows after (value, last_id) in sort order."""
+    columns = sort_columns(sort_by, model)
+    if columns is None:
+        return model.id > last_id
+    key, descending = columns
+    past_key = key < value if descending else key > value
+    return or_(past_key, and_(key == value, model.id > last_id))
+
+
+def cursor_sort_key(sort_by: str, value, last_id: int) -> tuple:
+    """Ascending sort tuple of a cursor position, for seeking in Python."""
+    if sort_by in ("price_desc", "rating"):
+        return (-value, last_id)
+    if sort_by in ("price_asc", "name", "distance"):
+        return (value, last_id)
+    return (last_id,)
+
+
+def row_sort_value(sort_by: str, offer):
+    """The cursor value of a car_offers row for the given sort_by."""
+    if sort_by in ("price_asc", "price_desc"):
+        return float(offer.price or 0)
+    if sort_by == "rating":
+        return float(offer.agency_rating) if offer.agency_rating else 0
+    if sort_by == "name":
+        return offer.car_name or ""
+    return None
+
+
+class CountCache:
+    """Small TTL cache of total counts per filter signature."""
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            count, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return count
+
+    def set(self, key, count: int):
+        with self._lock:
+            self._entries[key] = (count, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+count_cache = CountCache()
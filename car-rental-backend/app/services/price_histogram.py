@@ -0,0 +1,90 @@
+"""
+Price histogram for the price slider (GET /filters/price-histogram).
+
+Offers matching the non-price filters are counted into equal-width buckets
+spanning the global price range, so the buckets line up with the slider
+whatever else is selected. Like the facet counts, the histogram ignores
+the price filter itself; offers without a price are left out. It is
+computed from the in-memory index bitmaps when loaded, otherwise with one
+grouped SQL pass.
+"""
+from sqlalchemy import Integer, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.offer import CarOffer
+from app.services.inventory_index import get_index
+from app.services.offer_query import filter_criteria, search_filters
+
+
+def _bucket_counts_from_db(rows, buckets: int) -> list[int]:
+    counts = [0] * buckets
+    for bucket, n in rows:
+        counts[min(max(int(bucket), 0), buckets - 1)] += n
+    return counts
+
+
+async def price_histogram(
+    db: AsyncSession,
+    price_range: dict,
+    buckets: int,
+    car_types: list[str] | None = None,
+    categories: list[str] | None = None,
+    fuels: list[str] | None = None,
+    agencies: list[str] | None = None,
+    pickup_location: str | None = None,
+    free_cancellation: bool | None = None,
+    unlimited_mileage: bool | None = None,
+) -> dict:
+    """Offer counts per price bucket over `price_range` ({"min", "max"}) for the given filters."""
+    low, high = float(price_range["min"]), float(price_range["max"])
+    width = (high - low) / buckets or 1.0
+
+    index = get_index()
+    if index is not None:
+        mask = index.filter_mask(
+            car_types=car_types,
+            categories=categories,
+            fuels=fuels,
+            agencies=agencies,
+            pickup_location=pickup_location,
+            free_cancellation=free_cancellation,
+            unlimited_mileage=unlimited_mileage,
+        )
+        counts = index.price_histogram(mask, low, width, buckets)
+    else:
+        dialect = db.bind.dialect.name
+        shape, params = search_filters(
+            dialect,
+            car_types=car_types,
+            categories=categories,
+            fuels=fuels,
+            agencies=agencies,
+            pickup_location=pickup_location,
+            free_cancellation=free_cancellation,
+            unlimited_mileage=unlimited_mileage,
+        )
+        offset = (CarOffer.price - low) / width
+        # Prices are >= low, so truncating is flooring; Postgres' CAST rounds instead
+        bucket = func.floor(offset) if dialect == "postgresql" else cast(offset, Integer)
+        query = (
+            select(bucket, func.count())
+            .where(CarOffer.price.isnot(None), *filter_criteria(shape, dialect))
+            .group_by(bucket)
+        )
+
+        counts = _bucket_counts_from_db((await db.execute(query, params)).all(), buckets)
+
+    return {
+        "min": low,
+        "max": high,
+        "bucket_width": width,
+        "count": sum(counts),
+        "buckets": [
+            {
+                "min": round(low + i * width, 2),
+                "max": high if i == buckets - 1 else round(low + (i + 1) * width, 2),
+                "count": n,
+            }
+            for i, n in enumerate(counts)
+        ],
+    }
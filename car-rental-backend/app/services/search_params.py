@@ -0,0 +1,5 @@
+def split_values(value: str | None) -> list[str] | None:
+    """Split a comma-separated multi-value filter."""
+    if not value or not isinstance(value, str):
+        return None
+    return [v.strip() for v in value.split(',')]
@@ -0,0 +1,148 @@
+"""
+Offer serialization for /cars, /cars/{id} and /cars/batch.
+
+Responses are encoded with orjson straight to bytes, bypassing FastAPI's
+jsonable_encoder. Cars, agencies and providers don't change between
+inventory versions, so their JSON is encoded once per id and reused; an
+offer is those cached fragments plus its few price fields, and a page is
+the offers joined into the page envelope.
+"""
+import threading
+
+import orjson
+from fastapi import Response
+
+from app.services.inventory_state import on_inventory_change
+
+# Upper bound on cached fragments per kind; the cache is reset when reached
+MAX_FRAGMENTS = 100_000
+
+_lock = threading.Lock()
+_fragments = {"car": {}, "agency": {}, "provider": {}}
+
+
+def car_payload(offer) -> dict:
+    return {
+        "id": offer.car_id,
+        "name": offer.car_name,
+        "type": offer.car_type,
+        "category": offer.car_category,
+        "fuel": offer.car_fuel,
+        "transmission": offer.car_transmission,
+        "image": offer.car_image,
+        "passengers": offer.car_passengers,
+        "bags": offer.car_bags,
+        "sipp": offer.car_sipp,
+    }
+
+
+def agency_payload(offer) -> dict:
+    return {
+        "name": offer.agency_name,
+        "code": offer.agency_code,
+        "logo": offer.agency_logo,
+        "rating": float(offer.agency_rating) if offer.agency_rating else 0,
+    }
+
+
+def provider_payload(offer) -> dict:
+    return {
+        "name": offer.provider_name,
+        "logo": offer.provider_logo,
+    }
+
+
+def price_payload(offer) -> dict:
+    return {
+        "price": float(offer.price) if offer.price is not None else None,
+        "pickup_location": offer.pickup_location or '',
+        "latitude": float(offer.latitude) if offer.latitude else None,
+        "longitude": float(offer.longitude) if offer.longitude else None,
+        "fuel_policy": offer.fuel_policy,
+        "free_cancellation": offer.free_cancellation,
+        "unlimited_mileage": offer.unlimited_mileage,
+    }
+
+
+def offer_payload(offer) -> dict:
+    """Response dict for one car_offers row, the shape of a /cars result."""
+    return {
+        "car": car_payload(offer),
+        "agency": agency_payload(offer),
+        "provider": provider_payload(offer),
+        **price_payload(offer),
+    }
+
+
+def _fragment(kind: str, key: int, offer, payload) -> bytes:
+    cache = _fragments[kind]
+    fragment = cache.get(key)
+    if fragment is None:
+        fragment = orjson.dumps(payload(offer))
+        with _lock:
+            if len(cache) >= MAX_FRAGMENTS:
+                cache.clear()
+            cache[key] = fragment
+    return fragment
+
+
+def clear_fragments():
+    with _lock:
+        for cache in _fragments.values():
+            cache.clear()
+
+
+# Rows may be updated in place by a sync, so fragments live for one inventory version
+on_inventory_change(lambda version: clear_fragments())
+
+
+def encode_offer(offer, distance_km: float | None = None) -> bytes:
+    """One car_offers row as JSON, built from the cached car/agency/provider fragments."""
+    extra = price_payload(offer)
+    if distance_km is not None:
+        extra["distance_km"] = round(distance_km, 3)
+    return b"".join((
+        b'{"car":', _fragment("car", offer.car_id, offer, car_payload),
+        b',"agency":', _fragment("agency", offer.agency_id, offer, agency_payload),
+        b',"provider":', _fragment("provider", offer.provider_id, offer, provider_payload),
+        b",", orjson.dumps(extra)[1:],
+    ))
+
+
+def encode_car_offer(offer) -> bytes:
+    """One car_offers row as JSON without its car: agency, provider and price fields."""
+    return b"".join((
+        b'{"agency":', _fragment("agency", offer.agency_id, offer, agency_payload),
+        b',"provider":', _fragment("provider", offer.provider_id, offer, provider_payload),
+        b",", orjson.dumps(price_payload(offer))[1:],
+    ))
+
+
+def encode_car_offers(offers: list) -> bytes:
+    """A car and all of its offers (car_offers rows of one car_id) as {"car": ..., "offers": [...]}."""
+    return b"".join((
+        b'{"car":', _fragment("car", offers[0].car_id, offers[0], car_payload),
+        b',"offers":[', b",".join(encode_car_offer(offer) for offer in offers), b"]}",
+    ))
+
+
+def add_group(fragment: bytes, offer_count: int, offers: list[bytes] | None = None) -> bytes:
+    """Append a group's offer_count (and its encoded cheapest offers, if given) to an encoded offer."""
+    extra = b',"offer_count":' + orjson.dumps(offer_count)
+    if offers is not None:
+        extra += b',"offers":[' + b",".join(offers) + b"]"
+    return fragment[:-1] + extra + b"}"
+
+
+def add_distance(fragment: bytes, distance_km: float) -> bytes:
+    """Append a distance_km field to an encoded offer."""
+    return fragment[:-1] + b',"distance_km":' + orjson.dumps(round(distance_km, 3)) + b"}"
+
+
+def encode_page(meta: dict, results: list[bytes]) -> bytes:
+    """The /cars envelope (`meta` fields, then `results`) around encoded offers."""
+    return orjson.dumps(meta)[:-1] + b',"results":[' + b",".join(results) + b"]}"
+
+
+def json_response(body: bytes, **kwargs) -> Response:
+    return Response(content=body, media_type="application/json", **kwargs)
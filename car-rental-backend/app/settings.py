@@ -0,0 +1,84 @@
+"""
+Process settings read from the environment.
+
+A `.env` file (ENV_FILE, default car-rental-backend/.env) is loaded by
+the first settings read, without overriding variables that are already
+set (Render injects them directly). Every module's `*_settings()` calls
+`load_env()` first, so values in the file apply even to what is built at
+import (the response caches, the slow-query log, the CORS origins);
+importing the app reads that file but creates no engine and opens no
+connection.
+
+Settings: DATABASE_URL (required), CORS_ORIGINS, STARTUP_WARMUP
+(background | blocking), DB_POOL_PREWARM (connections opened per pool
+during warm-up, default DB_POOL_SIZE), INVENTORY_POLL_SECONDS (how often
+workers check the database for a new inventory version, 0 to never),
+OFFER_SNAPSHOT_DIR (directory of the shared offer snapshot, unset to build
+the index from the database in every worker), OFFER_SNAPSHOT_POLL_SECONDS
+(how often workers look for a newer snapshot) and ADMIN_TOKEN (required by
+the /admin endpoints, which are disabled without it).
+"""
+import os
+import threading
+
+from dotenv import load_dotenv
+
+DEFAULT_ENV_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
+
+DEFAULT_CORS_ORIGINS = [
+    "http://localhost:3000",
+    "http://127.0.0.1:3000",
+    "https://lascade-machine-test.vercel.app",
+]
+
+_lock = threading.Lock()
+_env_loaded = False
+
+
+def load_env():
+    """Load the .env file once; variables already in the environment win."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _lock:
+        if not _env_loaded:
+            load_dotenv(os.getenv("ENV_FILE") or DEFAULT_ENV_FILE)
+            _env_loaded = True
+
+
+def database_url() -> str:
+    load_env()
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise RuntimeError("DATABASE_URL is not set (environment or .env)")
+    return url
+
+
+def cors_origins() -> list[str]:
+    load_env()
+    value = os.getenv("CORS_ORIGINS")
+    if not value:
+        return DEFAULT_CORS_ORIGINS
+    return [origin.strip() for origin in value.split(",")]
+
+
+def admin_token() -> str | None:
+    load_env()
+    return os.getenv("ADMIN_TOKEN") or None
+
+
+def startup_settings() -> dict:
+    load_env()
+    return {
+        "warmup": os.getenv("STARTUP_WARMUP", "background").lower(),
+        "pool_prewarm": int(os.getenv("DB_POOL_PREWARM", os.getenv("DB_POOL_SIZE", "5"))),
+        "inventory_poll_seconds": float(os.getenv("INVENTORY_POLL_SECONDS", "5")),
+    }
+
+
+def snapshot_settings() -> dict:
+    load_env()
+    return {
+        "dir": os.getenv("OFFER_SNAPSHOT_DIR") or None,
+        "poll_seconds": float(os.getenv("OFFER_SNAPSHOT_POLL_SECONDS", "2")),
+    }
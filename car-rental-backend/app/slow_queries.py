@@ -0,0 +1,174 @@
+"""
+Opt-in slow-query log.
+
+When SLOW_QUERY_LOG_ENABLED is set, every statement slower than
+SLOW_QUERY_THRESHOLD_MS is recorded with its bound parameters and the
+route / query string of the request that issued it. SELECTs that make
+it into the top-N slowest also get their plan captured on the same
+connection: EXPLAIN QUERY PLAN on SQLite, EXPLAIN on Postgres, or
+EXPLAIN (ANALYZE, BUFFERS) for a SLOW_QUERY_ANALYZE_SAMPLE_RATE share of
+them (ANALYZE runs the query a second time).
+
+The top-N slowest and the N most recent slow statements are served by
+/admin/slow-queries.
+
+Settings: SLOW_QUERY_LOG_ENABLED (false), SLOW_QUERY_THRESHOLD_MS (100),
+SLOW_QUERY_TOP_N (50), SLOW_QUERY_ANALYZE_SAMPLE_RATE (0).
+"""
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+
+from app.logging_config import request_id_var
+from app.metrics import current_request
+from app.settings import load_env
+
+logger = logging.getLogger(__name__)
+
+MAX_PARAM_LENGTH = 2000
+
+
+def slow_query_settings() -> dict:
+    load_env()
+    return {
+        "enabled": os.getenv("SLOW_QUERY_LOG_ENABLED", "false").lower() in ("1", "true", "yes"),
+        "threshold_ms": float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100")),
+        "top_n": int(os.getenv("SLOW_QUERY_TOP_N", "50")),
+        "analyze_sample_rate": float(os.getenv("SLOW_QUERY_ANALYZE_SAMPLE_RATE", "0")),
+    }
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, top_n: int, analyze_sample_rate: float = 0.0, enabled: bool = True):
+        self.enabled = enabled
+        self.threshold = threshold_ms / 1000
+        self.top_n = top_n
+        self.analyze_sample_rate = analyze_sample_rate
+        self._lock = threading.Lock()
+        self._top = []  # min-heap of (elapsed, seq, entry)
+        self._recent = deque(maxlen=top_n)
+        self._seq = itertools.count()
+        self.slow_count = 0
+
+    def qualifies_for_top(self, elapsed: float) -> bool:
+        """Whether a statement taking `elapsed` seconds would enter the top-N (kept in ms)."""
+        with self._lock:
+            return len(self._top) < self.top_n or elapsed * 1000 > self._top[0][0]
+
+    def record(self, entry: dict):
+        with self._lock:
+            self.slow_count += 1
+            self._recent.append(entry)
+            item = (entry["elapsed_ms"], next(self._seq), entry)
+            if len(self._top) < self.top_n:
+                heapq.heappush(self._top, item)
+            elif item[0] > self._top[0][0]:
+                heapq.heapreplace(self._top, item)
+
+    def clear(self):
+        with self._lock:
+            self._top.clear()
+            self._recent.clear()
+            self.slow_count = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "settings": {
+                    "enabled": self.enabled,
+                    "threshold_ms": self.threshold * 1000,
+                    "top_n": self.top_n,
+                    "analyze_sample_rate": self.analyze_sample_rate,
+                },
+                "slow_count": self.slow_count,
+                "slowest": [entry for _, _, entry in sorted(self._top, reverse=True)],
+                "recent": list(reversed(self._recent)),
+            }
+
+
+slow_query_log = SlowQueryLog(**slow_query_settings())
+
+
+def _format_params(parameters) -> str:
+    text = repr(parameters)
+    return text if len(text) <= MAX_PARAM_LENGTH else text[:MAX_PARAM_LENGTH] + "..."
+
+
+def _explain(conn, statement: str, parameters, analyze: bool) -> list[str]:
+    """Plan for `statement`, run on the connection that just executed it."""
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        prefix, analyze = "EXPLAIN QUERY PLAN ", False
+    elif dialect == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+    else:
+        return []
+
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    if dialect == "sqlite":
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+
+def install_slow_query_log(sync_engine, log: SlowQueryLog = slow_query_log):
+    """Watch statements on `sync_engine` (async_engine.sync_engine for async engines). No-op unless enabled."""
+    if not log.enabled:
+        return
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_start", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed < log.threshold:
+            return
+
+        request = current_request()
+        scope = request.scope if request is not None else {}
+        entry = {
+            "at": time.time(),
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "statement": statement,
+            "parameters": _format_params(parameters),
+            "route": request.route if request is not None else None,
+            "path": scope.get("path"),
+            "query_string": scope.get("query_string", b"").decode("latin-1"),
+            "request_id": request_id_var.get(),
+            "plan": None,
+            "analyzed": False,
+        }
+
+        is_select = statement.lstrip()[:10].split(None, 1)[0].lower() in ("select", "with")
+        if is_select and not executemany and log.qualifies_for_top(elapsed):
+            analyze = random.random() < log.analyze_sample_rate
+            try:
+                entry["plan"] = _explain(conn, statement, parameters, analyze)
+                entry["analyzed"] = analyze and conn.dialect.name == "postgresql"
+            except Exception as e:
+                entry["plan"] = [f"EXPLAIN failed: {e}"]
+
+        log.record(entry)
+        logger.warning("slow query", extra={
+            "elapsed_ms": entry["elapsed_ms"],
+            "route": entry["route"],
+            "query_string": entry["query_string"],
+            "statement": statement[:500],
+        })
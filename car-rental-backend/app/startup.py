@@ -0,0 +1,195 @@
+"""
+Startup warm-up and readiness.
+
+Importing app.main creates no engine and opens no connection. The
+lifespan handler runs `warm_up()`: it opens DB_POOL_PREWARM connections
+on each pool and builds the inventory and location suggest indexes, the
+work the first requests would otherwise pay for. With STARTUP_WARMUP=
+background (the default) it runs while the server already accepts
+requests, which are served from the database until the indexes are in,
+and /health/ready answers 503 until it has finished, so traffic is only
+routed to warm workers. STARTUP_WARMUP=blocking finishes it before the
+server starts accepting requests.
+
+`watch_inventory()` then polls the inventory version stored in the
+database and, when another process (ingest, sync, another worker's admin
+sync) has committed a new one, switches to it, which rebuilds the indexes
+and clears the derived caches. With OFFER_SNAPSHOT_DIR set,
+`watch_snapshot()` also polls the published offer snapshot and swaps the
+index over to a newer one (the snapshot is published just after the
+version is committed).
+"""
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+
+from app.async_database import get_async_engine
+from app.database import get_engine
+from app.services.inventory_index import get_index, index_enabled, load_index
+from app.services.inventory_state import inventory_version, refresh_inventory_version, reload_inventory
+from app.services.location_suggest import load_suggest_index
+from app.services.offer_snapshot import open_published, published_version
+
+logger = logging.getLogger(__name__)
+
+_state = {
+    "ready": False,
+    "import_seconds": None,
+    "warmup_seconds": None,
+    "steps": {},
+    "errors": [],
+}
+
+
+def record_import(seconds: float):
+    _state["import_seconds"] = round(seconds, 4)
+
+
+def is_ready() -> bool:
+    return _state["ready"]
+
+
+def readiness() -> dict:
+    return {
+        "ready": _state["ready"],
+        "import_seconds": _state["import_seconds"],
+        "warmup_seconds": _state["warmup_seconds"],
+        "steps": dict(_state["steps"]),
+        "errors": list(_state["errors"]),
+    }
+
+
+def startup_timings() -> dict:
+    """Seconds per startup phase, for /metrics."""
+    timings = {f"warmup_{step}": seconds for step, seconds in _state["steps"].items()}
+    if _state["import_seconds"] is not None:
+        timings["import"] = _state["import_seconds"]
+    if _state["warmup_seconds"] is not None:
+        timings["warmup"] = _state["warmup_seconds"]
+    return timings
+
+
+def _pool_connections(pool, connections: int) -> int:
+    """At most the pool's steady size (in-memory SQLite pools have one connection)."""
+    size = pool.size() if hasattr(pool, "size") else 1
+    return min(connections, size)
+
+
+async def _prewarm_async_pool(connections: int):
+    engine = get_async_engine()
+    connections = _pool_connections(engine.pool, connections)
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = await engine.connect()
+            opened.append(conn)
+            await conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            await conn.close()
+
+
+def _prewarm_sync_pool(connections: int):
+    engine = get_engine()
+    connections = _pool_connections(engine.pool, connections)
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+
+
+def _load_inventory_index():
+    index = load_index()
+    logger.info("inventory index loaded", extra={"offers": index.size, "snapshot_version": index.snapshot_version})
+
+
+def _load_location_suggestions():
+    index = load_suggest_index()
+    logger.info("location suggest index loaded", extra={"suggestions": len(index.suggestions)})
+
+
+async def warm_up(pool_prewarm: int):
+    """Open pool connections and build the in-memory indexes, then mark the process ready."""
+    started = time.perf_counter()
+    # The version the indexes built below reflect (at least)
+    steps = [("inventory_version", lambda: asyncio.to_thread(refresh_inventory_version, False))]
+    if pool_prewarm > 0:
+        steps.append(("async_pool", lambda: _prewarm_async_pool(pool_prewarm)))
+        steps.append(("sync_pool", lambda: asyncio.to_thread(_prewarm_sync_pool, pool_prewarm)))
+    if index_enabled():
+        steps.append(("inventory_index", lambda: asyncio.to_thread(_load_inventory_index)))
+    else:
+        logger.info("inventory index disabled, /cars will query the database")
+    steps.append(("location_suggest", lambda: asyncio.to_thread(_load_location_suggestions)))
+
+    for name, step in steps:
+        step_started = time.perf_counter()
+        try:
+            await step()
+        except Exception:
+            # Requests fall back to the database (and retry the suggest index on first use)
+            logger.exception("warm-up step failed", extra={"step": name})
+            _state["errors"].append(name)
+        _state["steps"][name] = round(time.perf_counter() - step_started, 4)
+
+    _state["warmup_seconds"] = round(time.perf_counter() - started, 4)
+    _state["ready"] = True
+    logger.info("warm-up finished", extra={"seconds": _state["warmup_seconds"], "steps": _state["steps"]})
+
+
+async def watch_inventory(poll_seconds: float):
+    """Switch to each inventory version committed after the one this process serves."""
+    while True:
+        await asyncio.sleep(poll_seconds)
+        if not _state["ready"]:
+            continue
+        try:
+            if await asyncio.to_thread(refresh_inventory_version):
+                logger.info("inventory version changed", extra={"version": inventory_version()})
+        except Exception:
+            logger.exception("inventory version check failed")
+
+
+async def watch_snapshot(directory: str, poll_seconds: float):
+    """
+    Swap to each offer snapshot published in `directory` after the one
+    loaded. A version that can't be loaded (corrupt, truncated) is logged
+    and skipped until a newer one is published, instead of reloading on
+    every poll.
+    """
+    failed = None
+    while True:
+        await asyncio.sleep(poll_seconds)
+        index = get_index()
+        if index is None:
+            continue
+        try:
+            version = await asyncio.to_thread(published_version, directory)
+            if version is None or version <= index.snapshot_version or version == failed:
+                continue
+            try:
+                # Map it before dropping everything derived from the loaded one
+                await asyncio.to_thread(open_published, directory)
+            except Exception:
+                failed = version
+                logger.exception("offer snapshot can't be mapped, skipping it", extra={"version": version})
+                continue
+
+            logger.info("new offer snapshot published", extra={
+                "version": version, "loaded_version": index.snapshot_version,
+            })
+            # The reload callbacks map it and drop what was derived from the old one
+            await asyncio.to_thread(reload_inventory)
+            index = get_index()
+            if index is None or index.snapshot_version < version:
+                failed = version
+                logger.error("offer snapshot failed to load, skipping it", extra={"version": version})
+        except Exception:
+            logger.exception("offer snapshot check failed", extra={"directory": directory})
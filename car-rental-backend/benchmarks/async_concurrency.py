@@ -0,0 +1,138 @@
+"""
+Concurrency benchmark: blocking sync sessions vs the async session layer.
+
+Runs the same /cars page query (the join, a COUNT(*) and one page) through
+two handlers mounted on one ASGI app:
+
+  blocking  an `async def` handler calling the sync SessionLocal, which is
+            what the cars router did before the async session layer
+  async     the same queries through AsyncSession, as the routers do now
+
+Requests are fired with N concurrent clients inside one event loop, the
+same way a single uvicorn worker serves them, and throughput / latency
+are reported for each handler.
+
+A local SQLite file has no network round-trip to overlap, so against it
+the async path mostly shows its thread-hop overhead. Point DATABASE_URL
+at Postgres, or pass --rtt-ms to add a simulated round-trip per query
+(a blocking sleep for the sync driver, an awaited one for the async
+driver), to see the effect of not blocking the event loop.
+
+Usage (from car-rental-backend/):
+    DATABASE_URL=postgresql://... python -m benchmarks.async_concurrency --requests 400 --concurrency 1,8,32
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("INVENTORY_INDEX_ENABLED", "false")
+
+import httpx
+from sqlalchemy import func, select
+
+from app.async_database import AsyncSessionLocal
+from app.database import SessionLocal
+from app.main import app
+from app.models.car import Car
+from app.models.price import CarPrice
+from app.models.agency import Agency
+from app.models.provider import Provider
+
+RTT_SECONDS = 0.0
+
+
+def _page_query():
+    return (
+        select(Car, CarPrice, Agency, Provider)
+        .join(CarPrice, Car.id == CarPrice.car_id)
+        .join(Agency, Agency.id == CarPrice.agency_id)
+        .join(Provider, Provider.id == CarPrice.provider_id)
+        .order_by(CarPrice.price.asc(), CarPrice.id.asc())
+    )
+
+
+@app.get("/_bench/blocking", include_in_schema=False)
+async def blocking_page(page: int = 1, limit: int = 12):
+    """The pre-async pattern: sync session calls inside an async handler."""
+    db = SessionLocal()
+    try:
+        query = _page_query()
+        total = db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+        time.sleep(RTT_SECONDS)
+        rows = db.execute(query.offset((page - 1) * limit).limit(limit)).all()
+        time.sleep(RTT_SECONDS)
+        return {"count": total, "results": len(rows)}
+    finally:
+        db.close()
+
+
+@app.get("/_bench/async", include_in_schema=False)
+async def async_page(page: int = 1, limit: int = 12):
+    """The same queries through the async session layer."""
+    async with AsyncSessionLocal() as db:
+        query = _page_query()
+        total = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+        await asyncio.sleep(RTT_SECONDS)
+        rows = (await db.execute(query.offset((page - 1) * limit).limit(limit))).all()
+        await asyncio.sleep(RTT_SECONDS)
+        return {"count": total, "results": len(rows)}
+
+
+async def run(path: str, total: int, concurrency: int) -> dict:
+    latencies = []
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker():
+            while True:
+                try:
+                    i = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                start = time.perf_counter()
+                response = await client.get(path, params={"page": i % 20 + 1, "limit": 12})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="simulated DB round-trip per query")
+    args = parser.parse_args()
+
+    global RTT_SECONDS
+    RTT_SECONDS = args.rtt_ms / 1000
+
+    print(f"{'handler':<10} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        for name, path in (("blocking", "/_bench/blocking"), ("async", "/_bench/async")):
+            # Warm up connections / statement caches
+            await run(path, min(20, args.requests), concurrency)
+            result = await run(path, args.requests, concurrency)
+            print(
+                f"{name:<10} {concurrency:>5} {result['rps']:>9.1f} "
+                f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,339 @@
+"""
+Load and latency benchmark for the API.
+
+Seeds a database from app/scripts/car-results.json (optionally scaled up
+N times with jittered prices), replays a seeded, realistic query mix and
+reports throughput and p50 / p95 / p99 latency per scenario:
+
+  cars location     /cars?pickup_location=<city> with the default sort
+  cars filters      multi-value car_type / category / fuel / agency filters
+  cars sort         every sort_by value, optionally with a price range
+  cars deep page    pages spread across the whole result set
+  car by id         /cars/{id}
+  filters           /filters, with and without a selection
+  locations         /locations
+
+Requests go through the ASGI app in-process (one event loop, like a single
+uvicorn worker) unless --base-url points at a running server.
+
+Results can be saved as a baseline and later runs compared against it:
+a scenario regresses when its p95 grows, or its throughput drops, by more
+than --threshold (and by at least --min-delta-ms for latency). The exit
+status is 1 on regression. Baselines are machine-specific; keep one per
+machine / database.
+
+Usage (from car-rental-backend/):
+    python -m benchmarks.load --scale 10 --requests 2000 --concurrency 16 --save-baseline
+    python -m benchmarks.load --scale 10 --requests 2000 --concurrency 16
+    python -m benchmarks.load --database-url postgresql://bench@localhost/bench_tmp --seed
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SORTS = ("price_asc", "price_desc", "rating", "name")
+
+# Share of requests per scenario
+MIX = {
+    "cars location": 30,
+    "cars filters": 20,
+    "cars sort": 15,
+    "cars deep page": 10,
+    "car by id": 12,
+    "filters": 8,
+    "locations": 5,
+}
+
+
+def write_scaled_feed(source: str, scale: int, seed: int) -> str:
+    """`scale` copies of the feed's results with prices jittered by up to +-15%."""
+    from app.scripts.ingest import iter_results
+
+    rng = random.Random(seed)
+    fd, path = tempfile.mkstemp(prefix="car-results-x", suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write('{"results": [')
+        first = True
+        for copy in range(scale):
+            for item in iter_results(source):
+                if copy:
+                    for provider in item.get("providers", []):
+                        if provider.get("price") is not None:
+                            provider["price"] = round(provider["price"] * rng.uniform(0.85, 1.15), 2)
+                f.write(("" if first else ",") + json.dumps(item))
+                first = False
+        f.write("]}")
+    return path
+
+
+def seed_database(database_url: str, scale: int, seed: int):
+    from app.database import Base, get_engine
+    from app.scripts.create_tables import create_tables
+    from app.scripts.ingest import DEFAULT_FEED, ingest_feed
+    from app.services.offers import drop_offers
+
+    if not database_url.startswith("sqlite"):
+        # Throwaway server database: start from empty tables (the car_offers
+        # materialized view depends on them, so it goes first)
+        drop_offers(get_engine())
+        Base.metadata.drop_all(bind=get_engine())
+    create_tables()
+
+    feed = DEFAULT_FEED if scale == 1 else write_scaled_feed(DEFAULT_FEED, scale, seed)
+    try:
+        ingest_feed(feed)
+    finally:
+        if feed != DEFAULT_FEED:
+            os.remove(feed)
+
+
+def load_vocabulary() -> dict:
+    """Values to build realistic queries from, read from the seeded database."""
+    from sqlalchemy import func, select
+
+    from app.database import get_engine
+    from app.models.car import Car
+    from app.models.agency import Agency
+    from app.models.price import CarPrice
+
+    with get_engine().connect() as conn:
+        def distinct(column):
+            return [v for (v,) in conn.execute(select(column).distinct()) if v]
+
+        cities = set()
+        for address in distinct(CarPrice.pickup_location):
+            parts = [p.strip() for p in address.split(",")]
+            if len(parts) >= 2 and len(parts[1]) >= 3:
+                cities.add(parts[1])
+
+        return {
+            "cities": sorted(cities),
+            "types": distinct(Car.type),
+            "categories": distinct(Car.category),
+            "fuels": distinct(Car.fuel),
+            "agencies": distinct(Agency.name),
+            "car_ids": [v for (v,) in conn.execute(select(Car.id))],
+            "offers": conn.execute(select(func.count()).select_from(CarPrice)).scalar(),
+            "prices": conn.execute(select(func.min(CarPrice.price), func.max(CarPrice.price))).first(),
+        }
+
+
+def build_requests(vocab: dict, total: int, seed: int) -> list[tuple[str, str, dict]]:
+    """A deterministic list of (scenario, path, params)."""
+    rng = random.Random(seed)
+    scenarios = list(MIX)
+    weights = [MIX[s] for s in scenarios]
+    low, high = vocab["prices"]
+
+    def some(values, most=3):
+        return ",".join(rng.sample(values, rng.randint(1, min(most, len(values)))))
+
+    requests = []
+    for scenario in rng.choices(scenarios, weights, k=total):
+        params = {}
+        if scenario == "cars location":
+            # Skewed towards the first few cities, like real search traffic
+            city = vocab["cities"][min(int(rng.expovariate(0.5)), len(vocab["cities"]) - 1)]
+            params = {"pickup_location": city, "page": rng.choice((1, 1, 1, 2))}
+            path = "/cars/"
+        elif scenario == "cars filters":
+            for param, key in (("car_type", "types"), ("category", "categories"), ("fuel", "fuels"), ("agency", "agencies")):
+                if vocab[key] and rng.random() < 0.5:
+                    params[param] = some(vocab[key])
+            if rng.random() < 0.3:
+                params["free_cancellation"] = "true"
+            path = "/cars/"
+        elif scenario == "cars sort":
+            params = {"sort_by": rng.choice(SORTS), "limit": rng.choice((12, 24, 50))}
+            if rng.random() < 0.5:
+                params["min_price"] = round(rng.uniform(low, (low + high) / 2), 2)
+                params["max_price"] = round(rng.uniform(params["min_price"], high), 2)
+            path = "/cars/"
+        elif scenario == "cars deep page":
+            pages = max(1, vocab["offers"] // 12)
+            params = {"page": rng.randint(max(1, pages // 2), pages), "sort_by": rng.choice(SORTS)}
+            path = "/cars/"
+        elif scenario == "car by id":
+            path = f"/cars/{rng.choice(vocab['car_ids'])}"
+        elif scenario == "filters":
+            if rng.random() < 0.5 and vocab["categories"]:
+                params["category"] = some(vocab["categories"], 2)
+            path = "/filters/"
+        else:
+            path = "/locations/"
+        requests.append((scenario, path, params))
+    return requests
+
+
+async def replay(requests, concurrency: int, base_url: str | None) -> tuple[dict, float]:
+    import httpx
+
+    latencies = {scenario: [] for scenario, _, _ in requests}
+    errors = {scenario: 0 for scenario in latencies}
+    queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+
+    if base_url:
+        client = httpx.AsyncClient(base_url=base_url, timeout=60)
+    else:
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    async with client:
+        async def worker():
+            while True:
+                try:
+                    scenario, path, params = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                start = time.perf_counter()
+                response = await client.get(path, params=params)
+                elapsed = time.perf_counter() - start
+                if response.status_code >= 400:
+                    errors[scenario] += 1
+                latencies[scenario].append(elapsed)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    results = {}
+    for scenario, values in latencies.items():
+        values.sort()
+        cuts = statistics.quantiles(values, n=100, method="inclusive") if len(values) > 1 else values * 99
+        results[scenario] = {
+            "requests": len(values),
+            "errors": errors[scenario],
+            # Share of wall time this scenario used, as requests per second
+            "rps": len(values) / (sum(values) / concurrency) if sum(values) else 0.0,
+            "p50_ms": round(cuts[49] * 1000, 3),
+            "p95_ms": round(cuts[94] * 1000, 3),
+            "p99_ms": round(cuts[98] * 1000, 3),
+        }
+    return results, wall
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list[str]:
+    regressions = []
+    for scenario, base in baseline.get("scenarios", {}).items():
+        current = results.get(scenario)
+        if current is None:
+            continue
+        delta = current["p95_ms"] - base["p95_ms"]
+        if delta > min_delta_ms and current["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{scenario}: p95 {base['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+        if current["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{scenario}: throughput {base['rps']:.1f} -> {current['rps']:.1f} req/s")
+    if "total_rps" in baseline and results["total"]["rps"] < baseline["total_rps"] * (1 - threshold):
+        regressions.append(f"total: throughput {baseline['total_rps']:.1f} -> {results['total']['rps']:.1f} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to a SQLite file in the temp directory")
+    parser.add_argument("--seed", action="store_true", help="(re)seed the database before running")
+    parser.add_argument("--scale", type=int, default=1, help="copies of the bundled feed to ingest")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--no-cache", action="store_true", help="disable the /cars response cache")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.20, help="allowed relative regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore p95 changes smaller than this")
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if database_url is None:
+        path = os.path.join(tempfile.gettempdir(), f"car_rental_bench_x{args.scale}.db")
+        if args.seed and os.path.exists(path):
+            os.remove(path)
+        args.seed = args.seed or not os.path.exists(path)
+        database_url = f"sqlite:///{path}"
+
+    # The app reads its settings when the engines are first created
+    os.environ["DATABASE_URL"] = database_url
+    # Index and pools warm before the first timed request
+    os.environ.setdefault("STARTUP_WARMUP", "blocking")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    if args.no_cache:
+        os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+
+    if args.seed:
+        started = time.perf_counter()
+        seed_database(database_url, args.scale, args.random_seed)
+        print(f"Seeded x{args.scale} in {time.perf_counter() - started:.1f}s")
+
+    vocab = load_vocabulary()
+    print(f"{vocab['offers']} offers, {len(vocab['cities'])} cities, {args.requests} requests, concurrency {args.concurrency}")
+
+    async def run():
+        if args.base_url:
+            return await measure()
+        # Run the app's lifespan (warm-up, index load) like uvicorn would
+        from app.main import app
+        async with app.router.lifespan_context(app):
+            return await measure()
+
+    async def measure():
+        if args.warmup:
+            await replay(build_requests(vocab, args.warmup, args.random_seed + 1), args.concurrency, args.base_url)
+        return await replay(build_requests(vocab, args.requests, args.random_seed), args.concurrency, args.base_url)
+
+    results, wall = asyncio.run(run())
+    results["total"] = {
+        "requests": args.requests,
+        "errors": sum(r["errors"] for r in results.values()),
+        "rps": args.requests / wall,
+    }
+
+    print(f"\n{'scenario':<16} {'n':>6} {'err':>4} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for scenario in MIX:
+        r = results.get(scenario)
+        if r:
+            print(
+                f"{scenario:<16} {r['requests']:>6} {r['errors']:>4} {r['rps']:>9.1f} "
+                f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}"
+            )
+    print(f"{'total':<16} {args.requests:>6} {results['total']['errors']:>4} {results['total']['rps']:>9.1f}")
+
+    report = {
+        "database": database_url.split("://")[0],
+        "scale": args.scale,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "total_rps": round(results["total"]["rps"], 2),
+        "scenarios": {s: r for s, r in results.items() if s != "total"},
+    }
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\nRegressions against {args.baseline} (threshold {args.threshold:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline} (threshold {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
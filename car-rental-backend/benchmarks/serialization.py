@@ -0,0 +1,111 @@
+"""
+Serialization microbenchmark: time to encode one /cars page.
+
+Builds a page of offers from the bundled feed (transient model objects, no
+database) and times three ways of turning it into a response body:
+
+  legacy     per-row dicts, FastAPI's jsonable_encoder and json.dumps,
+             which is what the /cars handler did before the serializer module
+  orjson     the same per-row dicts encoded with orjson
+  fragments  encode_offer() / encode_page(): cached car, agency and provider
+             fragments joined with the per-offer price fields
+
+Usage (from car-rental-backend/):
+    python -m benchmarks.serialization --page-size 50 --repeat 2000
+"""
+import argparse
+import json
+import time
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from app.models.offer import CarOffer
+from app.scripts.ingest import DEFAULT_FEED, iter_results
+from app.services.serializers import encode_offer, encode_page, offer_payload
+
+
+def load_page(size: int) -> list[CarOffer]:
+    """`size` car_offers rows built from the feed."""
+    rows = []
+    # First-seen agency / provider per code / name, as ingest stores them
+    agencies, providers = {}, {}
+    for car_id, item in enumerate(iter_results(DEFAULT_FEED), start=1):
+        agency_data = item.get("agency") or {}
+        agency = agencies.setdefault(agency_data.get("code"), {**agency_data, "id": len(agencies) + 1})
+        car = item.get("car") or {}
+        pickup = item.get("pickup") or {}
+        for pr in item.get("providers", []):
+            provider = providers.setdefault(pr.get("name"), {**pr, "id": len(providers) + 1})
+            rows.append(CarOffer(
+                id=len(rows) + 1,
+                car_id=car_id,
+                **{f"car_{field}": car.get(field) for field in (
+                    "name", "category", "type", "fuel", "transmission", "passengers", "bags", "sipp", "image"
+                )},
+                agency_id=agency["id"],
+                agency_name=agency.get("name"),
+                agency_code=agency.get("code"),
+                agency_logo=agency.get("logo"),
+                agency_rating=agency.get("rating") or 0.0,
+                provider_id=provider["id"],
+                provider_name=provider.get("name"),
+                provider_logo=provider.get("logo"),
+                price=pr.get("price", 0),
+                free_cancellation=pr.get("is_free_cancellation", False),
+                unlimited_mileage=pr.get("unlimited_mileage", False),
+                fuel_policy=pr.get("fuel_policy"),
+                pickup_location=pickup.get("address"),
+                latitude=pickup.get("latitude"),
+                longitude=pickup.get("longitude"),
+            ))
+            if len(rows) == size:
+                return rows
+    return rows
+
+
+META = {"page": 1, "limit": 50, "count": 928, "total_pages": 19, "next_cursor": None}
+
+
+def legacy(rows) -> bytes:
+    payload = {**META, "results": [offer_payload(row) for row in rows]}
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def orjson_dicts(rows) -> bytes:
+    return orjson.dumps({**META, "results": [offer_payload(row) for row in rows]})
+
+
+def fragments(rows) -> bytes:
+    return encode_page(META, [encode_offer(row) for row in rows])
+
+
+def timed(fn, rows, repeat: int) -> float:
+    fn(rows)  # warm-up (fills the fragment cache)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(rows)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = load_page(args.page_size)
+    assert json.loads(legacy(rows)) == json.loads(fragments(rows)) == json.loads(orjson_dicts(rows))
+
+    print(f"{len(rows)}-result page, {args.repeat} iterations")
+    baseline = None
+    for name, fn in (("legacy", legacy), ("orjson", orjson_dicts), ("fragments", fragments)):
+        seconds = timed(fn, rows, args.repeat)
+        baseline = baseline or seconds
+        print(f"{name:>10}  {seconds * 1e6:9.1f} us/page  {baseline / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
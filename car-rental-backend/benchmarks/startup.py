@@ -0,0 +1,98 @@
+"""
+Worker startup benchmark: how long a fresh process takes to serve.
+
+Each run starts a new Python process that imports app.main, runs the
+lifespan (warm-up in the background or blocking, per --warmup), and
+reports:
+
+  import          `import app.main`
+  startup         lifespan startup, i.e. until the server accepts requests
+  first request   the first /cars call, as soon as requests are accepted
+  ready           until /health/ready answers 200 (warm-up finished)
+  warm request    a /cars call once ready
+
+The medians over --runs processes are printed. Requests go through the
+ASGI app in-process; the database must already be seeded.
+
+Usage (from car-rental-backend/):
+    DATABASE_URL=sqlite:////tmp/cars.db python -m benchmarks.startup --runs 5
+    DATABASE_URL=sqlite:////tmp/cars.db python -m benchmarks.startup --warmup blocking
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PHASES = ("import", "startup", "first request", "ready", "warm request")
+
+
+async def _measure() -> dict:
+    import httpx
+
+    timings = {}
+    started = time.perf_counter()
+    from app.main import app
+    timings["import"] = time.perf_counter() - started
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            accepting = time.perf_counter()
+            timings["startup"] = accepting - started
+
+            start = time.perf_counter()
+            response = await client.get("/cars/", params={"sort_by": "price_asc"})
+            response.raise_for_status()
+            timings["first request"] = time.perf_counter() - start
+
+            while (await client.get("/health/ready")).status_code != 200:
+                await asyncio.sleep(0.005)
+            timings["ready"] = time.perf_counter() - started
+
+            start = time.perf_counter()
+            response = await client.get("/cars/", params={"sort_by": "price_desc"})
+            response.raise_for_status()
+            timings["warm request"] = time.perf_counter() - start
+    return timings
+
+
+def child():
+    print(json.dumps(asyncio.run(_measure())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", choices=("background", "blocking"), default="background")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+    if not os.getenv("DATABASE_URL"):
+        sys.exit("DATABASE_URL must point at a seeded database")
+
+    env = {**os.environ, "STARTUP_WARMUP": args.warmup, "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING")}
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--child"],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{args.runs} runs, STARTUP_WARMUP={args.warmup}")
+    print(f"{'phase':<14} {'median ms':>10} {'max ms':>10}")
+    for phase in PHASES:
+        values = [run[phase] * 1000 for run in runs]
+        print(f"{phase:<14} {statistics.median(values):>10.1f} {max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
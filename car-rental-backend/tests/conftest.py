@@ -0,0 +1,97 @@
+"""
+Shared fixtures: a SQLite database seeded from the bundled feed once per
+session, the app served over it, and fresh databases for tests that write.
+
+The settings below are read lazily (see app/settings.py), so they only
+need to be in the environment before the first engine is created.
+"""
+import os
+import tempfile
+
+_session_dir = tempfile.mkdtemp(prefix="car-rental-tests-")
+os.environ.update({
+    "ENV_FILE": os.devnull,
+    "DATABASE_URL": f"sqlite:///{os.path.join(_session_dir, 'seeded.db')}",
+    "STARTUP_WARMUP": "blocking",
+    "LOG_LEVEL": "WARNING",
+    # Every request must reach the index or the database
+    "RESPONSE_CACHE_ENABLED": "false",
+    "INVENTORY_INDEX_ENABLED": "true",
+})
+os.environ.pop("OFFER_SNAPSHOT_DIR", None)
+os.environ.pop("ADMIN_TOKEN", None)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import app.database
+from app.services import inventory_state
+from app.scripts.create_tables import create_tables
+from app.scripts.ingest import ingest_feed
+
+
+@pytest.fixture(scope="session")
+def seeded():
+    """The session database, with the bundled feed ingested."""
+    create_tables()
+    ingest_feed()
+    return app.database.get_engine()
+
+
+@pytest.fixture(scope="session")
+def client(seeded):
+    from app.main import app as application
+
+    with TestClient(application) as client:
+        yield client
+
+
+@pytest.fixture
+def null_price(client, seeded):
+    """
+    Clear the price of one cheap offer in the session database (and reload
+    the index and caches through a version bump), restoring it afterwards.
+    Returns the offer's id.
+    """
+    with seeded.begin() as conn:
+        offer_id, price = conn.execute(text(
+            "SELECT id, price FROM car_offers WHERE price < 8000 ORDER BY id LIMIT 1"
+        )).one()
+        for table in ("car_prices", "car_offers"):
+            conn.execute(text(f"UPDATE {table} SET price = NULL WHERE id = :id"), {"id": offer_id})
+        version = inventory_state.record_inventory_change(conn)
+    inventory_state.bump_inventory_version(version)
+    yield offer_id
+    with seeded.begin() as conn:
+        for table in ("car_prices", "car_offers"):
+            conn.execute(text(f"UPDATE {table} SET price = :price WHERE id = :id"), {"id": offer_id, "price": price})
+        version = inventory_state.record_inventory_change(conn)
+    inventory_state.bump_inventory_version(version)
+
+
+@pytest.fixture
+def fresh_database(tmp_path, monkeypatch):
+    """
+    Returns a function that points get_engine() at a new, empty SQLite file
+    `name` in the test's directory, creating the tables when create=True.
+    """
+    # Writes here must not reload the session app's indexes and caches, nor change its version
+    monkeypatch.setattr(inventory_state, "_listeners", [])
+    monkeypatch.setattr(inventory_state, "_version", inventory_state._version)
+    monkeypatch.setattr(inventory_state, "_updated_at", inventory_state._updated_at)
+    engines = []
+
+    def make(create: bool = True, name: str = "test.db"):
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / name}")
+        monkeypatch.setattr(app.database, "_engine", None)
+        monkeypatch.setitem(app.database.SessionLocal.kw, "bind", None)
+        engine = app.database.get_engine()
+        engines.append(engine)
+        if create:
+            create_tables()
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.dispose()
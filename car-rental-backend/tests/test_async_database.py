@@ -0,0 +1,47 @@
+"""The async engine and session used by the request handlers."""
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from app.async_database import AsyncSessionLocal, get_async_engine, to_async_url
+from app.models.offer import CarOffer
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("postgresql://u:p@db:5432/cars", "postgresql+asyncpg://u:p@db:5432/cars"),
+    ("postgres://u:p@db/cars", "postgresql+asyncpg://u:p@db/cars"),
+    ("postgresql+psycopg2://u:p@db/cars?sslmode=require", "postgresql+asyncpg://u:p@db/cars?ssl=require"),
+    ("sqlite:///./cars.db", "sqlite+aiosqlite:///./cars.db"),
+    ("mysql://u:p@db/cars", "mysql://u:p@db/cars"),
+])
+def test_to_async_url(url, expected):
+    assert to_async_url(url) == expected
+
+
+def test_async_engine_follows_database_url(seeded):
+    engine = get_async_engine()
+    assert engine.dialect.driver == "aiosqlite"
+    assert engine.url.database == seeded.url.database
+
+
+def test_concurrent_sessions(seeded):
+    with seeded.connect() as conn:
+        expected = conn.execute(select(func.count()).select_from(CarOffer)).scalar_one()
+
+    async def count() -> int:
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(select(func.count()).select_from(CarOffer))).scalar_one()
+
+    async def gather():
+        return await asyncio.gather(*(count() for _ in range(8)))
+
+    assert asyncio.run(gather()) == [expected] * 8
+
+
+def test_locations(client):
+    response = client.get("/locations/")
+    assert response.status_code == 200
+    names = [location["name"] for location in response.json()]
+    assert names and names == sorted(set(names))
+    assert "Las Vegas, Nevada" in names
@@ -0,0 +1,56 @@
+"""GET / POST /cars/batch: several cars and their offers in one request."""
+import pytest
+from sqlalchemy import func, select
+
+from app.models.offer import CarOffer
+from app.routers.cars import MAX_BATCH_IDS
+
+
+@pytest.fixture(scope="module")
+def offer_counts(seeded) -> dict:
+    """{car_id: number of offers} for every car in the session database."""
+    with seeded.connect() as conn:
+        return dict(conn.execute(select(CarOffer.car_id, func.count()).group_by(CarOffer.car_id)).all())
+
+
+def test_batch(client, offer_counts):
+    # A car with several offers, one with a single offer, an unknown id, and a repeat
+    several = max(offer_counts, key=offer_counts.get)
+    single = next(car_id for car_id, count in offer_counts.items() if count == 1)
+    unknown = max(offer_counts) + 1
+
+    response = client.get("/cars/batch", params={"ids": f"{several},{unknown}, {single},{several}"})
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body["cars"]) == [str(several), str(single)]
+    assert body["missing"] == [unknown]
+
+    for car_id in (several, single):
+        entry = body["cars"][str(car_id)]
+        assert entry["car"]["id"] == car_id
+        assert len(entry["offers"]) == offer_counts[car_id]
+        prices = [offer["price"] for offer in entry["offers"]]
+        assert prices == sorted(prices)
+
+    posted = client.post("/cars/batch", json={"ids": [several, unknown, single, several]})
+    assert posted.json() == body
+
+
+def test_batch_limit(client, offer_counts):
+    ids = list(range(1, MAX_BATCH_IDS + 1))
+    assert client.post("/cars/batch", json={"ids": ids}).status_code == 200
+    # Repeats don't count towards the limit
+    assert client.post("/cars/batch", json={"ids": ids + ids[:10]}).status_code == 200
+    too_many = ids + [MAX_BATCH_IDS + 1]
+    assert client.post("/cars/batch", json={"ids": too_many}).status_code == 400
+    assert client.get("/cars/batch", params={"ids": ",".join(map(str, too_many))}).status_code == 400
+
+
+@pytest.mark.parametrize("ids", ["", " , ", "1,two", "1.5"])
+def test_batch_rejects(client, ids):
+    assert client.get("/cars/batch", params={"ids": ids}).status_code == 400
+
+
+def test_batch_rejects_bad_bodies(client):
+    assert client.post("/cars/batch", json={"ids": []}).status_code == 400
+    assert client.post("/cars/batch", json={"ids": ["x"]}).status_code == 422
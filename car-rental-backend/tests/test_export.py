@@ -0,0 +1,63 @@
+"""GET /cars/export: every matching offer, streamed as CSV or NDJSON."""
+import csv
+import io
+import json
+
+import pytest
+
+from app.services import export, inventory_index
+from app.services.export import CSV_COLUMNS
+
+FILTERS = {"car_type": "SUV", "max_price": 20000}
+
+
+def _count(client, params: dict) -> int:
+    return client.get("/cars/", params={**params, "limit": 1}).json()["count"]
+
+
+def test_csv(client, monkeypatch):
+    # Several small batches, so several chunks
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 7)
+    response = client.get("/cars/export", params={**FILTERS, "format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="cars.csv"'
+
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header == CSV_COLUMNS
+    assert len(rows) == _count(client, FILTERS) > 7
+    prices = [float(row[header.index("price")]) for row in rows]
+    assert prices == sorted(prices) and max(prices) <= 20000
+
+
+def test_csv_with_no_rows_has_a_header(client):
+    response = client.get("/cars/export", params={"format": "csv", "pickup_location": "nowhere-at-all"})
+    assert response.text.splitlines() == [",".join(CSV_COLUMNS)]
+
+
+def test_ndjson_matches_cars(client, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 7)
+    response = client.get("/cars/export", params=FILTERS)
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == _count(client, FILTERS)
+
+    monkeypatch.setattr(inventory_index, "_index", None)
+    first_page = client.get("/cars/", params={**FILTERS, "limit": 50}).json()["results"]
+    assert lines[:50] == first_page
+
+
+def test_near(client):
+    response = client.get("/cars/export", params={"format": "csv", "near": "36.17,-115.14", "radius_km": 15})
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header == CSV_COLUMNS + ["distance_km"]
+    assert rows and all(float(row[-1]) <= 15 for row in rows)
+
+
+@pytest.mark.parametrize("params, status", [
+    ({"sort_by": "distance", "near": "36.17,-115.14"}, 400),
+    ({"near": "nowhere"}, 400),
+    ({"format": "xml"}, 422),
+])
+def test_export_rejects(client, params, status):
+    assert client.get("/cars/export", params=params).status_code == status
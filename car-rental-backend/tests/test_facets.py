@@ -0,0 +1,52 @@
+"""GET /filters: the facet payload and live facet counts, from the index and from SQL."""
+import pytest
+
+from app.services import facets, inventory_index
+
+
+def _both(client, monkeypatch, params: dict) -> tuple:
+    """The /filters body from the index and from SQL, each with a freshly built payload."""
+    assert inventory_index.get_index() is not None
+    bodies = []
+    for index in (inventory_index.get_index(), None):
+        with monkeypatch.context() as m:
+            m.setattr(inventory_index, "_index", index)
+            m.setattr(facets, "_cached", {"version": None, "payload": None})
+            response = client.get("/filters/", params=params)
+        assert response.status_code == 200
+        bodies.append(response.json())
+    return tuple(bodies)
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"car_type": "SUV"},
+    {"min_price": 7000, "max_price": 20000, "pickup_location": "Las Vegas airport"},
+    {"fuel": "Diesel,Petrol", "free_cancellation": "true", "max_price": 15000},
+])
+def test_index_matches_sql(client, monkeypatch, params):
+    from_index, from_sql = _both(client, monkeypatch, params)
+    assert from_index == from_sql
+
+
+def test_price_range_skips_null_prices(client, monkeypatch, null_price):
+    from_index, from_sql = _both(client, monkeypatch, {"max_price": 9000})
+    assert from_index == from_sql
+    assert from_index["price_range"]["min"] > 0
+
+
+def test_counts_ignore_their_own_selection(client):
+    everything = client.get("/filters/").json()["facet_counts"]
+    selected = client.get("/filters/", params={"car_type": "SUV"}).json()["facet_counts"]
+    # Selecting a type leaves the type counts alone and narrows every other facet
+    assert selected["car_types"] == everything["car_types"]
+    assert sum(selected["categories"].values()) == everything["car_types"]["SUV"]
+
+
+def test_payload_is_built_once_per_version(client, monkeypatch):
+    monkeypatch.setattr(facets, "_cached", {"version": None, "payload": None})
+    first = client.get("/filters/").json()
+    monkeypatch.setattr(inventory_index, "_index", None)
+    monkeypatch.setattr(facets, "_payload_from_db", None)
+    # Served from the cached payload: neither the index nor the database is read
+    assert client.get("/filters/").json() == first
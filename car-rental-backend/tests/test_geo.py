@@ -0,0 +1,86 @@
+"""Radius search: geometry helpers, the grid index, and near= on /cars."""
+import copy
+import json
+import random
+
+import pytest
+from sqlalchemy import select
+
+from app.models.offer import CarOffer
+from app.scripts.ingest import DEFAULT_FEED, ingest_feed, iter_results
+from app.services.geo_index import GridIndex, bounding_box, haversine_km, longitude_ranges, parse_near
+from app.services.offer_query import filter_criteria, search_filters
+
+
+def test_haversine():
+    assert haversine_km(36.08, -115.15, 36.08, -115.15) == 0
+    # Las Vegas to Los Angeles airports
+    assert haversine_km(36.08, -115.15, 33.94, -118.41) == pytest.approx(380, abs=5)
+    assert haversine_km(0, 179.9, 0, -179.9) == pytest.approx(22.2, abs=0.1)
+
+
+@pytest.mark.parametrize("near, point", [("36.1,-115.2", (36.1, -115.2)), (" -90 , 180 ", (-90, 180))])
+def test_parse_near(near, point):
+    assert parse_near(near) == point
+
+
+@pytest.mark.parametrize("near", ["36.1", "36.1,-115.2,3", "north,west", "91,0", "0,-181"])
+def test_parse_near_rejects(near):
+    with pytest.raises(ValueError):
+        parse_near(near)
+
+
+def test_bounding_box_wraps_across_the_antimeridian():
+    min_lat, max_lat, min_lon, max_lon = bounding_box(10, 179.9, 50)
+    assert min_lat < 10 < max_lat
+    assert min_lon > max_lon
+    assert longitude_ranges(min_lon, max_lon) == [(min_lon, 180.0), (-180.0, max_lon)]
+    assert bounding_box(89.9, 0, 50)[2:] == (-180.0, 180.0)
+
+
+def test_grid_index_matches_brute_force():
+    rng = random.Random(7)
+    points = [(pos, rng.uniform(-89, 89), rng.uniform(-180, 180)) for pos in range(3000)]
+    # Clusters around the antimeridian and a pole
+    points += [(3000 + i, rng.uniform(-1, 1), rng.choice((179.5, -179.5)) + rng.uniform(-0.5, 0.5)) for i in range(300)]
+    points += [(3300 + i, rng.uniform(88, 90), rng.uniform(-180, 180)) for i in range(100)]
+    index = GridIndex(points + [(9999, None, None)])
+
+    for lat, lon, radius in [(0, 179.9, 80), (0, -179.99, 150), (89.5, 10, 200), (36.1, -115.2, 25), (0, 0, 5000)]:
+        expected = {
+            pos: haversine_km(lat, lon, point_lat, point_lon)
+            for pos, point_lat, point_lon in points
+            if haversine_km(lat, lon, point_lat, point_lon) <= radius
+        }
+        assert index.within(lat, lon, radius) == expected
+
+
+def test_near_results_are_within_the_radius(client):
+    body = client.get("/cars/", params={"near": "36.17,-115.14", "radius_km": 15, "sort_by": "distance", "limit": 50}).json()
+    distances = [offer["distance_km"] for offer in body["results"]]
+    assert distances and all(distance <= 15 for distance in distances)
+    assert distances == sorted(distances)
+
+
+@pytest.mark.parametrize("params", [{"near": "somewhere"}, {"sort_by": "distance"}, {"near": "36,-115", "group_by": "car"}])
+def test_near_rejects(client, params):
+    assert client.get("/cars/", params=params).status_code == 400
+
+
+def test_sql_bounding_box_across_the_antimeridian(fresh_database, tmp_path):
+    engine = fresh_database()
+    item = next(iter_results(DEFAULT_FEED))
+    results = []
+    for lon in (179.95, -179.95, 170.0):
+        result = copy.deepcopy(item)
+        result["pickup"].update(latitude=0.0, longitude=lon, address=f"Pier {lon}")
+        results.append(result)
+    feed = tmp_path / "pacific.json"
+    feed.write_text(json.dumps({"results": results}), encoding="utf-8")
+    ingest_feed(str(feed))
+
+    with engine.connect() as conn:
+        shape, params = search_filters(conn.dialect.name, near_point=(0.0, 179.99), radius_km=50)
+        assert "bbox_wrapped" in shape
+        found = conn.execute(select(CarOffer.longitude).where(*filter_criteria(shape, conn.dialect.name)), params)
+        assert set(found.scalars()) == {179.95, -179.95}
@@ -0,0 +1,79 @@
+"""The in-memory inventory index answers exactly like the SQL path."""
+import pytest
+
+from app.services import inventory_index
+
+QUERIES = [
+    {},
+    {"sort_by": "price_desc", "limit": 50},
+    {"sort_by": "rating", "page": 3},
+    {"sort_by": "name", "limit": 50, "page": 2},
+    {"car_type": "SUV", "limit": 50},
+    {"fuel": "Diesel,Petrol", "free_cancellation": "true", "sort_by": "price_desc"},
+    {"min_price": 3000, "max_price": 9000, "sort_by": "rating"},
+    {"unlimited_mileage": "false", "sort_by": "name"},
+    {"pickup_location": "airport", "sort_by": "rating"},
+    {"group_by": "car", "limit": 50},
+    {"group_by": "sipp", "offers_per_group": 3, "sort_by": "price_desc"},
+    {"min_price": 999998},
+]
+
+
+def _near(client) -> str:
+    offer = next(
+        offer for offer in client.get("/cars/", params={"limit": 50}).json()["results"]
+        if offer["latitude"] is not None and offer["longitude"] is not None
+    )
+    return f"{offer['latitude']},{offer['longitude']}"
+
+
+def _both(client, monkeypatch, path: str, params: dict) -> tuple:
+    assert inventory_index.get_index() is not None
+    from_index = client.get(path, params=params)
+    with monkeypatch.context() as m:
+        m.setattr(inventory_index, "_index", None)
+        from_sql = client.get(path, params=params)
+    assert from_index.status_code == from_sql.status_code == 200
+    return from_index.json(), from_sql.json()
+
+
+@pytest.mark.parametrize("params", QUERIES)
+def test_cars_index_matches_sql(client, monkeypatch, params):
+    from_index, from_sql = _both(client, monkeypatch, "/cars/", params)
+    assert from_index == from_sql
+
+
+@pytest.mark.parametrize("extra", [
+    {"sort_by": "distance"},
+    {"sort_by": "price_asc", "car_type": "SUV"},
+    {"sort_by": "name", "free_cancellation": "true"},
+])
+def test_near_index_matches_sql(client, monkeypatch, extra):
+    params = {"near": _near(client), "radius_km": 200, "limit": 50, **extra}
+    from_index, from_sql = _both(client, monkeypatch, "/cars/", params)
+    assert from_index["count"] > 0
+    assert from_index == from_sql
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"category": "SUV", "pickup_location": "airport"},
+    {"fuel": "Diesel", "free_cancellation": "true"},
+])
+def test_filters_index_matches_sql(client, monkeypatch, params):
+    from_index, from_sql = _both(client, monkeypatch, "/filters/", params)
+    assert from_index == from_sql
+
+
+@pytest.mark.parametrize("params", [{}, {"buckets": 7, "car_type": "SUV"}, {"buckets": 3, "pickup_location": "airport"}])
+def test_price_histogram_index_matches_sql(client, monkeypatch, params):
+    from_index, from_sql = _both(client, monkeypatch, "/filters/price-histogram", params)
+    assert from_index == from_sql
+
+
+@pytest.mark.parametrize("params", [{"max_price": 9000}, {"min_price": 0.5, "max_price": 9000, "sort_by": "rating"}])
+def test_null_price_index_matches_sql(client, monkeypatch, null_price, params):
+    from_index, from_sql = _both(client, monkeypatch, "/cars/", {**params, "limit": 50})
+    assert from_index == from_sql
+    assert from_index["results"]
+    assert all(offer["price"] is not None for offer in from_index["results"])
@@ -0,0 +1,52 @@
+"""pickup_location search through the trigram / FTS5 index."""
+import pytest
+from sqlalchemy import delete, select, update
+
+from app.models.offer import CarOffer
+from app.models.price import CarPrice
+from app.scripts.ingest import ingest_feed
+from app.services.location_search import location_filter, matches_location, normalize_location_search
+
+
+@pytest.mark.parametrize("term, keywords", [
+    ("Las Vegas", ["las", "vegas"]),
+    ("  AIRPORT, nv ", ["airport"]),
+    ("mccarran-intl+airport", ["mccarran", "intl", "airport"]),
+    ("", []),
+    (None, []),
+])
+def test_normalize_location_search(term, keywords):
+    assert normalize_location_search(term) == keywords
+
+
+@pytest.mark.parametrize("term", [
+    "airport", "LAS VEGAS", "gilespie street", "Fremont", "89119", 'say "cheese"', "100%_off", "nowhere-at-all",
+])
+def test_index_matches_substring_search(seeded, term):
+    keywords = normalize_location_search(term)
+    with seeded.connect() as conn:
+        rows = conn.execute(select(CarOffer.id, CarOffer.pickup_location)).all()
+        found = set(conn.execute(
+            select(CarOffer.id).where(location_filter(keywords, conn.dialect.name, CarOffer))
+        ).scalars())
+    assert found == {offer_id for offer_id, address in rows if matches_location(address, keywords)}
+
+
+def test_index_follows_writes(fresh_database):
+    engine = fresh_database()
+    ingest_feed()
+
+    def matching(term: str) -> set:
+        with engine.connect() as conn:
+            return set(conn.execute(
+                select(CarPrice.id).where(location_filter([term], conn.dialect.name))
+            ).scalars())
+
+    with engine.begin() as conn:
+        price_id = conn.execute(select(CarPrice.id).order_by(CarPrice.id)).scalars().first()
+        conn.execute(update(CarPrice).where(CarPrice.id == price_id).values(pickup_location="1 Zzyzx Road"))
+    assert matching("zzyzx") == {price_id}
+
+    with engine.begin() as conn:
+        conn.execute(delete(CarPrice).where(CarPrice.id == price_id))
+    assert matching("zzyzx") == set()
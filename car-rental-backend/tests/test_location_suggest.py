@@ -0,0 +1,51 @@
+"""GET /locations/suggest: prefix matching, city roll-up and ranking."""
+from app.services.location_suggest import LocationSuggestIndex
+
+ROWS = [
+    # (pickup_location, latitude, longitude, offer count)
+    ("7135 Gilespie St, Las Vegas, Clark County, Nevada, 89119, United States", 36.06, -115.17, 40),
+    ("5757 Wayne Newton Blvd, Las Vegas, NV 89119, USA", 36.08, -115.15, 25),
+    ("5757  Wayne Newton Blvd,  Las Vegas, NV 89119, USA", 36.08, -115.15, 5),
+    ("1 Market St, Henderson, Clark County, Nevada, 89002, United States", 36.03, -114.98, 60),
+    ("Gilespie Street, US", 36.06, -115.17, 3),
+    ("", None, None, 9),
+    (None, None, None, 9),
+]
+
+
+def _names(suggestions: list[dict]) -> list[str]:
+    return [suggestion["name"] for suggestion in suggestions]
+
+
+def test_cities_roll_up_their_addresses():
+    index = LocationSuggestIndex(ROWS)
+    cities = {s["name"]: s["offers"] for s in index.suggestions if s["type"] == "city"}
+    # Whitespace variants are one address; a street returned as a "city" is not a city
+    assert cities == {"Las Vegas, NV": 70, "Henderson, NV": 60}
+    assert len([s for s in index.suggestions if s["type"] == "address"]) == 4
+
+
+def test_cities_rank_first_then_by_offers():
+    index = LocationSuggestIndex(ROWS)
+    # Cities match on their name only; addresses on every word, zip codes included
+    assert _names(index.suggest("89")) == ["1 Market St", "7135 Gilespie St", "5757 Wayne Newton Blvd"]
+    assert _names(index.suggest("nv")) == ["Las Vegas, NV", "Henderson, NV", "5757 Wayne Newton Blvd"]
+    assert _names(index.suggest("nv", limit=1)) == ["Las Vegas, NV"]
+
+
+def test_every_query_word_is_a_prefix():
+    index = LocationSuggestIndex(ROWS)
+    assert _names(index.suggest("las")) == ["Las Vegas, NV", "7135 Gilespie St", "5757 Wayne Newton Blvd"]
+    assert _names(index.suggest("Newton, VEG")) == ["5757 Wayne Newton Blvd"]
+    assert _names(index.suggest("gilespie")) == ["7135 Gilespie St", "Gilespie Street"]
+    assert index.suggest("vegas henderson") == []
+    assert index.suggest("egas") == []
+    assert index.suggest(" ,. ") == []
+
+
+def test_suggest_endpoint(client):
+    suggestions = client.get("/locations/suggest", params={"q": "las veg", "limit": 5}).json()
+    assert suggestions[0]["type"] == "city" and suggestions[0]["name"] == "Las Vegas, NV"
+    offers = [s["offers"] for s in suggestions if s["type"] == "address"]
+    assert offers == sorted(offers, reverse=True)
+    assert client.get("/locations/suggest", params={"q": ""}).status_code == 422
@@ -0,0 +1,83 @@
+"""Structured log records, debug sampling and request correlation ids."""
+import json
+import logging
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import logging_config
+from app.logging_config import ContextFilter, JsonFormatter, RequestIdMiddleware, TextFormatter, request_id_var
+
+
+def _record(level: int = logging.INFO, msg: str = "car search %s", args=("done",), **extra) -> logging.LogRecord:
+    record = logging.LogRecord("app.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter():
+    record = _record(page=2, near=(36.1, -115.2))
+    ContextFilter().filter(record)
+    data = json.loads(JsonFormatter().format(record))
+    assert data["level"] == "INFO" and data["logger"] == "app.test"
+    assert data["msg"] == "car search done"
+    assert data["page"] == 2 and data["near"] == [36.1, -115.2]
+    assert "request_id" not in data
+
+
+def test_json_formatter_exception():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("app.test", logging.ERROR, __file__, 1, "failed", (), sys.exc_info())
+    assert "ValueError: boom" in json.loads(JsonFormatter().format(record))["exc"]
+
+
+def test_text_formatter():
+    line = TextFormatter().format(_record(page=2))
+    assert "INFO app.test [None] car search done {'page': 2}" in line
+
+
+def test_context_filter_stamps_request_id_and_samples_debug():
+    token = request_id_var.set("abc")
+    sampled = logging_config.debug_sampled_var.set(False)
+    try:
+        record = _record()
+        assert ContextFilter().filter(record) and record.request_id == "abc"
+        # An unsampled request keeps its INFO records and drops its DEBUG ones
+        assert not ContextFilter().filter(_record(logging.DEBUG))
+    finally:
+        logging_config.debug_sampled_var.reset(sampled)
+        request_id_var.reset(token)
+
+
+def _echo_app() -> TestClient:
+    echo = FastAPI()
+
+    @echo.get("/")
+    def handler():
+        return {"request_id": request_id_var.get(), "sampled": logging_config.debug_sampled_var.get()}
+
+    echo.add_middleware(RequestIdMiddleware)
+    return TestClient(echo)
+
+
+def test_request_id_is_taken_from_the_header():
+    response = _echo_app().get("/", headers={"X-Request-ID": "req-1"})
+    assert response.headers["x-request-id"] == "req-1"
+    assert response.json()["request_id"] == "req-1"
+    assert request_id_var.get() is None
+
+
+def test_request_id_is_generated(monkeypatch):
+    monkeypatch.setattr(logging_config, "_debug_sample_rate", 0.0)
+    client = _echo_app()
+    first, second = client.get("/"), client.get("/")
+    assert len(first.headers["x-request-id"]) == 32
+    assert first.headers["x-request-id"] != second.headers["x-request-id"]
+    assert first.json() == {"request_id": first.headers["x-request-id"], "sampled": False}
+
+
+def test_app_echoes_the_request_id(client):
+    assert client.get("/health", headers={"X-Request-ID": "req-2"}).headers["x-request-id"] == "req-2"
@@ -0,0 +1,70 @@
+"""Prometheus exposition: histograms, counters, and per-route request and SQL metrics."""
+import re
+
+import pytest
+
+from app.metrics import Counter, Histogram, _statement_kind
+from app.services import inventory_index
+
+
+def _samples(text: str) -> dict:
+    """{'name{labels}': value} for every sample line of an exposition."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            key, value = line.rsplit(" ", 1)
+            samples[key] = float(value)
+    return samples
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(("/cars/",), value)
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP latency_seconds Latency.", "# TYPE latency_seconds histogram"]
+    assert _samples("\n".join(lines)) == {
+        'latency_seconds_bucket{route="/cars/",le="0.1"}': 2,
+        'latency_seconds_bucket{route="/cars/",le="1.0"}': 3,
+        'latency_seconds_bucket{route="/cars/",le="+Inf"}': 4,
+        'latency_seconds_sum{route="/cars/"}': 3.65,
+        'latency_seconds_count{route="/cars/"}': 4,
+    }
+
+
+def test_counter_escapes_labels():
+    counter = Counter("errors_total", "Errors.", ("message",))
+    counter.inc(('say "hi"\n',), 2)
+    assert counter.render()[-1] == 'errors_total{message="say \\"hi\\"\\n"} 2'
+
+
+@pytest.mark.parametrize("statement, kind", [
+    ("SELECT count(*) AS count_1 FROM car_offers", "count"),
+    ("  SELECT car_offers.id FROM car_offers", "select"),
+    ("UPDATE inventory_meta SET version=?", "update"),
+    ("", "other"),
+])
+def test_statement_kind(statement, kind):
+    assert _statement_kind(statement) == kind
+
+
+def test_request_and_sql_metrics(client, monkeypatch):
+    def sample(samples: dict, pattern: str) -> float:
+        return sum(value for key, value in samples.items() if re.fullmatch(pattern, key))
+
+    requests = r'http_requests_total\{route="/cars/",method="GET",status="200"\}'
+    db_time = r'http_request_db_seconds_count\{route="/cars/"\}'
+    statements = r'db_statement_duration_seconds_count\{route="/cars/",statement="select"\}'
+    before = _samples(client.get("/metrics").text)
+
+    # The SQL path runs the page query on behalf of the /cars/ route
+    monkeypatch.setattr(inventory_index, "_index", None)
+    assert client.get("/cars/", params={"limit": 5}).status_code == 200
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = _samples(response.text)
+
+    assert sample(after, requests) == sample(before, requests) + 1
+    assert sample(after, statements) >= sample(before, statements) + 1
+    assert sample(after, db_time) == sample(before, db_time) + 1
+    assert sample(after, r'db_pool_async\{stat="checkouts"\}') > 0
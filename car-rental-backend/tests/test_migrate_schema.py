@@ -0,0 +1,84 @@
+"""Migrating a database created with the original schema."""
+from sqlalchemy import inspect, select, text
+
+from app.models.agency import Agency
+from app.models.offer import car_offers
+from app.models.price import CarPrice
+from app.models.provider import Provider
+from app.scripts.ingest import ingest_feed
+from app.scripts.migrate_schema import migrate
+
+# The tables as the original models created them: no unique indexes, no foreign keys
+LEGACY_SCHEMA = [
+    "CREATE TABLE cars (id INTEGER PRIMARY KEY, name VARCHAR, category VARCHAR, type VARCHAR, "
+    "fuel VARCHAR, transmission VARCHAR, passengers INTEGER, bags INTEGER, sipp VARCHAR, image VARCHAR)",
+    "CREATE TABLE agencies (id INTEGER PRIMARY KEY, name VARCHAR, code VARCHAR, logo VARCHAR, rating FLOAT)",
+    "CREATE TABLE providers (id INTEGER PRIMARY KEY, name VARCHAR, logo VARCHAR)",
+    "CREATE TABLE car_prices (id INTEGER PRIMARY KEY, car_id INTEGER, agency_id INTEGER, provider_id INTEGER, "
+    "price FLOAT, free_cancellation BOOLEAN, unlimited_mileage BOOLEAN, fuel_policy VARCHAR, "
+    "pickup_location VARCHAR, latitude FLOAT, longitude FLOAT)",
+]
+
+LEGACY_ROWS = [
+    "INSERT INTO cars (id, name, type, sipp) VALUES (1, 'Toyota Yaris', 'Compact', 'CDAR'), "
+    "(2, 'Ford Explorer', 'SUV', 'SFAR')",
+    "INSERT INTO agencies (id, name, code, rating) VALUES (1, 'Hertz', '672', 4.4), "
+    "(2, 'Hertz', '672', 4.0), (3, 'Thrifty', '660', 4.0)",
+    "INSERT INTO providers (id, name) VALUES (1, 'Klook.com'), (2, 'VIPCars'), (3, 'Klook.com')",
+    "INSERT INTO car_prices (id, car_id, agency_id, provider_id, price, free_cancellation, unlimited_mileage, "
+    "pickup_location) VALUES "
+    "(1, 1, 1, 1, 100.0, 1, 1, 'Airport'), "
+    "(2, 1, 2, 3, 120.0, 0, 1, 'Airport'), "
+    "(3, 2, 3, 2, 300.0, 1, 0, 'Downtown'), "
+    # Orphans: a missing car, a missing agency and a NULL provider
+    "(4, 9, 1, 1, 50.0, 1, 1, 'Airport'), "
+    "(5, 1, 9, 1, 60.0, 1, 1, 'Airport'), "
+    "(6, 2, 3, NULL, 70.0, 1, 1, 'Downtown')",
+]
+
+
+def _state(engine) -> dict:
+    with engine.connect() as conn:
+        return {
+            "agencies": conn.execute(select(Agency.id, Agency.code).order_by(Agency.id)).all(),
+            "providers": conn.execute(select(Provider.id, Provider.name).order_by(Provider.id)).all(),
+            "prices": conn.execute(
+                select(CarPrice.id, CarPrice.car_id, CarPrice.agency_id, CarPrice.provider_id).order_by(CarPrice.id)
+            ).all(),
+            "offers": conn.execute(
+                select(car_offers.c.id, car_offers.c.agency_id, car_offers.c.provider_id).order_by(car_offers.c.id)
+            ).all(),
+        }
+
+
+def test_migrate_legacy_database(fresh_database):
+    engine = fresh_database(create=False)
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA + LEGACY_ROWS:
+            conn.execute(text(statement))
+
+    migrate()
+    state = _state(engine)
+    assert state["agencies"] == [(1, "672"), (3, "660")]
+    assert state["providers"] == [(1, "Klook.com"), (2, "VIPCars")]
+    # Duplicates repointed at the lowest id, orphans removed
+    assert state["prices"] == [(1, 1, 1, 1), (2, 1, 1, 1), (3, 2, 3, 2)]
+    assert state["offers"] == [(1, 1, 1), (2, 1, 1), (3, 3, 2)]
+
+    inspector = inspect(engine)
+    foreign_keys = {fk["referred_table"] for fk in inspector.get_foreign_keys("car_prices")}
+    assert foreign_keys == {"cars", "agencies", "providers"}
+    indexes = {index["name"] for index in inspector.get_indexes("agencies")}
+    assert "uq_agencies_code" in indexes
+
+    # Running it again changes nothing
+    migrate()
+    assert _state(engine) == state
+
+
+def test_migrate_current_schema_is_a_no_op(fresh_database):
+    engine = fresh_database()
+    ingest_feed()
+    before = _state(engine)
+    migrate()
+    assert _state(engine) == before
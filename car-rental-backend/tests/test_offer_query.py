@@ -0,0 +1,52 @@
+"""Cached /cars statements: one per filter shape, reused with each request's values."""
+from sqlalchemy import func, select
+
+from app.models.offer import CarOffer
+from app.services import offer_query
+from app.services.offer_query import count_statement, rows_statement, search_filters, statement_cache_stats
+
+
+def test_one_statement_per_shape():
+    shape, _ = search_filters("sqlite", car_types=["SUV"], min_price=50, pickup_location="las vegas")
+    same_shape, params = search_filters("sqlite", car_types=["Van", "Compact"], min_price=90, pickup_location="reno nv")
+    assert same_shape == shape
+    assert params["car_types"] == ["Compact", "Van"]
+
+    hits = statement_cache_stats()["hits"]
+    statement = rows_statement(shape, "sqlite", "price_asc", page="offset")
+    assert rows_statement(same_shape, "sqlite", "price_asc", page="offset") is statement
+    assert statement_cache_stats()["hits"] >= hits + 1
+
+    other_shape, _ = search_filters("sqlite", car_types=["SUV"], min_price=50)
+    assert rows_statement(other_shape, "sqlite", "price_asc", page="offset") is not statement
+    assert rows_statement(shape, "sqlite", "price_desc", page="offset") is not statement
+    assert rows_statement(shape, "sqlite", "price_asc", page="seek") is not statement
+    # sort_by values without their own ORDER BY share one statement
+    assert rows_statement(shape, "sqlite", "distance") is rows_statement(shape, "sqlite", "unknown")
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(offer_query, "_statements", {})
+    monkeypatch.setattr(offer_query, "MAX_STATEMENTS", 2)
+    for max_price in (None, 10, None):
+        shape, _ = search_filters("sqlite", max_price=max_price)
+        count_statement(shape, "sqlite")
+        count_statement(shape, "sqlite", group_by="car")
+    assert len(offer_query._statements) <= 2
+
+
+def test_reused_statement_hits_the_compiled_cache(seeded):
+    shape, _ = search_filters("sqlite", car_types=["SUV"], max_price=1)
+    statement = count_statement(shape, "sqlite")
+    with seeded.connect() as conn:
+        conn.execute(statement, search_filters("sqlite", car_types=["SUV"], max_price=1)[1])
+        # Compiled once per engine; later values, and IN lists of any length, reuse it
+        for car_types, max_price in ((["SUV"], 20000), (["SUV", "Compact", "Van"], 15000), (["Compact"], 9000)):
+            _, params = search_filters("sqlite", car_types=car_types, max_price=max_price)
+            result = conn.execute(statement, params)
+            count = result.scalar_one()
+            assert result.context.cache_hit.name == "CACHE_HIT"
+            assert count == conn.execute(
+                select(func.count()).select_from(CarOffer)
+                .where(CarOffer.car_type.in_(car_types), CarOffer.price <= max_price)
+            ).scalar_one()
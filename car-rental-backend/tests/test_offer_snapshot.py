@@ -0,0 +1,110 @@
+"""The published offer snapshot: publishing, pruning, and workers swapping to a newer one."""
+import asyncio
+import os
+
+import pytest
+
+from app import startup
+from app.services import inventory_index, inventory_state, offer_snapshot
+from app.services.offer_snapshot import (
+    CURRENT, KEEP_VERSIONS, open_published, publish_snapshot, published_version, snapshot_path,
+)
+
+
+@pytest.fixture
+def snapshot_dir(seeded, tmp_path, monkeypatch):
+    """OFFER_SNAPSHOT_DIR for the session database, with the session index and listeners put back afterwards."""
+    directory = str(tmp_path / "snapshots")
+    monkeypatch.setenv("OFFER_SNAPSHOT_DIR", directory)
+    monkeypatch.setattr(inventory_index, "_index", inventory_index.get_index())
+    monkeypatch.setattr(inventory_state, "_listeners", [])
+    return directory
+
+
+def _snapshot_files(directory: str) -> list[str]:
+    return sorted(name for name in os.listdir(directory) if name.endswith(".snap"))
+
+
+def test_publish_and_prune(snapshot_dir):
+    assert published_version(snapshot_dir) is None
+    assert open_published(snapshot_dir) is None
+
+    assert publish_snapshot() == 1
+    assert publish_snapshot(only_if_missing=True) == 1
+    for version in range(2, KEEP_VERSIONS + 3):
+        assert publish_snapshot() == version
+
+    current = KEEP_VERSIONS + 2
+    assert published_version(snapshot_dir) == current
+    assert open_published(snapshot_dir).version == current
+    # Only the newest KEEP_VERSIONS files are kept
+    assert _snapshot_files(snapshot_dir) == [
+        os.path.basename(snapshot_path(snapshot_dir, version))
+        for version in range(current - KEEP_VERSIONS + 1, current + 1)
+    ]
+
+
+def test_published_index_matches_database_index(snapshot_dir, seeded):
+    publish_snapshot()
+    published = inventory_index.load_index()
+    assert published.snapshot.path == snapshot_path(snapshot_dir, 1)
+    with seeded.connect() as conn:
+        built = inventory_index.build_index(conn)
+    assert published.size == built.size > 0
+    assert [published.snapshot.fragment(pos) for pos in range(published.size)] == [
+        built.snapshot.fragment(pos) for pos in range(built.size)
+    ]
+    for sort_by in ("price_asc", "rating", "name"):
+        assert list(published.orders[sort_by]) == list(built.orders[sort_by])
+
+
+def test_open_retries_a_version_pruned_while_opening(snapshot_dir, monkeypatch):
+    publish_snapshot()
+    publish_snapshot()
+    os.remove(snapshot_path(snapshot_dir, 1))
+    # CURRENT still named version 1 when it was read, and has moved on since
+    versions = iter([1, 2])
+    monkeypatch.setattr(offer_snapshot, "published_version", lambda directory: next(versions))
+    assert open_published(snapshot_dir).version == 2
+
+
+def test_truncated_snapshot_is_rejected(snapshot_dir):
+    publish_snapshot()
+    path = snapshot_path(snapshot_dir, 1)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 4096)
+    with pytest.raises(ValueError):
+        open_published(snapshot_dir)
+
+
+def test_watcher_skips_a_broken_version_and_swaps_to_the_next(snapshot_dir, monkeypatch):
+    monkeypatch.setitem(startup._state, "ready", True)
+    publish_snapshot()
+    inventory_index.load_index()
+    reloads = []
+    inventory_state.on_inventory_change(reloads.append)
+    inventory_state.on_inventory_change(lambda version: inventory_index.load_index())
+
+    # Version 2 is published but unreadable
+    with open(snapshot_path(snapshot_dir, 2), "wb") as f:
+        f.write(b"not a snapshot")
+    with open(os.path.join(snapshot_dir, CURRENT), "w") as f:
+        f.write("2\n")
+
+    async def watch(until, seconds: float):
+        watcher = asyncio.create_task(startup.watch_snapshot(snapshot_dir, 0.01))
+        try:
+            deadline = asyncio.get_running_loop().time() + seconds
+            while not until() and asyncio.get_running_loop().time() < deadline:
+                await asyncio.sleep(0.01)
+        finally:
+            watcher.cancel()
+
+    asyncio.run(watch(lambda: False, 0.2))
+    assert reloads == []
+    assert inventory_index.get_index().snapshot_version == 1
+
+    assert publish_snapshot() == 3
+    asyncio.run(watch(lambda: inventory_index.get_index().snapshot_version == 3, 5))
+    assert inventory_index.get_index().snapshot_version == 3
+    assert len(reloads) == 1
@@ -0,0 +1,84 @@
+"""Keyset cursors: token round trip and cursor walks equal to offset walks."""
+import pytest
+
+from app.services import inventory_index
+from app.services.pagination import InvalidCursor, count_cache, decode_cursor, encode_cursor
+
+SORTS = ["price_asc", "price_desc", "rating", "name"]
+
+
+@pytest.mark.parametrize("sort_by, value", [
+    ("price_asc", 4321.5),
+    ("price_desc", 10),
+    ("rating", 8.7),
+    ("name", "Toyota Yaris"),
+])
+def test_cursor_round_trip(sort_by, value):
+    assert decode_cursor(encode_cursor(sort_by, value, 42), sort_by) == (value, 42)
+
+
+@pytest.mark.parametrize("cursor, sort_by", [
+    (encode_cursor("price_asc", 10.0, 1), "name"),
+    (encode_cursor("name", 10.0, 1), "name"),
+    (encode_cursor("price_asc", True, 1), "price_asc"),
+    ("not-a-cursor", "price_asc"),
+])
+def test_invalid_cursor(cursor, sort_by):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, sort_by)
+
+
+def test_invalid_cursor_is_a_bad_request(client):
+    response = client.get("/cars/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def _walks(client, params: dict) -> tuple[list, list]:
+    by_offset, page = [], 1
+    while True:
+        body = client.get("/cars/", params={**params, "page": page}).json()
+        if not body["results"]:
+            break
+        by_offset += body["results"]
+        page += 1
+
+    by_cursor, cursor = [], None
+    while True:
+        body = client.get("/cars/", params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        by_cursor += body["results"]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    return by_offset, by_cursor
+
+
+@pytest.mark.parametrize("use_index", [True, False], ids=["index", "sql"])
+@pytest.mark.parametrize("sort_by", SORTS)
+def test_cursor_walk_equals_offset_walk(client, monkeypatch, use_index, sort_by):
+    if not use_index:
+        monkeypatch.setattr(inventory_index, "_index", None)
+    params = {"sort_by": sort_by, "limit": 50, "car_type": "SUV,4-5 Door"}
+    by_offset, by_cursor = _walks(client, params)
+    assert by_offset
+    assert by_cursor == by_offset
+
+
+def test_cursor_page_reports_total(client):
+    first = client.get("/cars/", params={"limit": 10}).json()
+    second = client.get("/cars/", params={"limit": 10, "cursor": first["next_cursor"]}).json()
+    assert second["count"] == first["count"]
+
+
+def test_equivalent_filters_share_a_cached_count(client, monkeypatch):
+    monkeypatch.setattr(inventory_index, "_index", None)
+    count_cache.clear()
+    counts = []
+    for params in (
+        {"car_type": "SUV,4-5 Door", "pickup_location": "Las Vegas airport"},
+        {"car_type": "4-5 Door,SUV,SUV", "pickup_location": " AIRPORT las  vegas "},
+    ):
+        first = client.get("/cars/", params={**params, "limit": 5}).json()
+        second = client.get("/cars/", params={**params, "limit": 5, "cursor": first["next_cursor"]}).json()
+        counts.append(second["count"])
+    assert counts[0] == counts[1] == first["count"]
+    assert len(count_cache._entries) == 1
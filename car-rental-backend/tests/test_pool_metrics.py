@@ -0,0 +1,57 @@
+"""Pool settings from DB_POOL_* and the instrumented pool's counters."""
+import pytest
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import make_url
+
+from app.pool_metrics import PoolMetrics, engine_options, pool_settings
+
+
+@pytest.fixture
+def pool_env(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "1")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "1")
+    monkeypatch.setenv("DB_POOL_TIMEOUT", "0.05")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "no")
+
+
+def test_pool_settings(pool_env):
+    assert pool_settings() == {
+        "pool_size": 1, "max_overflow": 1, "pool_timeout": 0.05, "pool_recycle": 1800, "pool_pre_ping": False,
+    }
+
+
+def test_in_memory_sqlite_keeps_its_default_pool():
+    assert engine_options(make_url("sqlite://"), PoolMetrics("test")) == {}
+    assert engine_options(make_url("sqlite:///:memory:"), PoolMetrics("test")) == {}
+
+
+def test_checkouts_overflow_and_timeouts(pool_env, tmp_path):
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    metrics = PoolMetrics("test")
+    engine = create_engine(url, **engine_options(make_url(url), metrics))
+    try:
+        first = engine.connect()
+        second = engine.connect()
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        stats = metrics.snapshot()
+        assert stats["checkouts"] == 2
+        assert stats["overflow_checkouts"] == 1
+        assert stats["timeouts"] == 1
+        assert stats["checked_out"] == 2 and stats["overflow"] == 1
+        first.close()
+        second.close()
+
+        # The counters live on the pool class, so they survive dispose()
+        engine.dispose()
+        engine.connect().close()
+        assert metrics.snapshot()["checkouts"] == 3
+    finally:
+        engine.dispose()
+
+
+def test_pool_health(client):
+    body = client.get("/health/pool").json()
+    assert set(body) == {"settings", "sync", "async"}
+    assert body["sync"]["checkouts"] > 0
+    assert body["async"]["checkouts"] > 0
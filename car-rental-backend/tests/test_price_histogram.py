@@ -0,0 +1,38 @@
+"""GET /filters/price-histogram."""
+import pytest
+
+from app.services import inventory_index
+
+
+def _histograms(client, monkeypatch, params: dict) -> tuple:
+    bodies = []
+    for index in (inventory_index.get_index(), None):
+        with monkeypatch.context() as m:
+            m.setattr(inventory_index, "_index", index)
+            response = client.get("/filters/price-histogram", params=params)
+        assert response.status_code == 200
+        bodies.append(response.json())
+    return tuple(bodies)
+
+
+def test_buckets_span_the_price_range(client):
+    price_range = client.get("/filters/").json()["price_range"]
+    histogram = client.get("/filters/price-histogram", params={"buckets": 8}).json()
+    assert len(histogram["buckets"]) == 8
+    assert histogram["buckets"][0]["min"] == pytest.approx(price_range["min"], abs=0.01)
+    assert histogram["buckets"][-1]["max"] == price_range["max"]
+    assert histogram["count"] == sum(bucket["count"] for bucket in histogram["buckets"])
+    assert histogram["count"] == client.get("/cars/").json()["count"]
+
+
+def test_histogram_follows_filters_but_not_price(client):
+    params = {"car_type": "SUV", "min_price": 999998}
+    histogram = client.get("/filters/price-histogram", params=params).json()
+    assert histogram["count"] == client.get("/cars/", params={"car_type": "SUV"}).json()["count"]
+
+
+def test_null_price_is_left_out(client, monkeypatch, null_price):
+    from_index, from_sql = _histograms(client, monkeypatch, {"buckets": 5})
+    assert from_index == from_sql
+    priced = client.get("/cars/", params={"min_price": 0.01}).json()["count"]
+    assert from_index["count"] == priced == client.get("/cars/").json()["count"] - 1
@@ -0,0 +1,107 @@
+"""The /cars response cache: LRU / TTL / byte bounds and ETag / Last-Modified revalidation."""
+from email.utils import formatdate
+
+import pytest
+
+from app.services import inventory_state, response_cache
+from app.services.response_cache import ResponseCache, cars_cache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def enabled_cache(monkeypatch):
+    """The app's /cars cache, switched on (the test settings disable it)."""
+    cars_cache.clear()
+    monkeypatch.setattr(cars_cache, "enabled", True)
+    yield cars_cache
+    cars_cache.clear()
+
+
+def test_lru_eviction_by_entries():
+    cache = ResponseCache(max_entries=2, max_bytes=1000, ttl=60)
+    cache.set("a", b"1", 0)
+    cache.set("b", b"2", 0)
+    assert cache.get("a").body == b"1"
+    cache.set("c", b"3", 0)
+    # "b" was the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_eviction_by_bytes():
+    cache = ResponseCache(max_entries=10, max_bytes=10, ttl=60)
+    cache.set("a", b"x" * 4, 0)
+    cache.set("b", b"x" * 4, 0)
+    cache.set("c", b"x" * 4, 0)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 8
+    # A body larger than the whole cache is returned but never stored
+    assert cache.set("d", b"x" * 11, 0).body == b"x" * 11
+    assert cache.get("d") is None and cache.stats()["entries"] == 2
+
+
+def test_ttl(clock):
+    cache = ResponseCache(max_entries=10, max_bytes=1000, ttl=5)
+    cache.set("a", b"1", 0)
+    clock[0] += 4.9
+    assert cache.get("a") is not None
+    clock[0] += 0.1
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["entries"]) == (1, 1, 1, 0)
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ResponseCache(max_entries=10, max_bytes=1000, ttl=60, enabled=False)
+    entry = cache.set("a", b"1", 0)
+    assert entry.etag
+    assert cache.get("a") is None and cache.stats()["entries"] == 0
+
+
+def test_etag_revalidation(client):
+    response = client.get("/cars/", params={"limit": 5})
+    etag = response.headers["etag"]
+    assert response.status_code == 200 and response.headers["cache-control"] == "no-cache"
+
+    for if_none_match in (etag, f"W/{etag}", f'"stale", {etag}', "*"):
+        revalidated = client.get("/cars/", params={"limit": 5}, headers={"If-None-Match": if_none_match})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+
+    assert client.get("/cars/", params={"limit": 5}, headers={"If-None-Match": '"stale"'}).status_code == 200
+    # A different page has a different ETag
+    assert client.get("/cars/", params={"limit": 6}, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_if_modified_since(client):
+    last_modified = client.get("/cars/", params={"limit": 5}).headers["last-modified"]
+    assert client.get("/cars/", params={"limit": 5}, headers={"If-Modified-Since": last_modified}).status_code == 304
+    earlier = formatdate(0, usegmt=True)
+    assert client.get("/cars/", params={"limit": 5}, headers={"If-Modified-Since": earlier}).status_code == 200
+    assert client.get("/cars/", params={"limit": 5}, headers={"If-Modified-Since": "yesterday"}).status_code == 200
+
+
+def test_repeated_query_is_a_hit(client, enabled_cache):
+    first = client.get("/cars/", params={"car_type": "SUV,Compact", "limit": 5})
+    # The same filter set, spelled differently
+    second = client.get("/cars/", params={"car_type": "Compact,SUV", "limit": 5})
+    assert second.content == first.content
+    stats = enabled_cache.stats()
+    assert (stats["entries"], stats["hits"]) == (1, 1)
+
+
+def test_cleared_on_inventory_change(client, seeded, enabled_cache):
+    client.get("/cars/", params={"limit": 5})
+    assert enabled_cache.stats()["entries"] == 1
+    with seeded.begin() as conn:
+        version = inventory_state.record_inventory_change(conn)
+    inventory_state.bump_inventory_version(version)
+    assert enabled_cache.stats()["entries"] == 0
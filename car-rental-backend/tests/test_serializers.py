@@ -0,0 +1,68 @@
+"""Encoded offers match the dict payloads, and fragments follow inventory changes."""
+from types import SimpleNamespace
+
+import orjson
+from sqlalchemy import select
+
+from app.models.offer import car_offers
+from app.services.inventory_state import bump_inventory_version, record_inventory_change
+from app.services.serializers import (
+    add_distance, add_group, encode_car_offer, encode_car_offers, encode_offer, encode_page, offer_payload,
+)
+
+
+def _rows(engine, *where):
+    with engine.connect() as conn:
+        return conn.execute(select(car_offers).where(*where).order_by(car_offers.c.id).limit(40)).all()
+
+
+def test_encoded_offer_matches_payload(seeded):
+    for row in _rows(seeded):
+        assert orjson.loads(encode_offer(row)) == offer_payload(row)
+        assert orjson.loads(encode_offer(row, 1.23456)) == {**offer_payload(row), "distance_km": 1.235}
+        assert orjson.loads(add_distance(encode_offer(row), 1.23456)) == {**offer_payload(row), "distance_km": 1.235}
+        without_car = offer_payload(row)
+        del without_car["car"]
+        assert orjson.loads(encode_car_offer(row)) == without_car
+
+
+def test_encoded_car_offers_and_groups(seeded):
+    rows = _rows(seeded, car_offers.c.car_id == _rows(seeded)[0].car_id)
+    body = orjson.loads(encode_car_offers(rows))
+    assert body["car"] == offer_payload(rows[0])["car"]
+    assert len(body["offers"]) == len(rows)
+
+    grouped = orjson.loads(add_group(encode_offer(rows[0]), 3, [encode_car_offer(rows[0])]))
+    assert grouped["offer_count"] == 3
+    assert len(grouped["offers"]) == 1
+    assert orjson.loads(add_group(encode_offer(rows[0]), 2)).keys() == {*offer_payload(rows[0]), "offer_count"}
+
+
+def test_encoded_page():
+    page = orjson.loads(encode_page({"page": 1, "count": 2}, [b'{"a":1}', b'{"b":2}']))
+    assert page == {"page": 1, "count": 2, "results": [{"a": 1}, {"b": 2}]}
+    assert orjson.loads(encode_page({"page": 1}, [])) == {"page": 1, "results": []}
+
+
+def test_null_price_is_encoded_as_null(seeded):
+    offer = SimpleNamespace(**{**_rows(seeded)[0]._asdict(), "price": None})
+    assert orjson.loads(encode_offer(offer))["price"] is None
+
+
+def test_fragments_are_refreshed_after_an_inventory_change(client, seeded):
+    car_id = client.get("/cars/", params={"limit": 1}).json()["results"][0]["car"]["id"]
+    before = client.get(f"/cars/{car_id}").json()
+    with seeded.begin() as conn:
+        conn.execute(car_offers.update().where(car_offers.c.car_id == car_id).values(car_name="Renamed"))
+    try:
+        # Cached fragments are kept until the version changes
+        assert client.get(f"/cars/{car_id}").json()["car"]["name"] == before["car"]["name"]
+        with seeded.begin() as conn:
+            version = record_inventory_change(conn)
+        bump_inventory_version(version)
+        assert client.get(f"/cars/{car_id}").json()["car"]["name"] == "Renamed"
+    finally:
+        with seeded.begin() as conn:
+            conn.execute(car_offers.update().where(car_offers.c.car_id == car_id).values(car_name=before["car"]["name"]))
+            version = record_inventory_change(conn)
+        bump_inventory_version(version)
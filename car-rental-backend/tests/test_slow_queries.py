@@ -0,0 +1,76 @@
+"""The slow-query log and the token-guarded /admin endpoints serving it."""
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.slow_queries import SlowQueryLog, install_slow_query_log, slow_query_log
+
+
+def _entry(elapsed_ms: float) -> dict:
+    return {"elapsed_ms": elapsed_ms, "statement": f"SELECT {elapsed_ms}"}
+
+
+def test_keeps_the_slowest_and_the_most_recent():
+    log = SlowQueryLog(threshold_ms=10, top_n=3)
+    for elapsed_ms in (50, 20, 90, 10, 70, 30):
+        log.record(_entry(elapsed_ms))
+    snapshot = log.snapshot()
+    assert snapshot["slow_count"] == 6
+    assert [entry["elapsed_ms"] for entry in snapshot["slowest"]] == [90, 70, 50]
+    assert [entry["elapsed_ms"] for entry in snapshot["recent"]] == [30, 70, 10]
+    assert not log.qualifies_for_top(0.04) and log.qualifies_for_top(0.06)
+
+    log.clear()
+    assert log.snapshot()["slowest"] == [] and log.snapshot()["slow_count"] == 0
+
+
+def test_records_statements_over_the_threshold_with_plans(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    log = SlowQueryLog(threshold_ms=0, top_n=10)
+    install_slow_query_log(engine, log)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)"))
+            conn.execute(text("SELECT name FROM t WHERE id = :id"), {"id": 7})
+    finally:
+        engine.dispose()
+
+    create, select = log.snapshot()["recent"][::-1]
+    assert create["plan"] is None
+    assert select["parameters"] == "(7,)"
+    assert select["route"] is None and select["request_id"] is None
+    assert any("t USING INTEGER PRIMARY KEY" in line for line in select["plan"])
+
+
+def test_disabled_log_installs_nothing(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    log = SlowQueryLog(threshold_ms=0, top_n=10, enabled=False)
+    install_slow_query_log(engine, log)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    engine.dispose()
+    assert log.snapshot()["slow_count"] == 0
+
+
+def test_admin_is_hidden_without_a_token(client):
+    assert client.get("/admin/slow-queries").status_code == 404
+    assert client.get("/admin/slow-queries", headers={"X-Admin-Token": "anything"}).status_code == 404
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Admin-Token": "wrong"}, {"X-Admin-Token": "s3cret-"}])
+def test_admin_rejects_a_wrong_token(client, monkeypatch, headers):
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    assert client.get("/admin/slow-queries", headers=headers).status_code == 403
+    assert client.delete("/admin/slow-queries", headers=headers).status_code == 403
+    assert client.post("/admin/inventory/sync", headers=headers).status_code == 403
+
+
+def test_admin_with_the_token(client, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    headers = {"X-Admin-Token": "s3cret"}
+    slow_query_log.record(_entry(12.5))
+    body = client.get("/admin/slow-queries", headers=headers).json()
+    assert {"settings", "slow_count", "slowest", "recent"} <= set(body)
+    assert body["slow_count"] >= 1
+
+    assert client.delete("/admin/slow-queries", headers=headers).json() == {"cleared": True}
+    assert client.get("/admin/slow-queries", headers=headers).json()["slow_count"] == 0
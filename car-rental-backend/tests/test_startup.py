@@ -0,0 +1,68 @@
+"""Lazy settings and engines, startup warm-up and the readiness probe."""
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app import settings, startup
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def not_ready(monkeypatch):
+    """A process state from before warm-up."""
+    monkeypatch.setattr(startup, "_state", {
+        "ready": False, "import_seconds": 0.1, "warmup_seconds": None, "steps": {}, "errors": [],
+    })
+
+
+def test_import_creates_no_engine():
+    # Nothing listens there: any connection attempt at import would fail
+    env = {**os.environ, "DATABASE_URL": "postgresql://nobody@127.0.0.1:9/nothing"}
+    script = (
+        "import app.main, app.database, app.async_database\n"
+        "assert app.database._engine is None and app.async_database._async_engine is None\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, env=env, check=True, capture_output=True)
+
+
+def test_env_file_is_loaded_without_overriding(tmp_path, monkeypatch):
+    env_file = tmp_path / ".env"
+    env_file.write_text("CORS_ORIGINS=https://from-file.example\nSTARTUP_WARMUP=from-file\n")
+    monkeypatch.setattr(settings, "_env_loaded", False)
+    monkeypatch.setenv("ENV_FILE", str(env_file))
+    # Restored to unset afterwards, whatever the file set
+    monkeypatch.setenv("CORS_ORIGINS", "")
+    monkeypatch.delenv("CORS_ORIGINS")
+    monkeypatch.setenv("STARTUP_WARMUP", "from-environment")
+
+    assert settings.cors_origins() == ["https://from-file.example"]
+    assert os.environ["STARTUP_WARMUP"] == "from-environment"
+
+
+def test_ready_after_warm_up(client, not_ready):
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["ready"] is False
+
+    asyncio.run(startup.warm_up(pool_prewarm=1))
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] is True and body["errors"] == []
+    assert set(body["steps"]) == {"inventory_version", "async_pool", "sync_pool", "inventory_index", "location_suggest"}
+
+
+def test_failed_step_still_becomes_ready(client, not_ready, monkeypatch):
+    def fail():
+        raise RuntimeError("no suggestions")
+
+    monkeypatch.setattr(startup, "_load_location_suggestions", fail)
+    asyncio.run(startup.warm_up(pool_prewarm=0))
+    body = client.get("/health/ready").json()
+    assert body["ready"] is True
+    assert body["errors"] == ["location_suggest"]
+    assert "async_pool" not in body["steps"]
@@ -0,0 +1,117 @@
+"""Inventory sync: the same result as a fresh ingest, and a version every process follows."""
+import asyncio
+import copy
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import select
+
+from app import startup
+from app.models.offer import car_offers
+from app.scripts.ingest import DEFAULT_FEED, ingest_feed, iter_results
+from app.scripts.sync_inventory import SyncInProgress, _lock, sync_feed
+from app.services import inventory_index, inventory_state
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ID_COLUMNS = {"id", "car_id", "agency_id", "provider_id"}
+
+
+def _offers(engine) -> list[tuple]:
+    """car_offers without surrogate ids, which differ between the two paths."""
+    columns = [c for c in car_offers.columns if c.name not in ID_COLUMNS]
+    with engine.connect() as conn:
+        rows = conn.execute(select(*columns)).all()
+    return sorted((tuple(row) for row in rows), key=repr)
+
+
+@pytest.fixture
+def changed_feed(tmp_path):
+    """The bundled feed with a repriced, a removed, a new and a provider-less result."""
+    results = list(iter_results(DEFAULT_FEED))
+    results[0]["providers"][0]["price"] += 100
+    del results[1]
+    added = copy.deepcopy(results[2])
+    added["car"]["name"] = "Test Roadster"
+    results.append(added)
+    results[3]["providers"] = None
+
+    path = tmp_path / "changed.json"
+    path.write_text(json.dumps({"results": results}), encoding="utf-8")
+    return str(path)
+
+
+def test_sync_matches_fresh_ingest(fresh_database, changed_feed):
+    fresh = fresh_database(name="fresh.db")
+    ingest_feed(changed_feed)
+    expected = _offers(fresh)
+
+    synced = fresh_database(name="synced.db")
+    ingest_feed()
+    version = inventory_state.inventory_version()
+    stats = sync_feed(changed_feed)
+    assert stats.changed
+    assert stats.version == inventory_state.inventory_version() == version + 1
+    assert stats.inserted and stats.updated and stats.deleted
+    assert stats.cars_inserted == 1
+    assert _offers(synced) == expected
+
+    again = sync_feed(changed_feed)
+    assert not again.changed
+    assert again.unchanged == len(expected)
+    assert _offers(synced) == expected
+
+
+def test_sync_rejects_concurrent_runs(fresh_database):
+    fresh_database()
+    with _lock:
+        with pytest.raises(SyncInProgress):
+            sync_feed()
+
+
+def test_version_is_shared_through_the_database(fresh_database):
+    engine = fresh_database()
+    with engine.connect() as conn:
+        assert inventory_state.stored_inventory_version(conn) == (0, None)
+    with engine.begin() as conn:
+        version = inventory_state.record_inventory_change(conn)
+    with engine.connect() as conn:
+        assert inventory_state.stored_inventory_version(conn)[0] == version == 1
+
+    seen = []
+    inventory_state.on_inventory_change(seen.append)
+    assert inventory_state.refresh_inventory_version()
+    assert inventory_state.inventory_version() == 1
+    assert not inventory_state.refresh_inventory_version()
+    assert seen == [1]
+
+
+def test_sync_in_another_process_reloads_this_one(fresh_database, changed_feed, monkeypatch):
+    fresh_database()
+    ingest_feed()
+    monkeypatch.setattr(inventory_index, "_index", None)
+    monkeypatch.setitem(startup._state, "ready", True)
+    inventory_state.on_inventory_change(lambda version: inventory_index.load_index())
+    version = inventory_state.inventory_version()
+
+    # DATABASE_URL (the test's database) is inherited by the sync process
+    subprocess.run(
+        [sys.executable, "-m", "app.scripts.sync_inventory", changed_feed],
+        cwd=BACKEND_DIR, check=True, capture_output=True,
+    )
+    assert inventory_state.inventory_version() == version
+
+    async def wait_for_reload():
+        watcher = asyncio.create_task(startup.watch_inventory(0.01))
+        try:
+            while inventory_state.inventory_version() == version:
+                await asyncio.sleep(0.01)
+        finally:
+            watcher.cancel()
+
+    asyncio.run(asyncio.wait_for(wait_for_reload(), timeout=10))
+    assert inventory_state.inventory_version() == version + 1
+    assert "Test Roadster" in inventory_index.get_index().names.values
@@ -1,7 +1,8 @@
 "use client";
 
-import { useState } from "react";
-import type { Filters, SearchFilters } from "@/types/search";
+import { useEffect, useState } from "react";
+import type { Filters, PriceHistogram, SearchFilters } from "@/types/search";
+import { fetchPriceHistogram } from "@/lib/search-api";
 import Image from "next/image";
 
 interface FilterSidebarProps {
@@ -20,6 +21,33 @@ export default function FilterSidebar({
     max: activeFilters.max_price || 100000,
   });
 
+  // Price distribution for the current non-price selection
+  const [histogram, setHistogram] = useState<PriceHistogram | null>(null);
+
+  useEffect(() => {
+    let cancelled = false;
+    fetchPriceHistogram(activeFilters)
+      .then((data) => {
+        if (!cancelled) setHistogram(data);
+      })
+      .catch(() => {
+        if (!cancelled) setHistogram(null);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [
+    activeFilters.car_type,
+    activeFilters.category,
+    activeFilters.fuel,
+    activeFilters.agency,
+    activeFilters.free_cancellation,
+    activeFilters.unlimited_mileage,
+    activeFilters.pickup_location,
+  ]);
+
+  const histogramPeak = histogram ? Math.max(1, ...histogram.buckets.map((b) => b.count)) : 1;
+
   // Multiple car types
   const [selectedCarTypes, setSelectedCarTypes] = useState<string[]>(
     activeFilters.car_type ? [activeFilters.car_type] : []
@@ -236,6 +264,22 @@ export default function FilterSidebar({
         {/* Price Range */}
         <FilterSection title="Price Range">
           <div className="space-y-4">
+            {histogram && histogram.count > 0 && (
+              <div className="flex items-end gap-[2px] h-12" aria-hidden="true">
+                {histogram.buckets.map((bucket) => (
+                  <div
+                    key={bucket.min}
+                    title={`${bucket.count} offers`}
+                    className={`flex-1 rounded-t-sm ${
+                      bucket.max >= priceRange.min && bucket.min <= priceRange.max
+                        ? "bg-[var(--color-primary)]"
+                        : "bg-gray-200"
+                    }`}
+                    style={{ height: `${(bucket.count / histogramPeak) * 100}%` }}
+                  />
+                ))}
+              </div>
+            )}
             <div className="flex items-center gap-3">
               <input
                 type="number"
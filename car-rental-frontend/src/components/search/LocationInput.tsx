@@ -2,7 +2,11 @@
 
 import { useState, useRef, useEffect } from "react";
 import { Plane } from "lucide-react";
-import { LOCATIONS, type Location } from "@/data/location";
+import type { Location } from "@/types/search";
+import { fetchLocationSuggestions } from "@/lib/search-api";
+
+// Wait for a pause in typing before asking the API
+const SUGGEST_DELAY_MS = 150;
 
 interface LocationInputProps {
   value: string;
@@ -16,20 +20,31 @@ export default function LocationInput({
   placeholder = "Enter location",
 }: LocationInputProps) {
   const [isOpen, setIsOpen] = useState(false);
-  const [filtered, setFiltered] = useState<Location[]>(LOCATIONS);
+  const [filtered, setFiltered] = useState<Location[]>([]);
   const ref = useRef<HTMLDivElement>(null);
 
   useEffect(() => {
-    if (value.trim(). length === 0) {
-      setFiltered(LOCATIONS);
-    } else {
-      setFiltered(
-        LOCATIONS.filter((loc) =>
-          loc.name.toLowerCase().includes(value.toLowerCase()) ||
-          loc.full_address.toLowerCase().includes(value.toLowerCase())
-        )
-      );
+    const query = value.trim();
+    if (query.length === 0) {
+      setFiltered([]);
+      return;
     }
+
+    let cancelled = false;
+    const timer = setTimeout(() => {
+      fetchLocationSuggestions(query)
+        .then((locations) => {
+          if (!cancelled) setFiltered(locations);
+        })
+        .catch(() => {
+          if (!cancelled) setFiltered([]);
+        });
+    }, SUGGEST_DELAY_MS);
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
   }, [value]);
 
   useEffect(() => {
@@ -87,7 +102,7 @@ export default function LocationInput({
             <div className="py-1">
               {filtered.map((loc, idx) => (
                 <button
-                  key={`${loc.name}-${idx}`}
+                  key={`${loc.full_address}-${idx}`}
                   onClick={() => handleSelect(loc)}
                   className="w-full px-5 py-3. 5 flex items-start gap-3 text-left
                     hover:bg-[var(--color-primary)]/5 hover:text-[var(--color-primary)] transition-colors
@@ -100,6 +115,9 @@ export default function LocationInput({
                   <div className="flex-1 min-w-0">
                     <p className="text-[14px] font-semibold text-[var(--color-text-main)]">
                       {loc.name}
+                      <span className="ml-2 text-[12px] font-normal text-[var(--color-text-muted)]">
+                        {loc.offers} offers
+                      </span>
                     </p>
                     <p className="text-[12px] text-[var(--color-text-muted)] truncate mt-0. 5">
                       {loc. full_address}
@@ -112,7 +130,7 @@ export default function LocationInput({
             <div className="py-8 text-center">
               <Plane className="w-8 h-8 text-gray-300 mx-auto mb-2" />
               <p className="text-sm text-[var(--color-text-muted)]">
-                No locations found
+                {value.trim().length === 0 ? "Start typing a city or address" : "No locations found"}
               </p>
             </div>
           )}
@@ -1,157 +0,0 @@
-export interface Location {
-  name: string;
-  full_address: string;
-  search_value: string;
-  latitude: number;
-  longitude: number;
-}
-
-export const LOCATIONS: Location[] = [
-  {
-    name: "Las Vegas Airport - Gilespie St",
-    full_address: "7135 Gilespie St, Las Vegas, NV 89119",
-    search_value: "gilespie street",
-    latitude: 36.060839,
-    longitude: -115.16357
-  },
-  {
-    name: "Las Vegas Downtown",
-    full_address: "1 South Main Street, Las Vegas, NV",
-    search_value: "main street",
-    latitude: 36.171666,
-    longitude: -115.46944
-  },
-  {
-    name: "Henderson - Horizon Ridge",
-    full_address: "1450 W Horizon Ridge Pkwy Suite A502, Henderson, NV",
-    search_value: "horizon ridge",
-    latitude: 36.023055,
-    longitude: -115.049166
-  },
-  {
-    name: "Las Vegas - Sahara Ave East",
-    full_address: "1815 E Sahara Avenue, Las Vegas, NV",
-    search_value: "sahara avenue",
-    latitude: 36.143854,
-    longitude: -115.127095
-  },
-  {
-    name: "Las Vegas - Rainbow Blvd",
-    full_address: "2219 South Rainbow Boulevard, Las Vegas, NV",
-    search_value: "rainbow boulevard",
-    latitude: 36.146944,
-    longitude: -115.243055
-  },
-  {
-    name: "Las Vegas Strip - 2777 S",
-    full_address: "2777 South Las Vegas Blvd, Las Vegas, NV",
-    search_value: "2777 south las vegas",
-    latitude: 36.13739,
-    longitude: -115.15944
-  },
-  {
-    name: "Circus Circus Hotel",
-    full_address: "2880 South Las Vegas Boulevard, Circus Circus, Las Vegas, NV",
-    search_value: "circus",
-    latitude: 36.1375,
-    longitude: -115.166388
-  },
-  {
-    name: "Las Vegas Strip - 3131 S",
-    full_address: "3131 Las Vegas Blvd S, Las Vegas, NV",
-    search_value: "3131",
-    latitude: 36.127204,
-    longitude: -115.168021
-  },
-  {
-    name: "Hughes Center",
-    full_address: "325 Hughes Center Drive, Las Vegas, NV",
-    search_value: "hughes center",
-    latitude: 36.11537,
-    longitude: -115.15862
-  },
-  {
-    name: "Las Vegas Strip - 3300 S",
-    full_address: "3300 Las Vegas Blvd S, Las Vegas, NV",
-    search_value: "3300",
-    latitude: 36.1229,
-    longitude: -115.1712
-  },
-  {
-    name: "Las Vegas Strip - 3355 S",
-    full_address: "3355 S Las Vegas Blvd, Las Vegas, NV",
-    search_value: "3355",
-    latitude: 36.12269,
-    longitude: -115.170194
-  },
-  {
-    name: "Bellagio Resort",
-    full_address: "3600 South Las Vegas Boulevard, Bellagio Resort, Las Vegas, NV",
-    search_value: "bellagio",
-    latitude: 36.111944,
-    longitude: -115.175833
-  },
-  {
-    name: "MGM Grand Resort",
-    full_address: "3799 South Las Vegas Boulevard, MGM Resort, Las Vegas, NV",
-    search_value: "mgm",
-    latitude: 36.102428,
-    longitude: -115.170021
-  },
-  {
-    name: "Excalibur Hotel",
-    full_address: "3850 South Las Vegas Boulevard, Excalibur Hotel, Las Vegas, NV",
-    search_value: "excalibur",
-    latitude: 36.098888,
-    longitude: -115.174444
-  },
-  {
-    name: "Luxor Hotel",
-    full_address: "3900 South Las Vegas Boulevard, Luxor Hotel, Las Vegas, NV",
-    search_value: "luxor",
-    latitude: 36.095563,
-    longitude: -115.175836
-  },
-  {
-    name: "Mandalay Bay Resort",
-    full_address: "3950 South Las Vegas Boulevard, Mandalay Bay Resort, Las Vegas, NV",
-    search_value: "mandalay",
-    latitude: 36.092222,
-    longitude: -115.174166
-  },
-  {
-    name: "University Center",
-    full_address: "4775 University Center Drive, Las Vegas, NV",
-    search_value: "swenson street",
-    latitude: 36.103552,
-    longitude: -115.151663
-  },
-  {
-    name: "Las Vegas - Sahara Ave West",
-    full_address: "5905 W Sahara Ave Unit A, Las Vegas, NV",
-    search_value: "sahara",
-    latitude: 36.142643,
-    longitude: -115.222321
-  },
-  {
-    name: "Fremont Experience",
-    full_address: "8 Fremont Experience St, Las Vegas, NV",
-    search_value: "fremont experience",
-    latitude: 36.172465,
-    longitude: -115.145698
-  },
-  {
-    name: "South Las Vegas - 8755",
-    full_address: "8755 Las Vegas Blvd S, Las Vegas, NV",
-    search_value: "8755",
-    latitude: 36.030944,
-    longitude: -115.176956
-  },
-  {
-    name: "South Las Vegas - 8801",
-    full_address: "8801 South Las Vegas Blvd, Las Vegas, NV",
-    search_value: "8801 south las vegas",
-    latitude: 36.029002,
-    longitude: -115.174099
-  },
-];
\ No newline at end of file
@@ -1,5 +1,5 @@
 import axios from "axios";
-import type { ApiResponse, Filters, SearchFilters } from "@/types/search";
+import type { ApiResponse, Filters, Location, PriceHistogram, SearchFilters } from "@/types/search";
 
 // Clean trailing slashes
 const base = process.env.NEXT_PUBLIC_API_URL || "http://127.0.0.1:8000";
@@ -28,12 +28,57 @@ export async function fetchCars(filters: SearchFilters): Promise<ApiResponse> {
   if (filters.agency) params.agency = filters.agency;
   if (filters.pickup_location) params.pickup_location = filters.pickup_location;
   if (filters.dropoff_location) params.dropoff_location = filters.dropoff_location;
+  if (filters.near) params.near = filters.near;
+  if (filters.radius_km) params.radius_km = filters.radius_km;
+  // Keyset pagination: a cursor from the previous response replaces page
+  if (filters.cursor) {
+    params.cursor = filters.cursor;
+    delete params.page;
+  }
 
   const response = await axios.get<ApiResponse>(`${API_BASE}/cars/`, { params });
   return response.data;
 }
 
-export async function fetchFilters(): Promise<Filters> {
-  const response = await axios.get<Filters>(`${API_BASE}/filters/`);
+export async function fetchFilters(selection: Partial<SearchFilters> = {}): Promise<Filters> {
+  const params: Record<string, string | number | boolean> = {};
+
+  if (selection.car_type) params.car_type = selection.car_type;
+  if (selection.category) params.category = selection.category;
+  if (selection.fuel) params.fuel = selection.fuel;
+  if (selection.agency) params.agency = selection.agency;
+  if (selection.min_price) params.min_price = selection.min_price;
+  if (selection.max_price) params.max_price = selection.max_price;
+  if (selection.free_cancellation) params.free_cancellation = true;
+  if (selection.unlimited_mileage) params.unlimited_mileage = true;
+  if (selection.pickup_location) params.pickup_location = selection.pickup_location;
+
+  const response = await axios.get<Filters>(`${API_BASE}/filters/`, { params });
+  return response.data;
+}
+
+export async function fetchPriceHistogram(
+  selection: Partial<SearchFilters> = {},
+  buckets = 20
+): Promise<PriceHistogram> {
+  // Price filters are left out: the histogram spans the whole slider range
+  const params: Record<string, string | number | boolean> = { buckets };
+
+  if (selection.car_type) params.car_type = selection.car_type;
+  if (selection.category) params.category = selection.category;
+  if (selection.fuel) params.fuel = selection.fuel;
+  if (selection.agency) params.agency = selection.agency;
+  if (selection.free_cancellation) params.free_cancellation = true;
+  if (selection.unlimited_mileage) params.unlimited_mileage = true;
+  if (selection.pickup_location) params.pickup_location = selection.pickup_location;
+
+  const response = await axios.get<PriceHistogram>(`${API_BASE}/filters/price-histogram`, { params });
+  return response.data;
+}
+
+export async function fetchLocationSuggestions(q: string, limit = 10): Promise<Location[]> {
+  const response = await axios.get<Location[]>(`${API_BASE}/locations/suggest`, {
+    params: { q, limit },
+  });
   return response.data;
 }
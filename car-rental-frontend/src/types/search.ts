@@ -31,6 +31,7 @@ export interface CarResult {
   fuel_policy: string;
   free_cancellation: boolean;
   unlimited_mileage: boolean;
+  distance_km?: number;
 }
 
 export interface ApiResponse {
@@ -38,6 +39,7 @@ export interface ApiResponse {
   limit: number;
   count: number;
   total_pages: number;
+  next_cursor?: string | null;
   results: CarResult[];
 }
 
@@ -50,6 +52,39 @@ export interface Filters {
     min: number;
     max: number;
   };
+  // Offer counts per value, conditioned on the other selected filters
+  facet_counts?: {
+    car_types: Record<string, number>;
+    categories: Record<string, number>;
+    fuel_types: Record<string, number>;
+    agencies: Record<string, number>;
+    free_cancellation: Record<string, number>;
+    unlimited_mileage: Record<string, number>;
+  };
+}
+
+// Offer counts per price bucket for the price slider
+export interface PriceHistogram {
+  min: number;
+  max: number;
+  bucket_width: number;
+  count: number;
+  buckets: {
+    min: number;
+    max: number;
+    count: number;
+  }[];
+}
+
+// GET /locations/suggest result
+export interface Location {
+  type: "city" | "address";
+  name: string;
+  full_address: string;
+  search_value: string;
+  latitude: number;
+  longitude: number;
+  offers: number;
 }
 
 export interface SearchFilters {
@@ -63,7 +98,10 @@ export interface SearchFilters {
   pickup_location?: string;  
   dropoff_location?: string; 
   unlimited_mileage?: boolean;
-  sort_by?: "price_asc" | "price_desc" | "rating" | "name";
+  near?: string;
+  radius_km?: number;
+  sort_by?: "price_asc" | "price_desc" | "rating" | "name" | "distance";
   page?: number;
   limit?: number;
+  cursor?: string;
 }
\ No newline at end of file